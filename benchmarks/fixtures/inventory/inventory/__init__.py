@@ -0,0 +1,6 @@
+"""Minimal stock-keeping library."""
+
+from .pricing import apply_discount, with_tax
+from .store import Inventory, Item
+
+__all__ = ["Inventory", "Item", "apply_discount", "with_tax"]
@@ -0,0 +1,15 @@
+"""Price calculations."""
+
+TAX_RATE = 0.2
+
+
+def apply_discount(price: float, percent: float) -> float:
+    """Reduce a price by a percentage (0-100)."""
+    if not 0 <= percent <= 100:
+        raise ValueError(f"discount must be between 0 and 100, got {percent}")
+    return round(price * (1 - percent / 100), 2)
+
+
+def with_tax(price: float, rate: float = TAX_RATE) -> float:
+    """Add sales tax to a price."""
+    return round(price * (1 + rate), 2)
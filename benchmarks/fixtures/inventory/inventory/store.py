@@ -0,0 +1,38 @@
+"""Item quantities and stock value."""
+
+from dataclasses import dataclass
+from typing import Dict
+
+from .pricing import apply_discount
+
+
+@dataclass
+class Item:
+    name: str
+    unit_price: float
+    quantity: int = 0
+
+
+class Inventory:
+    """Items in stock, keyed by name."""
+
+    def __init__(self):
+        self.items: Dict[str, Item] = {}
+
+    def add(self, name: str, unit_price: float, quantity: int = 1) -> Item:
+        """Add stock of an item, creating it on first use."""
+        item = self.items.setdefault(name, Item(name, unit_price))
+        item.unit_price = unit_price
+        item.quantity += quantity
+        return item
+
+    def remove(self, name: str, quantity: int = 1) -> Item:
+        """Take stock of an item out of the inventory."""
+        item = self.items[name]
+        item.quantity -= quantity
+        return item
+
+    def total_value(self, discount: float = 0) -> float:
+        """Value of all stock at unit price, optionally discounted."""
+        total = sum(item.unit_price * item.quantity for item in self.items.values())
+        return apply_discount(total, discount)
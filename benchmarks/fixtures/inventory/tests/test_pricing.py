@@ -0,0 +1,16 @@
+import pytest
+
+from inventory.pricing import apply_discount, with_tax
+
+
+def test_apply_discount():
+    assert apply_discount(200, 25) == 150
+
+
+def test_apply_discount_rejects_out_of_range():
+    with pytest.raises(ValueError):
+        apply_discount(10, 120)
+
+
+def test_with_tax():
+    assert with_tax(10) == 12
@@ -0,0 +1,22 @@
+from inventory.store import Inventory
+
+
+def test_add_accumulates_quantity():
+    inventory = Inventory()
+    inventory.add("bolt", 0.5, 10)
+    inventory.add("bolt", 0.5, 5)
+    assert inventory.items["bolt"].quantity == 15
+
+
+def test_remove_reduces_quantity():
+    inventory = Inventory()
+    inventory.add("nut", 0.25, 4)
+    assert inventory.remove("nut", 3).quantity == 1
+
+
+def test_total_value():
+    inventory = Inventory()
+    inventory.add("bolt", 0.5, 10)
+    inventory.add("nut", 0.25, 4)
+    assert inventory.total_value() == 6
+    assert inventory.total_value(discount=50) == 3
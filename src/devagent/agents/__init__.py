@@ -5,11 +5,13 @@ from .editor import create_editor_agent
 from .executor import create_executor_agent
 from .verifier import create_verifier_agent
 from .pr_bot import create_pr_bot_agent
+from .dispatch import create_dispatch_tool
 
 __all__ = [
     "create_retriever_agent",
     "create_editor_agent", 
     "create_executor_agent",
     "create_verifier_agent",
-    "create_pr_bot_agent"
-]
\ No newline at end of file
+    "create_pr_bot_agent",
+    "create_dispatch_tool"
+]
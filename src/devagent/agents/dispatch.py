@@ -0,0 +1,66 @@
+"""Supervisor tool for dispatching several specialist agents at once."""
+
+from typing import Annotated, List, Sequence
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool, InjectedToolCallId, tool
+from langgraph.prebuilt import InjectedState
+from langgraph.types import Command, Send
+
+
+def create_dispatch_tool(agent_names: Sequence[str]) -> BaseTool:
+    """Create a tool that hands off to several agents so they run concurrently.
+
+    The supervisor calls it once with the names of independent agents. Each
+    agent becomes its own branch of the graph in the same step (one ``Send``
+    per agent), so the step takes as long as the slowest branch; their outputs
+    are merged back into AgentState by its reducers before the supervisor runs
+    again.
+
+    Args:
+        agent_names: Names of the agents the supervisor may dispatch
+
+    Returns:
+        The dispatch_agents tool
+    """
+    known = list(agent_names)
+
+    @tool(
+        "dispatch_agents",
+        description=(
+            "Run several independent agents at the same time. "
+            f"agents: names to run in parallel, from {', '.join(known)}."
+        ),
+    )
+    def dispatch_agents(
+        agents: List[str],
+        state: Annotated[dict, InjectedState],
+        tool_call_id: Annotated[str, InjectedToolCallId],
+    ) -> Command:
+        targets = list(dict.fromkeys(agents))
+        unknown = [name for name in targets if name not in known]
+        if unknown or not targets:
+            return Command(update={"messages": [ToolMessage(
+                content=f"Error: unknown agents {unknown or targets}; choose from {', '.join(known)}",
+                name="dispatch_agents",
+                tool_call_id=tool_call_id,
+            )]})
+
+        messages = state["messages"] + [ToolMessage(
+            content=f"Successfully dispatched {', '.join(targets)} in parallel",
+            name="dispatch_agents",
+            tool_call_id=tool_call_id,
+            # A fixed id, so the copies coming back with each branch merge into one
+            id=f"dispatch-{tool_call_id}",
+        )]
+        # The parent state records the dispatch, like a handoff does; each branch
+        # gets it in its own input and the agents' results are merged back after.
+        # goto is a tuple because ToolNode folds parent commands whose goto is a
+        # list of Sends into one Command and drops their update.
+        return Command(
+            graph=Command.PARENT,
+            goto=tuple(Send(name, {**state, "messages": messages}) for name in targets),
+            update={"messages": messages},
+        )
+
+    return dispatch_agents
@@ -3,7 +3,9 @@
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.prebuilt import create_react_agent
 
+from ..core.state import EditorState
 from ..tools.core_tools import EDITOR_TOOLS
+from .tool_batches import BATCH_PROMPT, OrderedToolNode
 
 
 def create_editor_agent(model: BaseChatModel):
@@ -17,11 +19,17 @@ def create_editor_agent(model: BaseChatModel):
     """
     return create_react_agent(
         model=model,
-        tools=EDITOR_TOOLS,
+        # Several edits in one reply run in order, each on top of the previous one's diff
+        tools=OrderedToolNode(EDITOR_TOOLS),
         prompt=(
             "You are a code generation and editing specialist. Your job is to create, modify, and improve code. "
-            "Use read_file_tool to understand existing code, write_file_tool to create/modify files, "
-            "and bash_tool for file operations. Generate clean, well-documented, and functional code."
+            "Use read_file_tool to understand existing code. Change files with edit_file_tool (exact "
+            "old_string/new_string replacement) or apply_patch_tool (unified diff, for several hunks or files); "
+            "never rewrite a whole file to change part of it. Use write_file_tool only to replace a file entirely, "
+            "and bash_tool for other file operations. Generate clean, well-documented, and functional code."
+            + BATCH_PROMPT
         ),
+        state_schema=EditorState,
+        version="v1",
         name="editor"
     )
\ No newline at end of file
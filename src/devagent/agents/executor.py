@@ -3,7 +3,9 @@
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.prebuilt import create_react_agent
 
+from ..core.state import ExecutorState
 from ..tools.core_tools import EXECUTOR_TOOLS
+from .tool_batches import BATCH_PROMPT
 
 
 def create_executor_agent(model: BaseChatModel):
@@ -20,8 +22,13 @@ def create_executor_agent(model: BaseChatModel):
         tools=EXECUTOR_TOOLS,
         prompt=(
             "You are a code execution and testing specialist. Your job is to run tests and validate code changes. "
-            "Use bash_tool to execute tests, run commands, and validate functionality. "
+            "After code changes, use run_affected_tests_tool to run only the tests affected by the change; "
+            "once they pass, call it again with run_full_suite=True before reporting success. "
+            "Use bash_tool to execute tests, run commands, and validate functionality; pass a larger timeout "
+            "for long test suites. When output is truncated, page through the saved stdout_file with read_file_tool. "
             "Use read_file_tool to examine test files and results. Report on test outcomes and code quality."
+            + BATCH_PROMPT
         ),
+        state_schema=ExecutorState,
         name="executor"
     )
\ No newline at end of file
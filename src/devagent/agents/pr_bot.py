@@ -4,6 +4,7 @@ from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.prebuilt import create_react_agent
 
 from ..tools.core_tools import PR_BOT_TOOLS
+from .tool_batches import OrderedToolNode
 
 
 def create_pr_bot_agent(model: BaseChatModel):
@@ -17,11 +18,13 @@ def create_pr_bot_agent(model: BaseChatModel):
     """
     return create_react_agent(
         model=model,
-        tools=PR_BOT_TOOLS,
+        # Git commands in one reply (add, commit, push) run in the order given
+        tools=OrderedToolNode(PR_BOT_TOOLS),
         prompt=(
             "You are a version control and deployment specialist. Your job is to manage git operations and create PRs. "
             "Use bash_tool for git commands, PR creation, and deployment tasks. "
             "Use read_file_tool to examine changes. Handle all aspects of code deployment and version control."
         ),
-        name="pr_bot"
+        name="pr_bot",
+        version="v1"
     )
\ No newline at end of file
@@ -3,7 +3,9 @@
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.prebuilt import create_react_agent
 
+from ..core.state import RetrieverState
 from ..tools.core_tools import RETRIEVER_TOOLS
+from .tool_batches import BATCH_PROMPT
 
 
 def create_retriever_agent(model: BaseChatModel):
@@ -21,16 +23,24 @@ def create_retriever_agent(model: BaseChatModel):
         prompt=(
             "You are a codebase analysis specialist. You MUST use the available tools to gather real information about the codebase.\n\n"
             
-            "**CRITICAL**: ALWAYS use tools before answering. Do not guess or make assumptions. Use bash_tool('pwd') first, then glob_tool to find files, then read_file_tool to examine them.\n\n"
+            "**CRITICAL**: ALWAYS use tools before answering. Do not guess or make assumptions. "
+            "The repository is indexed on disk, so prefer the index tools over walking the tree.\n\n"
             
             "Follow this process:\n"
-            "1. Use bash_tool('pwd') to see current directory\n"
-            "2. Use bash_tool('ls -la') to see top-level structure\n"
-            "3. Use glob_tool('**/*.py') to find Python files\n"
-            "4. Use read_file_tool() to examine key files\n"
-            "5. Use grep_tool() to search for specific content if needed\n\n"
+            "1. Use gather_context_tool('question') first: it returns the most relevant code, ranked and packed "
+            "into a token budget, and shares it with the other agents\n"
+            "2. Use repo_overview_tool() to see the repository layout\n"
+            "3. Use find_files_tool('**/*.py') to locate files and find_symbol_tool('name') to locate definitions\n"
+            "4. Use outline_file_tool('path') before reading a file, find_definition_tool('name') to jump to a "
+            "definition's code and find_references_tool('name') to see where it is called\n"
+            "5. Use search_index_tool('words') to find the code that mentions a topic, and "
+            "semantic_search_tool('description') when you do not know the exact names\n"
+            "6. Use read_file_tool() to examine only the key files\n"
+            "7. Use grep_tool('regex') to search the whole repository in one call, and bash_tool() only if nothing else fits\n\n"
             
             "Always use tools to get real information. Never guess or make up file names."
+            + BATCH_PROMPT
         ),
+        state_schema=RetrieverState,
         name="retriever"
     )
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""Running the tool calls of one model reply.
+
+Agents are asked to put independent tool calls in a single reply, which saves
+a model round-trip per extra call. LangGraph runs each call of a reply as its
+own task, so reads, searches and test runs proceed concurrently (bounded by the
+run's ``max_concurrency``). Calls that change files must not race each other,
+and each edit has to see the diff written by the previous one: agents with such
+tools use OrderedToolNode.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage
+from langgraph.prebuilt import ToolNode
+from langgraph.types import Command
+
+# Appended to agent prompts
+BATCH_PROMPT = (
+    "\n\nWhen you need several tool calls that do not depend on each other's results "
+    "(for example reading a few files), make them all in one reply: they run at the same time."
+)
+
+# Tools that change files; a reply with more than one of them runs in order
+FILE_CHANGING_TOOLS = frozenset({"edit_file_tool", "apply_patch_tool", "write_file_tool", "bash_tool"})
+
+
+class OrderedToolNode(ToolNode):
+    """ToolNode that runs a reply's calls one at a time, in order, when several change files.
+
+    Each call sees the state written by the calls before it (the cumulative
+    diff in particular). Replies with at most one file-changing call run
+    concurrently like in a plain ToolNode. Use with ``create_react_agent(...,
+    version="v1")`` so the node receives the whole reply instead of one call.
+    """
+
+    def _ordered_reply(self, input: Any) -> Optional[AIMessage]:
+        """The reply to run in order, or None when its calls can run concurrently."""
+        messages = input.get(self._messages_key, []) if isinstance(input, dict) else []
+        reply = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
+        if reply is None or sum(call["name"] in FILE_CHANGING_TOOLS for call in reply.tool_calls) < 2:
+            return None
+        return reply
+
+    def _call_input(self, input: Dict[str, Any], reply: AIMessage, call: Dict[str, Any],
+                    updates: Dict[str, Any]) -> Dict[str, Any]:
+        """Input for one call of the reply, with the state updates of the calls before it."""
+        messages = input[self._messages_key]
+        position = max(i for i, m in enumerate(messages) if m is reply)
+        single = reply.model_copy(update={"tool_calls": [call]})
+        return {**input, **updates, self._messages_key: [*messages[:position], single, *messages[position + 1:]]}
+
+    def _state_updates(self, outputs: List[Any]) -> Dict[str, Any]:
+        """State written by a call's Commands, besides its messages."""
+        updates: Dict[str, Any] = {}
+        for output in outputs:
+            if isinstance(output, Command) and isinstance(output.update, dict):
+                updates.update({k: v for k, v in output.update.items() if k != self._messages_key})
+        return updates
+
+    @staticmethod
+    def _flatten(result: Any) -> List[Any]:
+        return list(result) if isinstance(result, list) else [result]
+
+    def _func(self, input, config, runtime):
+        reply = self._ordered_reply(input)
+        if reply is None:
+            return super()._func(input, config, runtime)
+        outputs: List[Any] = []
+        updates: Dict[str, Any] = {}
+        for call in reply.tool_calls:
+            result = self._flatten(super()._func(self._call_input(input, reply, call, updates), config, runtime))
+            outputs.extend(result)
+            updates.update(self._state_updates(result))
+        return outputs
+
+    async def _afunc(self, input, config, runtime):
+        reply = self._ordered_reply(input)
+        if reply is None:
+            return await super()._afunc(input, config, runtime)
+        outputs: List[Any] = []
+        updates: Dict[str, Any] = {}
+        for call in reply.tool_calls:
+            result = self._flatten(await super()._afunc(self._call_input(input, reply, call, updates), config, runtime))
+            outputs.extend(result)
+            updates.update(self._state_updates(result))
+        return outputs
@@ -1,9 +1,35 @@
 """Verifier agent for result analysis and decision making."""
 
+from typing import List
+
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langgraph.prebuilt import create_react_agent
 
+from ..core.state import VerifierState
 from ..tools.core_tools import VERIFIER_TOOLS
+from ..tools.testing import format_run_result
+from .tool_batches import BATCH_PROMPT
+
+VERIFIER_PROMPT = (
+    "You are a code review and quality assurance specialist. Your job is to analyze results and make decisions. "
+    "Use read_file_tool to examine code and test results, bash_tool to run quality checks. "
+    "Provide thorough analysis of code quality, test results, and overall project health."
+    + BATCH_PROMPT
+)
+
+
+def _verifier_prompt(state: VerifierState) -> List[BaseMessage]:
+    """Fixed system prompt and history, then the latest structured test results instead of raw logs.
+
+    The results come last so the system prompt and history stay an unchanged
+    prefix that the model server's prompt cache can reuse. They are a human
+    message because Ollama moves every system message to the front.
+    """
+    messages = [SystemMessage(content=VERIFIER_PROMPT)] + state["messages"]
+    if state.get("run_result"):
+        messages.append(HumanMessage(content="Latest test results:\n" + format_run_result(state["run_result"])))
+    return messages
 
 
 def create_verifier_agent(model: BaseChatModel):
@@ -18,10 +44,7 @@ def create_verifier_agent(model: BaseChatModel):
     return create_react_agent(
         model=model,
         tools=VERIFIER_TOOLS,
-        prompt=(
-            "You are a code review and quality assurance specialist. Your job is to analyze results and make decisions. "
-            "Use read_file_tool to examine code and test results, bash_tool to run quality checks. "
-            "Provide thorough analysis of code quality, test results, and overall project health."
-        ),
+        prompt=_verifier_prompt,
+        state_schema=VerifierState,
         name="verifier"
     )
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""Headless batch mode: run many tasks concurrently, each in its own git worktree.
+
+Tasks are read from a JSONL file, one object per line with a ``prompt`` and an
+optional ``id`` and ``base`` (git ref to start from, HEAD by default). Each task
+gets a detached worktree of the repository and its own DevAgentGraph; a bounded
+thread pool runs them. All graphs share one chat model (and so one connection
+pool to the model server), the global LLM client and its response cache.
+Results are appended to a JSONL file as tasks finish.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from .core.defaults import DEFAULT_BATCH_WORKERS
+from .core.graph import DevAgentGraph
+from .core.router import ModelRouter
+from .core.tracing import TraceRecorder
+from .index.files import devagent_dir
+from .tools.index_tools import close_workspace_indexes
+from .tools.sandbox import close_sandbox_pool
+
+logger = logging.getLogger("devagent.batch")
+
+# Longest git operation (worktree add/remove, diff) before the task fails
+GIT_TIMEOUT = 120
+
+
+def load_tasks(path: str) -> List[Dict[str, Any]]:
+    """Read tasks from a JSONL file, numbering those without an id.
+
+    Raises:
+        ValueError: When a line is not a JSON object with a prompt, or ids repeat
+    """
+    tasks = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            task = json.loads(line)
+            if not isinstance(task, dict) or not task.get("prompt"):
+                raise ValueError(f"{path}:{line_number}: a task needs a 'prompt'")
+            task["id"] = str(task.get("id") or f"task-{line_number}")
+            tasks.append(task)
+    ids = [task["id"] for task in tasks]
+    if len(ids) != len(set(ids)):
+        raise ValueError(f"{path}: task ids must be unique")
+    return tasks
+
+
+def _git(root: str, *args: str) -> str:
+    result = subprocess.run(["git", *args], cwd=root, capture_output=True, text=True, timeout=GIT_TIMEOUT)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def _worktree_name(task_id: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", task_id)
+
+
+class BatchRunner:
+    """Runs tasks from a task list through a bounded pool of isolated agent graphs.
+
+    Args:
+        repo_root: Git repository the worktrees are created from
+        model: Chat model shared by every task's graph, bypassing model routing
+        router: Model router shared by every task's graph (a new one when neither is given)
+        workers: Tasks run at the same time
+        worktree_dir: Where worktrees are created (``.devagent/worktrees`` by default)
+        keep_worktrees: Leave each worktree in place after its task (for inspection)
+        tracer_factory: Builds a TraceRecorder for a task id, to trace each task
+    """
+
+    def __init__(
+        self,
+        repo_root: str,
+        model: Optional[BaseChatModel] = None,
+        router: Optional[ModelRouter] = None,
+        workers: int = DEFAULT_BATCH_WORKERS,
+        worktree_dir: Optional[str] = None,
+        keep_worktrees: bool = False,
+        tracer_factory: Optional[Callable[[str], TraceRecorder]] = None,
+    ):
+        self.repo_root = os.path.abspath(repo_root)
+        self.model = model
+        self.router = router or (ModelRouter() if model is None else None)
+        self.workers = max(1, workers)
+        self.worktree_dir = worktree_dir or os.path.join(devagent_dir(self.repo_root), "worktrees")
+        self.keep_worktrees = keep_worktrees
+        self.tracer_factory = tracer_factory
+        # `git worktree add/remove` lock the repository's worktree list
+        self._git_lock = threading.Lock()
+
+    def run_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one task in a fresh worktree.
+
+        Returns:
+            Result dictionary: id, success, response, diff, test outcome, timings
+            and the error when the task failed
+        """
+        worktree = os.path.join(self.worktree_dir, _worktree_name(task["id"]))
+        result: Dict[str, Any] = {"id": task["id"], "prompt": task["prompt"], "success": False}
+        start = time.perf_counter()
+        try:
+            with self._git_lock:
+                if os.path.exists(worktree):
+                    _git(self.repo_root, "worktree", "remove", "--force", worktree)
+                _git(self.repo_root, "worktree", "add", "--detach", worktree, task.get("base", "HEAD"))
+            result["worktree"] = worktree
+
+            graph = DevAgentGraph(
+                working_directory=worktree,
+                model=self.model,
+                router=self.router,
+                thread_id=f"batch-{_worktree_name(task['id'])}",
+                tracer=self.tracer_factory(task["id"]) if self.tracer_factory else None,
+            )
+            turn = graph.process_user_input(task["prompt"])
+            state = turn.get("state") or {}
+            run_result = state.get("run_result") or {}
+
+            # Stage everything so new files show up in the diff
+            _git(worktree, "add", "-A")
+            result.update(
+                response=turn.get("response"),
+                diff=_git(worktree, "diff", "--cached", "HEAD"),
+                tests_passed=run_result.get("success") if run_result else None,
+                success=not turn.get("error"),
+            )
+            if turn.get("error"):
+                result["error"] = turn["error"]
+        except Exception as e:
+            logger.error(f"❌ BATCH: {task['id']} failed - {str(e)}")
+            result["error"] = str(e)
+        finally:
+            close_sandbox_pool(worktree)
+            close_workspace_indexes(worktree)
+            if not self.keep_worktrees and os.path.exists(worktree):
+                with self._git_lock:
+                    try:
+                        _git(self.repo_root, "worktree", "remove", "--force", worktree)
+                    except (RuntimeError, subprocess.TimeoutExpired):
+                        shutil.rmtree(worktree, ignore_errors=True)
+                        _git(self.repo_root, "worktree", "prune")
+                result.pop("worktree", None)
+        result["elapsed_s"] = round(time.perf_counter() - start, 3)
+        return result
+
+    def run(
+        self,
+        tasks: List[Dict[str, Any]],
+        output_path: Optional[str] = None,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """Run every task on the worker pool.
+
+        Args:
+            tasks: Tasks with id and prompt (see load_tasks)
+            output_path: JSONL file each result is appended to as soon as it finishes
+            on_result: Called with each result as it finishes
+
+        Returns:
+            Aggregate statistics: task counts, wall time, throughput and mean task time
+        """
+        write_lock = threading.Lock()
+        results: List[Dict[str, Any]] = []
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="devagent-batch") as pool:
+            futures = [pool.submit(self.run_task, task) for task in tasks]
+            for future in as_completed(futures):
+                result = future.result()
+                with write_lock:
+                    results.append(result)
+                    if output_path:
+                        with open(output_path, "a", encoding="utf-8") as f:
+                            f.write(json.dumps(result) + "\n")
+                if on_result:
+                    on_result(result)
+        wall = time.perf_counter() - start
+        succeeded = sum(1 for r in results if r["success"])
+        return {
+            "tasks": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "wall_s": round(wall, 2),
+            "tasks_per_minute": round(len(results) / wall * 60, 2) if wall > 0 else 0.0,
+            "mean_task_s": round(sum(r["elapsed_s"] for r in results) / len(results), 2) if results else 0.0,
+            "workers": self.workers,
+        }
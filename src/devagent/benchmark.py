@@ -0,0 +1,240 @@
+"""Offline benchmarks: replay recorded model responses through the full agent graph.
+
+Each scenario (``benchmarks/scenarios/*.json``) names a fixture repository, a
+prompt and the model responses to replay, plus optional expectations about the
+final answer and the edited files. Scenarios run against a fresh copy of the
+fixture with a ReplayChatModel, so the numbers measure orchestration and tool
+overhead only: no model server or network is involved.
+
+Usage::
+
+    python -m devagent.benchmark [SCENARIO ...] [--repeat 3] [--output results.json] [--baseline old.json]
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+from .core import llm
+from .core.graph import DevAgentGraph
+from .core.replay import ReplayChatModel, ReplayLLMClient
+from .core.tracing import TraceRecorder, read_spans
+from .tools.index_tools import close_workspace_indexes
+from .tools.sandbox import close_sandbox_pool
+
+console = Console()
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks")
+
+# Name under which the CLI startup time is reported
+STARTUP_SCENARIO = "startup"
+
+# Relative wall time increase over the baseline reported as a regression
+REGRESSION_THRESHOLD = 0.2
+
+
+def load_scenarios(scenario_dir: str, names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Load scenarios from a directory, optionally only the named ones."""
+    scenarios = []
+    for file_name in sorted(os.listdir(scenario_dir)):
+        if not file_name.endswith(".json"):
+            continue
+        with open(os.path.join(scenario_dir, file_name), "r", encoding="utf-8") as f:
+            scenario = json.load(f)
+        if not names or scenario["name"] in names:
+            scenarios.append(scenario)
+    return scenarios
+
+
+def check_expectations(scenario: Dict[str, Any], response: str, repo: str) -> List[str]:
+    """Compare a run with the scenario's expectations.
+
+    Returns:
+        Descriptions of the expectations that failed (empty when all hold)
+    """
+    expect = scenario.get("expect", {})
+    failures = []
+    if "response_contains" in expect and expect["response_contains"] not in (response or ""):
+        failures.append(f"response lacks '{expect['response_contains']}'")
+    for path, text in expect.get("files_contain", {}).items():
+        full_path = os.path.join(repo, path)
+        if not os.path.exists(full_path):
+            failures.append(f"{path} does not exist")
+            continue
+        with open(full_path, "r", encoding="utf-8") as f:
+            if text not in f.read():
+                failures.append(f"{path} lacks '{text}'")
+    return failures
+
+
+def run_once(scenario: Dict[str, Any], fixture_dir: str, trace_memory: bool = False) -> Dict[str, Any]:
+    """Run a scenario once in a fresh copy of its fixture.
+
+    Returns:
+        Dictionary with build and run time, LLM calls, tool calls, expectation
+        failures and, with trace_memory, the peak traced memory in bytes
+    """
+    previous_client = llm._llm_client
+    with tempfile.TemporaryDirectory(prefix="devagent-bench-") as tmp:
+        repo = os.path.join(tmp, "repo")
+        shutil.copytree(os.path.join(fixture_dir, scenario["fixture"]), repo)
+        client = ReplayLLMClient(scenario["responses"])
+        tracer = TraceRecorder(os.path.join(tmp, "traces"))
+        os.makedirs(tracer.directory)
+        llm.set_llm_client(client)
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            graph = DevAgentGraph(working_directory=repo, model=ReplayChatModel(client), tracer=tracer)
+            graph.compile()
+            built = time.perf_counter()
+            result = graph.process_user_input(scenario["prompt"])
+            finished = time.perf_counter()
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+            llm.set_llm_client(previous_client)
+            close_sandbox_pool(repo)
+            close_workspace_indexes(repo)
+
+        spans = read_spans(tracer.path) if os.path.exists(tracer.path) else []
+        tool_calls = Counter(span["name"] for span in spans if span["kind"] == "tool")
+        failures = check_expectations(scenario, result.get("response"), repo)
+        if client.calls != len(scenario["responses"]):
+            failures.append(f"replayed {client.calls} of {len(scenario['responses'])} responses")
+        return {
+            "build_s": built - start,
+            "run_s": finished - built,
+            "llm_calls": client.calls,
+            "tool_calls": dict(tool_calls),
+            "tool_errors": sum(span["status"]["code"] == "ERROR" for span in spans if span["kind"] == "tool"),
+            "peak_memory_bytes": peak,
+            "failures": failures,
+        }
+
+
+def run_scenario(
+    scenario: Dict[str, Any], fixture_dir: str, repeat: int = 3, measure_memory: bool = True
+) -> Dict[str, Any]:
+    """Benchmark a scenario: median times over ``repeat`` runs, plus one traced run for peak memory.
+
+    Memory is measured in a separate run because tracemalloc slows everything down.
+    """
+    runs = [run_once(scenario, fixture_dir) for _ in range(max(1, repeat))]
+    peak = run_once(scenario, fixture_dir, trace_memory=True)["peak_memory_bytes"] if measure_memory else None
+    first = runs[0]
+    return {
+        "scenario": scenario["name"],
+        "runs": len(runs),
+        "build_s": round(statistics.median(r["build_s"] for r in runs), 4),
+        "run_s": round(statistics.median(r["run_s"] for r in runs), 4),
+        "llm_calls": first["llm_calls"],
+        "tool_calls": first["tool_calls"],
+        "tool_errors": first["tool_errors"],
+        "peak_memory_mb": round(peak / 2**20, 1) if peak is not None else None,
+        "ok": not any(r["failures"] for r in runs),
+        "failures": sorted({f for r in runs for f in r["failures"]}),
+    }
+
+
+def measure_startup(repeat: int = 5) -> Dict[str, Any]:
+    """Time ``devagent --version`` in fresh interpreters: what every CLI start pays for imports.
+
+    Reported as the pseudo-scenario ``startup`` so baselines track it like the others.
+    """
+    times = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "devagent.cli", "--version"], capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return {
+        "scenario": STARTUP_SCENARIO,
+        "runs": len(times),
+        "build_s": None,
+        "run_s": round(statistics.median(times), 4),
+        "llm_calls": None,
+        "tool_calls": {},
+        "tool_errors": 0,
+        "peak_memory_mb": None,
+        "ok": True,
+        "failures": [],
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Relative change in run time per scenario against a baseline (0.1 means 10% slower)."""
+    previous = {r["scenario"]: r for r in baseline}
+    return {
+        r["scenario"]: (r["run_s"] - previous[r["scenario"]]["run_s"]) / previous[r["scenario"]]["run_s"]
+        for r in results
+        if r["scenario"] in previous and previous[r["scenario"]]["run_s"] > 0
+    }
+
+
+def print_results(results: List[Dict[str, Any]], changes: Optional[Dict[str, float]] = None) -> None:
+    table = Table(title="DevAgent replay benchmarks")
+    for column in ("scenario", "build s", "run s", "LLM calls", "tool calls", "peak MiB", "result"):
+        table.add_column(column, justify="left" if column in ("scenario", "result") else "right")
+    for r in results:
+        run_s = f"{r['run_s']:.3f}"
+        if changes and r["scenario"] in changes:
+            change = changes[r["scenario"]]
+            color = "red" if change > REGRESSION_THRESHOLD else "green" if change < 0 else "white"
+            run_s += f" [{color}]({change:+.0%})[/{color}]"
+        table.add_row(
+            r["scenario"],
+            "-" if r["build_s"] is None else f"{r['build_s']:.3f}",
+            run_s,
+            "-" if r["llm_calls"] is None else str(r["llm_calls"]),
+            f"{sum(r['tool_calls'].values())} ({r['tool_errors']} failed)" if r["tool_calls"] else "-",
+            "-" if r["peak_memory_mb"] is None else f"{r['peak_memory_mb']:.1f}",
+            "[green]ok[/green]" if r["ok"] else "[red]" + "; ".join(r["failures"]) + "[/red]",
+        )
+    console.print(table)
+
+
+@click.command()
+@click.argument("scenarios", nargs=-1)
+@click.option("--scenario-dir", default=os.path.join(BENCHMARK_DIR, "scenarios"), show_default=True)
+@click.option("--fixture-dir", default=os.path.join(BENCHMARK_DIR, "fixtures"), show_default=True)
+@click.option("--repeat", default=3, show_default=True, help="Timed runs per scenario (the median is reported).")
+@click.option("--no-memory", is_flag=True, help="Skip the extra traced run that measures peak memory.")
+@click.option("--output", type=click.Path(dir_okay=False), help="Write the results as JSON.")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), help="Earlier results to compare against.")
+def main(scenarios, scenario_dir, fixture_dir, repeat, no_memory, output, baseline):
+    """Run replay benchmarks and the CLI startup timing (all of them when none are named)."""
+    selected = load_scenarios(scenario_dir, list(scenarios))
+    with_startup = not scenarios or STARTUP_SCENARIO in scenarios
+    if not selected and not with_startup:
+        console.print(f"[red]No scenarios found in {scenario_dir}[/red]")
+        raise SystemExit(1)
+    results = [measure_startup(max(5, repeat))] if with_startup else []
+    results += [run_scenario(s, fixture_dir, repeat=repeat, measure_memory=not no_memory) for s in selected]
+    changes = None
+    if baseline:
+        with open(baseline, "r", encoding="utf-8") as f:
+            changes = compare(results, json.load(f))
+    print_results(results, changes)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if not all(r["ok"] for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
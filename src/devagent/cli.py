@@ -1,22 +1,227 @@
-"""CLI entry point for DevAgent."""
+"""CLI entry point for DevAgent.
+
+LangChain, LangGraph and the agents take about a second to import and build,
+so they are loaded on demand: the interactive prompt appears right away while
+the agent graph is built on a background thread. The models are loaded on the
+model server at the same time, so the first answer does not wait for them.
+"""
 
 import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
 import click
 from rich.console import Console
+from rich.markup import escape
 from rich.prompt import Prompt
 
-from .core.graph import DevAgentGraph
+from .core.defaults import DEFAULT_BATCH_WORKERS, DEFAULT_TOKEN_BUDGET
 
 console = Console()
 
 
+def _preview(value, limit: int = 80) -> str:
+    """Single-line preview of a tool argument or result."""
+    text = " ".join(str(value).split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def render_stream(events) -> None:
+    """Render streamed workflow events: tokens as they arrive, plus agent and tool activity."""
+    current_agent = None
+    streamed = ""
+    at_line_start = True
+    
+    for event in events:
+        kind = event["type"]
+        if kind == "token":
+            if event["agent"] != current_agent:
+                current_agent = event["agent"]
+                streamed = ""
+                if not at_line_start:
+                    console.print()
+                console.print(f"🤖 [bold blue]{current_agent}[/bold blue]: ", end="")
+            console.print(event["text"], end="", markup=False, highlight=False)
+            streamed += event["text"]
+            at_line_start = event["text"].endswith("\n")
+        elif kind in ("tool_call", "tool_result"):
+            if not at_line_start:
+                console.print()
+                at_line_start = True
+            current_agent = None
+            if kind == "tool_call":
+                args = ", ".join(f"{k}={_preview(v, 40)}" for k, v in event["args"].items())
+                console.print(f"[dim]  🔧 {event['agent']} → {event['name']}({escape(args)})[/dim]", highlight=False)
+            else:
+                console.print(f"[dim]  ↳ {escape(_preview(event['content']))}[/dim]", highlight=False)
+        elif kind == "final":
+            if not at_line_start:
+                console.print()
+            response = event.get("response") or "No response generated"
+            # The final answer was usually streamed already; print it only if it was not
+            if response.strip() != streamed.strip():
+                console.print(f"🤖 [bold blue]DevAgent[/bold blue]: {response}")
+
+
+def print_sessions(store) -> None:
+    """List saved sessions, most recent first."""
+    sessions = store.list_sessions()
+    if not sessions:
+        console.print("No saved sessions.")
+        return
+    for session in sessions:
+        updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(session["updated_at"]))
+        forked = f" [dim](fork of {session['forked_from']})[/dim]" if session["forked_from"] else ""
+        title = escape(_preview(session["title"] or "(no messages)", 60))
+        console.print(f"[cyan]{session['thread_id']}[/cyan]  {updated}  {session['checkpoints']:>4} steps  {title}{forked}")
+
+
+def in_background(build: Callable[[], Any]) -> Future:
+    """Run a function on a daemon thread and return a future for its result."""
+    future: Future = Future()
+    
+    def run() -> None:
+        try:
+            future.set_result(build())
+        except BaseException as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=run, name="devagent-startup", daemon=True).start()
+    return future
+
+
+def run_batch(repo_root: str, task_file: str, workers: int, results_path: Optional[str], keep_worktrees: bool,
+              trace: bool, warmup: bool = True) -> None:
+    """Run the tasks of a JSONL file headlessly and report throughput."""
+    from .batch import BatchRunner, load_tasks
+    from .core.tracing import TraceRecorder, trace_dir
+    from .index.files import devagent_dir
+    
+    try:
+        tasks = load_tasks(task_file)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Cannot read tasks: {escape(str(e))}[/red]")
+        return
+    results_path = results_path or os.path.join(devagent_dir(repo_root), f"batch-{time.strftime('%Y%m%d-%H%M%S')}.jsonl")
+    tracer_factory = (lambda task_id: TraceRecorder(trace_dir(repo_root))) if trace else None
+    runner = BatchRunner(
+        repo_root,
+        workers=workers,
+        keep_worktrees=keep_worktrees,
+        tracer_factory=tracer_factory,
+    )
+    if warmup:
+        console.print("🔥 Loading models...")
+        runner.router.warm()
+    console.print(f"🗂️ Running {len(tasks)} tasks with {runner.workers} workers, results in [cyan]{results_path}[/cyan]")
+    
+    def report(result) -> None:
+        status = "[green]✅[/green]" if result["success"] else "[red]❌[/red]"
+        detail = escape(_preview(result.get("error") or result.get("response") or "", 60))
+        console.print(f"{status} {escape(result['id'])} ({result['elapsed_s']:.1f}s) {detail}")
+    
+    stats = runner.run(tasks, output_path=results_path, on_result=report)
+    console.print(
+        f"Done: {stats['succeeded']}/{stats['tasks']} succeeded in {stats['wall_s']:.1f}s "
+        f"({stats['tasks_per_minute']:.1f} tasks/min, {stats['mean_task_s']:.1f}s per task)"
+    )
+    console.print(escape(runner.router.format_stats()))
+
+
 @click.command()
 @click.version_option()
-def main():
+@click.option(
+    "--context-tokens",
+    type=int,
+    default=DEFAULT_TOKEN_BUDGET,
+    show_default=True,
+    help="Token budget for conversation history before older turns are compacted.",
+)
+@click.option(
+    "--no-stream",
+    is_flag=True,
+    help="Wait for the full answer instead of streaming tokens and tool calls.",
+)
+@click.option(
+    "--parallel",
+    is_flag=True,
+    help="Let the supervisor run independent specialist agents at the same time.",
+)
+@click.option("--sessions", "list_sessions", is_flag=True, help="List saved sessions and exit.")
+@click.option(
+    "--resume",
+    is_flag=False,
+    flag_value="latest",
+    default=None,
+    metavar="[SESSION]",
+    help="Continue a saved session (the most recent one when no id is given).",
+)
+@click.option("--fork", metavar="SESSION", default=None, help="Start a new session from a copy of a saved one.")
+@click.option("--no-checkpoint", is_flag=True, help="Keep the conversation in memory only.")
+@click.option("--trace", is_flag=True, help="Record agent, model and tool spans to .devagent/traces.")
+@click.option(
+    "--trace-summary",
+    is_flag=False,
+    flag_value="latest",
+    default=None,
+    metavar="[SESSION]",
+    help="Show where a traced session spent its time (the most recent one when no id is given) and exit.",
+)
+@click.option(
+    "--batch",
+    "task_file",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Run the tasks of a JSONL file (one {\"prompt\": ...} per line) without prompting, then exit.",
+)
+@click.option("--workers", type=int, default=DEFAULT_BATCH_WORKERS, show_default=True, help="Concurrent tasks in batch mode.")
+@click.option("--results", type=click.Path(dir_okay=False), help="JSONL file for batch results.")
+@click.option("--keep-worktrees", is_flag=True, help="Keep each batch task's git worktree for inspection.")
+@click.option("--no-warmup", is_flag=True, help="Do not load the models on the model server at startup.")
+def main(context_tokens, no_stream, parallel, list_sessions, resume, fork, no_checkpoint, trace, trace_summary,
+         task_file, workers, results, keep_worktrees, no_warmup):
     """DevAgent - Your local AI coding assistant."""
+    if no_checkpoint and (resume or fork):
+        raise click.UsageError("--resume and --fork need saved sessions; they cannot be combined with --no-checkpoint.")
     # Get current working directory for codebase context
     current_dir = os.getcwd()
     
+    if task_file:
+        run_batch(current_dir, task_file, workers, results, keep_worktrees, trace, warmup=not no_warmup)
+        return
+    
+    if trace_summary:
+        from .core.tracing import find_trace, format_trace_summary, read_spans, summarize_spans
+        
+        path = find_trace(current_dir, trace_summary)
+        if path is None:
+            console.print(f"[red]No trace for '{escape(trace_summary)}'. Run with --trace to record one.[/red]")
+            return
+        console.print(f"[dim]{path}[/dim]")
+        console.print(escape(format_trace_summary(summarize_spans(read_spans(path)))))
+        return
+    
+    store = None
+    thread_id = None
+    if list_sessions or resume or fork:
+        # These need the session store before the conversation starts
+        from .core.checkpoint import get_session_store
+        
+        store = None if no_checkpoint else get_session_store(current_dir)
+    if list_sessions:
+        if store is not None:
+            print_sessions(store)
+        return
+    
+    if store is not None and (resume or fork):
+        source = fork or resume
+        if source == "latest":
+            source = store.latest_session()
+        if not source or not store.has_session(source):
+            console.print(f"[red]No saved session '{escape(str(fork or resume))}'. Use --sessions to list them.[/red]")
+            return
+        thread_id = store.fork_session(source) if fork else source
+    
     console.print("🤖 [bold blue]DevAgent[/bold blue] - Starting conversation mode...")
     console.print(f"Working directory: [cyan]{current_dir}[/cyan]")
     console.print("Hi! I'm your coding assistant. What would you like to know or do?")
@@ -24,8 +229,45 @@ def main():
     console.print("[dim]Type 'reset' to start a fresh conversation.[/dim]")
     console.print()
     
-    # Initialize the agent graph with current directory context
-    agent_graph = DevAgentGraph(working_directory=current_dir)
+    def build_graph():
+        from .core.checkpoint import get_session_store
+        from .core.graph import DevAgentGraph
+        from .core.router import ModelRouter
+        from .core.tracing import TraceRecorder, trace_dir
+        
+        router = ModelRouter()
+        if not no_warmup:
+            # Load the models while the graph is built and the user types
+            in_background(router.warm)
+        # Initialize the agent graph with current directory context
+        graph = DevAgentGraph(
+            working_directory=current_dir,
+            router=router,
+            context_token_budget=context_tokens,
+            parallel_agents=parallel,
+            checkpointer=store if store is not None or no_checkpoint else get_session_store(current_dir),
+            thread_id=thread_id,
+            tracer=TraceRecorder(trace_dir(current_dir)) if trace else None,
+        )
+        graph.compile()
+        return graph
+    
+    pending_graph = in_background(build_graph)
+    agent_graph = None
+    
+    def ready_graph():
+        """The agent graph, waiting for the background build on first use."""
+        nonlocal agent_graph
+        if agent_graph is None:
+            agent_graph = pending_graph.result()
+            if agent_graph.checkpointer is not None:
+                console.print(f"[dim]Session {agent_graph.thread_id} (resume with --resume {agent_graph.thread_id})[/dim]")
+        return agent_graph
+    
+    if thread_id and ready_graph().pending_run():
+        console.print("🔁 [yellow]Finishing the interrupted turn from its last checkpoint...[/yellow]")
+        render_stream(agent_graph.stream_pending_run())
+        console.print()
     
     while True:
         try:
@@ -36,8 +278,10 @@ def main():
                 break
             
             if user_input.lower() == 'reset':
-                agent_graph.reset_conversation()
+                ready_graph().reset_conversation()
                 console.print("🔄 [yellow]Conversation reset. Starting fresh![/yellow]")
+                if agent_graph.checkpointer is not None:
+                    console.print(f"[dim]Session {agent_graph.thread_id}[/dim]")
                 console.print()
                 continue
             
@@ -45,12 +289,13 @@ def main():
                 continue
             
             # Process through LangGraph agents
-            console.print("🤖 [bold blue]DevAgent[/bold blue]: Let me process that...")
-            
-            result = agent_graph.process_user_input(user_input)
-            response = result.get("response", "No response generated")
-            
-            console.print(f"🤖 [bold blue]DevAgent[/bold blue]: {response}")
+            if no_stream:
+                console.print("🤖 [bold blue]DevAgent[/bold blue]: Let me process that...")
+                result = ready_graph().process_user_input(user_input)
+                response = result.get("response", "No response generated")
+                console.print(f"🤖 [bold blue]DevAgent[/bold blue]: {response}")
+            else:
+                render_stream(ready_graph().stream_user_input(user_input))
             console.print()
             
         except KeyboardInterrupt:
@@ -59,6 +304,9 @@ def main():
         except EOFError:
             console.print("\n👋 Goodbye!")
             break
+    
+    if agent_graph is not None and agent_graph.router is not None and agent_graph.router.stats():
+        console.print(f"[dim]{escape(agent_graph.router.format_stats())}[/dim]")
 
 
 if __name__ == "__main__":
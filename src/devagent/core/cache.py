@@ -0,0 +1,288 @@
+"""Response cache for LLM clients with content-addressed keys and eviction."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from .llm import LLMClient, is_error_response
+
+# Defaults for the cache tiers
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_BYTES = 200_000_000
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def make_cache_key(identity: Dict[str, Any], messages: List[Dict[str, Any]]) -> str:
+    """Hash the client identity (provider, model, parameters) together with the messages."""
+    payload = json.dumps({"client": identity, "messages": messages}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a CachedLLMClient."""
+
+    hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+class MemoryCache:
+    """Thread-safe in-memory LRU tier."""
+
+    def __init__(self, max_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str) -> int:
+        """Store a value and return how many entries were evicted."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """SQLite-backed tier with TTL expiry and a total size cap (least recently used first)."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_DISK_BYTES,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return value
+
+    def put(self, key: str, value: str) -> int:
+        """Store a value and return how many entries were evicted."""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            return self._evict(now)
+
+    def _evict(self, now: float) -> int:
+        evicted = 0
+        if self.ttl_seconds is not None:
+            evicted += self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+            ).fetchall()
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        return evicted
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedLLMClient(LLMClient):
+    """Caching wrapper around any LLMClient.
+
+    Responses are keyed on a hash of the wrapped client's identity (provider,
+    model and generation parameters) and the exact message list. Lookups go to
+    an in-memory LRU first and then to an optional on-disk SQLite tier; error
+    responses are never cached.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        max_entries: int = DEFAULT_MEMORY_ENTRIES,
+        disk_path: Optional[str] = None,
+        max_disk_bytes: int = DEFAULT_DISK_BYTES,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+    ):
+        self.client = client
+        self.memory = MemoryCache(max_entries)
+        self.disk = DiskCache(disk_path, max_disk_bytes, ttl_seconds) if disk_path else None
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+
+    def cache_identity(self) -> Dict[str, Any]:
+        """Delegate identity to the wrapped client so keys are shared across wrappers."""
+        return self.client.cache_identity()
+
+    def _count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return a cached response for a key, promoting disk hits into memory."""
+        value = self.memory.get(key)
+        if value is not None:
+            self._count(hits=1, memory_hits=1)
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self._count(hits=1, disk_hits=1, evictions=self.memory.put(key, value))
+                return value
+        self._count(misses=1)
+        return None
+
+    def store(self, key: str, value: str) -> None:
+        """Store a response in every tier unless it is an error response."""
+        if is_error_response(value):
+            return
+        evicted = self.memory.put(key, value)
+        if self.disk is not None:
+            evicted += self.disk.put(key, value)
+        self._count(evictions=evicted)
+
+    def chat(self, messages: List[Dict[str, str]]) -> str:
+        """Return a cached response or call the wrapped client and cache its answer."""
+        key = make_cache_key(self.cache_identity(), messages)
+        cached = self.lookup(key)
+        if cached is not None:
+            return cached
+        response = self.client.chat(messages)
+        self.store(key, response)
+        return response
+
+    async def achat(self, messages: List[Dict[str, str]]) -> str:
+        """Async variant of chat() using the wrapped client's async API on a miss."""
+        key = make_cache_key(self.cache_identity(), messages)
+        cached = self.lookup(key)
+        if cached is not None:
+            return cached
+        response = await self.client.achat(messages)
+        self.store(key, response)
+        return response
+
+    def stream_chat(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Replay a cached response, or stream from the wrapped client and cache the result."""
+        key = make_cache_key(self.cache_identity(), messages)
+        cached = self.lookup(key)
+        if cached is not None:
+            yield cached
+            return
+        tokens = []
+        for token in self.client.stream_chat(messages):
+            tokens.append(token)
+            yield token
+        # Only reached when the stream completed; streams that ended in an error are skipped
+        if not any(is_error_response(token) for token in tokens):
+            self.store(key, "".join(tokens))
+
+    async def astream_chat(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Async variant of stream_chat()."""
+        key = make_cache_key(self.cache_identity(), messages)
+        cached = self.lookup(key)
+        if cached is not None:
+            yield cached
+            return
+        tokens = []
+        async for token in self.client.astream_chat(messages):
+            tokens.append(token)
+            yield token
+        if not any(is_error_response(token) for token in tokens):
+            self.store(key, "".join(tokens))
+
+    def chat_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Return a cached tool-calling reply or ask the wrapped client; the tools are part of the key."""
+        key = make_cache_key({**self.cache_identity(), "tools": tools}, messages)
+        cached = self.lookup(key)
+        if cached is not None:
+            return json.loads(cached)
+        reply = self.client.chat_with_tools(messages, tools)
+        if not is_error_response(reply["content"]):
+            self.store(key, json.dumps(reply))
+        return reply
+
+    async def achat_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Async variant of chat_with_tools()."""
+        key = make_cache_key({**self.cache_identity(), "tools": tools}, messages)
+        cached = self.lookup(key)
+        if cached is not None:
+            return json.loads(cached)
+        reply = await self.client.achat_with_tools(messages, tools)
+        if not is_error_response(reply["content"]):
+            self.store(key, json.dumps(reply))
+        return reply
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
@@ -0,0 +1,449 @@
+"""Durable SQLite checkpointing for DevAgent sessions.
+
+Each conversation is a LangGraph thread. Checkpoints store channel values as
+versioned blobs, so a step only writes the channels it changed, and the
+message history is stored incrementally: when a new version of ``messages``
+extends the previous one, only the appended messages are written, with a
+pointer to the version they extend. A full snapshot is written every
+SNAPSHOT_EVERY versions to bound the chain read back on resume.
+"""
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from ..index.files import devagent_dir
+
+# Channels whose list values are stored as appended deltas
+DELTA_CHANNELS = ("messages",)
+
+# Longest chain of deltas before a full snapshot is written
+SNAPSHOT_EVERY = 50
+
+# Message lists kept in memory to diff the next version against
+DELTA_CACHE_SIZE = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_id TEXT,
+    checkpoint_type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    base_version TEXT,
+    depth INTEGER NOT NULL DEFAULT 0,
+    value_type TEXT,
+    value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    value_type TEXT NOT NULL,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    thread_id TEXT PRIMARY KEY,
+    title TEXT,
+    forked_from TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def new_thread_id() -> str:
+    """Short random id for a new session."""
+    return uuid.uuid4().hex[:12]
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpointer backed by a SQLite file, with session bookkeeping.
+
+    Args:
+        path: SQLite database file
+        serde: Serializer (defaults to LangGraph's)
+    """
+
+    def __init__(self, path: str, *, serde: Any = None):
+        super().__init__(serde=serde)
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+        # (thread, ns, channel) -> (version, list value, delta depth)
+        self._lists: "OrderedDict[Tuple[str, str, str], Tuple[str, list, int]]" = OrderedDict()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # Blob encoding
+
+    def _remember_list(self, key: Tuple[str, str, str], version: str, value: list, depth: int) -> None:
+        self._lists[key] = (version, list(value), depth)
+        self._lists.move_to_end(key)
+        while len(self._lists) > DELTA_CACHE_SIZE:
+            self._lists.popitem(last=False)
+
+    def _encode(self, thread_id: str, ns: str, channel: str, version: str, value: Any) -> tuple:
+        """Blob row for a channel value: (kind, base_version, depth, value_type, value)."""
+        if channel in DELTA_CHANNELS and isinstance(value, list):
+            key = (thread_id, ns, channel)
+            previous = self._lists.get(key)
+            if previous is not None:
+                base_version, base, depth = previous
+                extends = len(value) >= len(base) and all(a is b or a == b for a, b in zip(base, value))
+                if extends and depth < SNAPSHOT_EVERY:
+                    self._remember_list(key, version, value, depth + 1)
+                    return ("delta", base_version, depth + 1, *self.serde.dumps_typed(value[len(base):]))
+            self._remember_list(key, version, value, 0)
+        return ("value", None, 0, *self.serde.dumps_typed(value))
+
+    def _load_blob(self, thread_id: str, ns: str, channel: str, version: str) -> Tuple[bool, Any]:
+        """Rebuild a channel value, following delta rows back to their snapshot.
+
+        Returns:
+            (found, value); found is False for missing or empty blobs
+        """
+        rows = []
+        current: Optional[str] = str(version)
+        while current is not None:
+            row = self._conn.execute(
+                "SELECT kind, base_version, depth, value_type, value FROM blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, ns, channel, current),
+            ).fetchone()
+            if row is None:
+                return False, None
+            rows.append(row)
+            current = row[1] if row[0] == "delta" else None
+        if rows[-1][0] == "empty":
+            return False, None
+        value = self.serde.loads_typed((rows[-1][3], rows[-1][4]))
+        for row in reversed(rows[:-1]):
+            value = value + self.serde.loads_typed((row[3], row[4]))
+        if channel in DELTA_CHANNELS and isinstance(value, list):
+            self._remember_list((thread_id, ns, channel), str(version), value, rows[0][2])
+        return True, value
+
+    # BaseCheckpointSaver API
+
+    def _tuple(self, thread_id: str, ns: str, row: tuple) -> CheckpointTuple:
+        checkpoint_id, parent_id, checkpoint_type, checkpoint_blob, metadata_type, metadata_blob = row
+        checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_blob))
+        values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            found, value = self._load_blob(thread_id, ns, channel, version)
+            if found:
+                values[channel] = value
+        writes = self._conn.execute(
+            "SELECT task_id, idx, channel, value_type, value, task_path FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, ns, checkpoint_id),
+        ).fetchall()
+        writes.sort(key=lambda w: writes_sort_key(w[5], w[0], w[1]))
+
+        def config_for(cid: str) -> RunnableConfig:
+            return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": cid}}
+
+        return CheckpointTuple(
+            config=config_for(checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": values},
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config=config_for(parent_id) if parent_id else None,
+            pending_writes=[(w[0], w[2], self.serde.loads_typed((w[3], w[4]))) for w in writes],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_id, checkpoint_type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: List[Any] = [thread_id, ns]
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            return self._tuple(thread_id, ns, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints WHERE 1 = 1"
+        )
+        params: List[Any] = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            query += " AND checkpoint_id < ?"
+            params.append(get_checkpoint_id(before))
+        query += " ORDER BY checkpoint_id DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            with self._lock:
+                result = self._tuple(row[0], row[1], row[2:])
+            if filter and not all(result.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield result
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        metadata = get_checkpoint_metadata(config, metadata)
+        with self._lock, self._conn:
+            for channel, version in new_versions.items():
+                if channel in values:
+                    row = self._encode(thread_id, ns, channel, str(version), values[channel])
+                else:
+                    row = ("empty", None, 0, None, None)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO blobs (thread_id, checkpoint_ns, channel, version, kind, "
+                    "base_version, depth, value_type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, ns, channel, str(version), *row),
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_id, "
+                "checkpoint_type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 *self.serde.dumps_typed(stored), *self.serde.dumps_typed(metadata)),
+            )
+            if not ns:
+                now = time.time()
+                self._conn.execute(
+                    "INSERT INTO sessions (thread_id, title, created_at, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at, "
+                    "title = COALESCE(sessions.title, excluded.title)",
+                    (thread_id, metadata.get("goal"), now, now),
+                )
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock, self._conn:
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                # Regular writes are kept from the first attempt; special ones (errors, interrupts) are replaced
+                verb = "INSERT OR IGNORE" if idx >= 0 else "INSERT OR REPLACE"
+                self._conn.execute(
+                    f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, "
+                    "value_type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, ns, checkpoint_id, task_id, idx, channel, *self.serde.dumps_typed(value), task_path),
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock, self._conn:
+            for table in ("checkpoints", "blobs", "writes", "sessions"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            for key in [key for key in self._lists if key[0] == thread_id]:
+                del self._lists[key]
+
+    def copy_thread(self, source_thread_id: str, target_thread_id: str) -> None:
+        self.fork_session(source_thread_id, target_thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None = None) -> str:
+        # Same scheme as LangGraph's in-memory saver: zero-padded counter plus a random tiebreak
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        results = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for result in results:
+            yield result
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def acopy_thread(self, source_thread_id: str, target_thread_id: str) -> None:
+        await asyncio.to_thread(self.copy_thread, source_thread_id, target_thread_id)
+
+    # Sessions
+
+    def list_sessions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recently updated sessions first.
+
+        Returns:
+            Dictionaries with thread_id, title, forked_from, created_at, updated_at
+            and the number of checkpoints
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.thread_id, s.title, s.forked_from, s.created_at, s.updated_at, "
+                "(SELECT COUNT(*) FROM checkpoints c WHERE c.thread_id = s.thread_id AND c.checkpoint_ns = '') "
+                "FROM sessions s ORDER BY s.updated_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        keys = ("thread_id", "title", "forked_from", "created_at", "updated_at", "checkpoints")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def latest_session(self) -> Optional[str]:
+        """Thread id of the most recently updated session, if any."""
+        sessions = self.list_sessions(limit=1)
+        return sessions[0]["thread_id"] if sessions else None
+
+    def has_session(self, thread_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM sessions WHERE thread_id = ?", (thread_id,)
+            ).fetchone() is not None
+
+    def fork_session(
+        self, source_thread_id: str, target_thread_id: Optional[str] = None, checkpoint_id: Optional[str] = None
+    ) -> str:
+        """Copy a session's history into a new thread that can diverge from it.
+
+        Args:
+            source_thread_id: Session to copy
+            target_thread_id: Id for the copy (generated when omitted)
+            checkpoint_id: Fork from this checkpoint instead of the latest one
+
+        Returns:
+            The new thread id
+        """
+        target = target_thread_id or new_thread_id()
+        cutoff = checkpoint_id or "\uffff"
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints SELECT ?, checkpoint_ns, checkpoint_id, parent_id, "
+                "checkpoint_type, checkpoint, metadata_type, metadata FROM checkpoints "
+                "WHERE thread_id = ? AND (checkpoint_ns != '' OR checkpoint_id <= ?)",
+                (target, source_thread_id, cutoff),
+            )
+            # Blobs are shared by versions, so copy them all: delta chains stay intact
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs SELECT ?, checkpoint_ns, channel, version, kind, base_version, "
+                "depth, value_type, value FROM blobs WHERE thread_id = ?",
+                (target, source_thread_id),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO writes SELECT ?, checkpoint_ns, checkpoint_id, task_id, idx, channel, "
+                "value_type, value, task_path FROM writes WHERE thread_id = ? "
+                "AND (checkpoint_ns != '' OR checkpoint_id <= ?)",
+                (target, source_thread_id, cutoff),
+            )
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (thread_id, title, forked_from, created_at, updated_at) "
+                "SELECT ?, title, ?, ?, ? FROM sessions WHERE thread_id = ?",
+                (target, source_thread_id, now, now, source_thread_id),
+            )
+        return target
+
+
+def get_session_store(root: str = ".") -> SqliteCheckpointSaver:
+    """Open the session database of a repository (``.devagent/sessions.sqlite``)."""
+    return SqliteCheckpointSaver(os.path.join(devagent_dir(os.path.abspath(root)), "sessions.sqlite"))
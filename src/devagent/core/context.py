@@ -0,0 +1,156 @@
+"""Conversation context compaction to keep prompts under a token budget."""
+
+import json
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from .defaults import DEFAULT_TOKEN_BUDGET
+
+# Number of most recent user turns that are always kept verbatim
+KEEP_RECENT_TURNS = 2
+
+# Tool outputs and tool-call arguments shorter than this are never elided
+ELIDE_MIN_CHARS = 400
+
+SUMMARY_MESSAGE_ID = "devagent-context-summary"
+
+# Work products from AgentState that are carried over verbatim in the summary
+WORK_PRODUCT_KEYS = ("context", "diff", "run_result")
+
+_SUMMARY_HEADER = "Summary of the earlier conversation (older turns were compacted):"
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    """Roughly estimate the prompt tokens for a message list (about 4 chars per token)."""
+    total = 0
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+        total += len(content) // 4 + 4
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            total += len(json.dumps(tool_call.get("args", {}), default=str)) // 4 + 4
+    return total
+
+
+def _preview(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _elide_tool_message(message: ToolMessage) -> ToolMessage:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    if len(content) < ELIDE_MIN_CHARS:
+        return message
+    stub = (
+        f"[Elided {message.name or 'tool'} output ({len(content)} chars) to save context. "
+        f"Started with: {_preview(content, 160)}]"
+    )
+    return message.model_copy(update={"content": stub})
+
+
+def _elide_tool_call_args(message: AIMessage) -> AIMessage:
+    changed = False
+    tool_calls = []
+    for tool_call in message.tool_calls:
+        args = {}
+        for key, value in tool_call.get("args", {}).items():
+            if isinstance(value, str) and len(value) >= ELIDE_MIN_CHARS:
+                value = f"[elided {len(value)} chars]"
+                changed = True
+            args[key] = value
+        tool_calls.append({**tool_call, "args": args})
+    return message.model_copy(update={"tool_calls": tool_calls}) if changed else message
+
+
+def _turn_starts(messages: List[BaseMessage]) -> List[int]:
+    """Indexes of the messages that start a user turn."""
+    return [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+
+
+def _summarize_turns(messages: List[BaseMessage]) -> List[str]:
+    """Extractive one-line-per-turn summary: the request and the final answer."""
+    lines = []
+    request = None
+    answer = None
+    for message in messages + [HumanMessage(content="")]:
+        if isinstance(message, HumanMessage):
+            if request is not None:
+                lines.append(f"- User: {_preview(request, 200)}")
+                if answer:
+                    lines.append(f"  Answer: {_preview(answer, 300)}")
+            request, answer = message.content, None
+        elif isinstance(message, AIMessage) and message.content and not message.tool_calls:
+            answer = message.content if isinstance(message.content, str) else str(message.content)
+    return lines
+
+
+def _work_products_text(work_products: Dict[str, Any]) -> str:
+    sections = []
+    for key in WORK_PRODUCT_KEYS:
+        value = work_products.get(key)
+        if not value:
+            continue
+        if not isinstance(value, str):
+            value = json.dumps(value, indent=2, default=str)
+        sections.append(f"Current {key}:\n{value}")
+    return "\n\n".join(sections)
+
+
+def compact_messages(
+    messages: List[BaseMessage],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    keep_recent_turns: int = KEEP_RECENT_TURNS,
+    work_products: Optional[Dict[str, Any]] = None,
+) -> List[BaseMessage]:
+    """Compact a conversation history so it fits within a token budget.
+
+    Compaction runs in two stages and only when the history is over budget:
+    first, large tool outputs and tool-call arguments in turns older than the
+    most recent ``keep_recent_turns`` are replaced by short stubs (message ids
+    are kept, so tool call/result pairs stay valid); then, if that is not
+    enough, whole old turns are dropped and folded into a single summary
+    message that also carries the key work products verbatim.
+
+    Args:
+        messages: Conversation history
+        token_budget: Target estimated token count for the history
+        keep_recent_turns: Number of most recent user turns kept verbatim
+        work_products: AgentState fields (context, diff, run_result) to preserve
+
+    Returns:
+        The compacted message list (the input list when no compaction was needed)
+    """
+    if estimate_tokens(messages) <= token_budget:
+        return messages
+
+    turn_starts = _turn_starts(messages)
+    if len(turn_starts) <= keep_recent_turns:
+        return messages
+    boundary = turn_starts[-keep_recent_turns] if keep_recent_turns else len(messages)
+
+    # Stage 1: elide bulky tool traffic in older turns
+    compacted: List[BaseMessage] = []
+    for message in messages[:boundary]:
+        if isinstance(message, ToolMessage):
+            message = _elide_tool_message(message)
+        elif isinstance(message, AIMessage) and message.tool_calls:
+            message = _elide_tool_call_args(message)
+        compacted.append(message)
+    compacted.extend(messages[boundary:])
+    if estimate_tokens(compacted) <= token_budget:
+        return compacted
+
+    # Stage 2: fold whole old turns into the summary message
+    previous_summary = []
+    old = compacted[:boundary]
+    if old and old[0].id == SUMMARY_MESSAGE_ID:
+        body = old[0].content.split("\n\nCurrent ", 1)[0]
+        previous_summary = [line for line in body.splitlines()[1:] if line]
+        old = old[1:]
+    summary_lines = (previous_summary + _summarize_turns(old))[-40:]
+
+    summary = "\n".join([_SUMMARY_HEADER] + summary_lines)
+    products = _work_products_text(work_products or {})
+    if products:
+        summary += "\n\n" + products
+    return [SystemMessage(content=summary, id=SUMMARY_MESSAGE_ID)] + compacted[boundary:]
@@ -0,0 +1,275 @@
+"""Thread-safe deadlines, retries with backoff and stream watchdogs for LLM calls.
+
+Everything here works from any thread or event loop: blocking calls run on a
+worker thread and are waited on with a timeout, instead of relying on SIGALRM
+(main thread only, whole seconds, one global handler).
+
+A blocking call cannot be interrupted from another thread. When its deadline
+passes, the caller gets the timeout error right away and the call is
+abandoned: its thread keeps running until the HTTP client's own timeout ends
+it, and the result is dropped. Each call gets its own daemon thread, so an
+abandoned call never delays other calls (as queueing on a bounded pool would)
+or keeps the interpreter from exiting.
+"""
+
+import asyncio
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+def _start_worker(fn: Callable[[], T]) -> "Future[T]":
+    """Run a blocking call on a new daemon thread and return a future for its result."""
+    future: "Future[T]" = Future()
+
+    def run() -> None:
+        try:
+            future.set_result(fn())
+        except BaseException as e:  # noqa: B036 - forwarded to the waiting caller
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="devagent-llm", daemon=True).start()
+    return future
+
+
+class DeadlineExceeded(TimeoutError):
+    """The overall time budget for a request ran out."""
+
+
+class FirstTokenTimeout(TimeoutError):
+    """The model did not produce its first token in time (e.g. still loading)."""
+
+
+class StreamStalled(TimeoutError):
+    """A stream that had started producing tokens stopped making progress."""
+
+
+class Deadline:
+    """A point in monotonic time by which a request must finish.
+
+    Args:
+        timeout: Seconds from now, or None for no deadline
+    """
+
+    def __init__(self, timeout: Optional[float]):
+        self.timeout = timeout
+        self.expires_at = None if timeout is None else time.monotonic() + timeout
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None when unbounded."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def cap(self, timeout: Optional[float]) -> Optional[float]:
+        """The smaller of a per-step timeout and the time left on the deadline."""
+        remaining = self.remaining()
+        if timeout is None:
+            return remaining
+        return timeout if remaining is None else min(timeout, remaining)
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with jitter for transient failures.
+
+    Attributes:
+        attempts: Total attempts including the first one
+        base_delay: Delay before the first retry, in seconds
+        max_delay: Upper bound for a single delay
+        retry_on: Exception types considered transient
+        retry_statuses: HTTP status codes considered transient
+    """
+
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    retry_on: Tuple[Type[BaseException], ...] = (ConnectionError,)
+    retry_statuses: Tuple[int, ...] = (408, 429, 500, 502, 503, 504)
+
+    def is_transient(self, error: BaseException) -> bool:
+        if isinstance(error, (DeadlineExceeded, FirstTokenTimeout, StreamStalled)):
+            return False
+        if isinstance(error, self.retry_on):
+            return True
+        # httpx transport errors and provider errors carrying an HTTP status
+        if type(error).__name__ in ("ConnectError", "ReadError", "RemoteProtocolError", "APIConnectionError"):
+            return True
+        status = getattr(error, "status_code", None)
+        return status in self.retry_statuses
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before retry number ``attempt`` (1-based), with full jitter."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+def run_with_deadline(fn: Callable[[], T], deadline: Deadline, timeout_error: Type[TimeoutError] = DeadlineExceeded) -> T:
+    """Run a blocking call on a worker thread and wait for it no longer than the deadline.
+
+    On timeout the call is abandoned, not stopped (see the module docstring).
+    """
+    if deadline.remaining() is None:
+        return fn()
+    future = _start_worker(fn)
+    try:
+        return future.result(timeout=deadline.remaining())
+    except FutureTimeoutError:
+        raise timeout_error(f"timed out after {deadline.timeout:g} seconds") from None
+
+
+def call_with_retries(fn: Callable[[], T], policy: RetryPolicy, deadline: Deadline) -> T:
+    """Call ``fn`` under the deadline, retrying transient failures with backoff."""
+    attempt = 1
+    while True:
+        try:
+            return run_with_deadline(fn, deadline)
+        except Exception as e:
+            if attempt >= policy.attempts or not policy.is_transient(e):
+                raise
+            delay = deadline.cap(policy.delay(attempt))
+            if delay is None or deadline.expired():
+                raise
+            time.sleep(delay)
+            attempt += 1
+
+
+async def acall_with_retries(fn: Callable[[], Any], policy: RetryPolicy, deadline: Deadline) -> Any:
+    """Async variant of call_with_retries; ``fn`` returns a fresh awaitable per attempt."""
+    attempt = 1
+    while True:
+        try:
+            try:
+                return await asyncio.wait_for(fn(), timeout=deadline.remaining())
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"timed out after {deadline.timeout:g} seconds") from None
+        except Exception as e:
+            if attempt >= policy.attempts or not policy.is_transient(e):
+                raise
+            delay = deadline.cap(policy.delay(attempt))
+            if delay is None or deadline.expired():
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+def _stream_timeout(
+    deadline: Deadline,
+    produced: int,
+    first_token_timeout: Optional[float],
+    idle_timeout: Optional[float],
+) -> TimeoutError:
+    """Classify why a stream wait timed out."""
+    step_timeout = first_token_timeout if produced == 0 else idle_timeout
+    if deadline.expired() or step_timeout is None:
+        return DeadlineExceeded(f"stream exceeded its {deadline.timeout:g} second deadline")
+    if produced == 0:
+        return FirstTokenTimeout(f"no first token within {first_token_timeout:g} seconds")
+    return StreamStalled(f"stream stalled for {idle_timeout:g} seconds after {produced} tokens")
+
+
+def iter_with_timeouts(
+    open_stream: Callable[[], Iterable[T]],
+    first_token_timeout: Optional[float],
+    idle_timeout: Optional[float],
+    deadline: Deadline,
+    policy: RetryPolicy = NO_RETRY,
+) -> Iterator[T]:
+    """Consume a blocking stream on a worker thread, enforcing separate timeouts.
+
+    ``first_token_timeout`` bounds the wait for the first item (model load and
+    prompt processing), ``idle_timeout`` bounds each gap between later items,
+    and the deadline bounds the whole stream. Opening the stream is retried
+    with backoff until the first item arrives; after that, failures propagate.
+    """
+    attempt = 1
+    while True:
+        items: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        stop = threading.Event()
+
+        def produce(items: "queue.Queue[Tuple[str, Any]]" = items, stop: threading.Event = stop) -> None:
+            try:
+                for item in open_stream():
+                    if stop.is_set():
+                        break
+                    items.put(("item", item))
+                items.put(("done", None))
+            except BaseException as e:  # noqa: B036 - forwarded to the consumer
+                items.put(("error", e))
+
+        # A stalled producer is abandoned like a timed-out call; it stops at its next item
+        threading.Thread(target=produce, name="devagent-llm-stream", daemon=True).start()
+        produced = 0
+        try:
+            while True:
+                wait = deadline.cap(first_token_timeout if produced == 0 else idle_timeout)
+                try:
+                    kind, value = items.get(timeout=wait)
+                except queue.Empty:
+                    raise _stream_timeout(deadline, produced, first_token_timeout, idle_timeout) from None
+                if kind == "done":
+                    return
+                if kind == "error":
+                    raise value
+                produced += 1
+                yield value
+        except Exception as e:
+            if produced or attempt >= policy.attempts or not policy.is_transient(e):
+                raise
+            delay = deadline.cap(policy.delay(attempt))
+            if delay is None or deadline.expired():
+                raise
+            time.sleep(delay)
+            attempt += 1
+        finally:
+            stop.set()
+
+
+async def aiter_with_timeouts(
+    open_stream: Callable[[], Any],
+    first_token_timeout: Optional[float],
+    idle_timeout: Optional[float],
+    deadline: Deadline,
+    policy: RetryPolicy = NO_RETRY,
+) -> AsyncIterator[Any]:
+    """Async variant of iter_with_timeouts; ``open_stream`` returns an awaitable async iterator."""
+    attempt = 1
+    while True:
+        produced = 0
+        try:
+            try:
+                stream = await asyncio.wait_for(open_stream(), timeout=deadline.cap(first_token_timeout))
+            except asyncio.TimeoutError:
+                raise _stream_timeout(deadline, 0, first_token_timeout, idle_timeout) from None
+            iterator = stream.__aiter__()
+            while True:
+                wait = deadline.cap(first_token_timeout if produced == 0 else idle_timeout)
+                try:
+                    item = await asyncio.wait_for(iterator.__anext__(), timeout=wait)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    raise _stream_timeout(deadline, produced, first_token_timeout, idle_timeout) from None
+                produced += 1
+                yield item
+        except Exception as e:
+            if produced or attempt >= policy.attempts or not policy.is_transient(e):
+                raise
+            delay = deadline.cap(policy.delay(attempt))
+            if delay is None or deadline.expired():
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
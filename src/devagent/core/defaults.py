@@ -0,0 +1,11 @@
+"""Default settings read by the CLI at startup.
+
+Kept free of framework imports so the command line can be parsed (and
+``--help``/``--version`` answered) before LangChain or LangGraph are loaded.
+"""
+
+# Default prompt budget for the conversation history (qwen2.5 runs with 32k context)
+DEFAULT_TOKEN_BUDGET = 24_000
+
+# Concurrent tasks in batch mode; model calls dominate, so this is bounded by the model server
+DEFAULT_BATCH_WORKERS = 4
@@ -1,113 +1,364 @@
 """LangGraph state machine setup for DevAgent using langgraph-supervisor."""
 
-from typing import Dict, Any
-from langchain_core.messages import HumanMessage
+import logging
+import threading
+from typing import Dict, Any, Iterator, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, ToolMessage, RemoveMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
 
 from langgraph_supervisor import create_supervisor
-from langchain_ollama import ChatOllama
 from .state import AgentState
+from .checkpoint import new_thread_id
+from .tracing import TraceRecorder
+from .router import ModelRouter
+from .workspace import use_workspace
+from .context import compact_messages, DEFAULT_TOKEN_BUDGET, WORK_PRODUCT_KEYS
 from .llm import get_langchain_model
 from ..agents import (
     create_retriever_agent,
     create_editor_agent,
     create_executor_agent,
     create_verifier_agent,
-    create_pr_bot_agent
+    create_pr_bot_agent,
+    create_dispatch_tool
 )
 
 
+# Extra supervisor instructions when agents may run concurrently
+PARALLEL_PROMPT = (
+    " When several pieces of work are independent of each other (for example "
+    "gathering context with retriever while verifier runs lint or type checks), "
+    "call dispatch_agents once with all of their names so they run in parallel. "
+    "Only sequence agents when one needs another's output, such as executor "
+    "testing a change that editor has not made yet."
+)
+
+
+# Graph tasks run at the same time: the tool calls of one model reply, parallel agents
+MAX_CONCURRENT_TASKS = 8
+
+
+class _RemainingStepsWriteFilter(logging.Filter):
+    """Hide the warning about the supervisor writing back its managed step budget.
+    
+    AgentState is shared by the supervisor agent and the outer workflow, so the
+    supervisor returns ``remaining_steps`` to a graph where it is managed (and
+    therefore read-only); LangGraph drops the write, which is what we want.
+    """
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        return "wrote to unknown channel remaining_steps" not in record.getMessage()
+
+
+logging.getLogger("langgraph").addFilter(_RemainingStepsWriteFilter())
+
 
 class DevAgentGraph:
     """Main LangGraph orchestrator using langgraph-supervisor pattern."""
     
-    def __init__(self, working_directory: str = None):
+    def __init__(
+        self,
+        working_directory: str = None,
+        context_token_budget: int = DEFAULT_TOKEN_BUDGET,
+        parallel_agents: bool = False,
+        checkpointer: Optional[BaseCheckpointSaver] = None,
+        thread_id: Optional[str] = None,
+        tracer: Optional[TraceRecorder] = None,
+        model: Optional[BaseChatModel] = None,
+        router: Optional[ModelRouter] = None,
+    ):
+        """Initialize the graph.
+        
+        Args:
+            working_directory: Directory the agents operate on; tools resolve paths
+                against it, so graphs on different checkouts can share a process
+            context_token_budget: Token budget for the conversation history
+            parallel_agents: Let the supervisor dispatch several independent agents
+                in one step; they run as concurrent branches and their outputs are
+                merged into AgentState by its reducers
+            checkpointer: Saves the state after every step, so a session survives
+                crashes and can be resumed; without one, state lives in memory only
+            thread_id: Session to continue (a new one is started when omitted)
+            tracer: Records spans for each turn, agent step, model and tool call
+            model: One chat model for the supervisor and every agent, bypassing
+                model routing; benchmarks pass a replay model here
+            router: Picks the small or large local model per role (a new
+                ModelRouter when omitted); share one to share its models and stats
+        """
         self.compiled_graph = None
         self.current_state = None
         self.working_directory = working_directory or "."
-        self._setup_graph()
+        self.context_token_budget = context_token_budget
+        self.parallel_agents = parallel_agents
+        self.checkpointer = checkpointer
+        self.thread_id = thread_id or new_thread_id()
+        self.tracer = tracer
+        self.model = model
+        self.router = router if model is None else None
+        if tracer is not None:
+            tracer.session_id = self.thread_id
+        # Whether the checkpointer already holds state for this thread
+        self._thread_has_state = False
+        # Agents are built on first use (see compile), not here
+        self.supervisor_workflow = None
+        self._build_lock = threading.Lock()
     
     def _setup_graph(self) -> None:
         """Set up the supervisor pattern using create_react_agent."""
         
-        # Use ChatOllama directly for better compatibility  
-        model = ChatOllama(model="qwen2.5:14b-instruct", temperature=0.2)
+        if self.model is None and self.router is None:
+            self.router = ModelRouter()
         
         # Create specialist agents using dedicated factory functions
-        retriever_agent = create_retriever_agent(model)
-        editor_agent = create_editor_agent(model)
-        executor_agent = create_executor_agent(model)
-        verifier_agent = create_verifier_agent(model)
-        pr_bot_agent = create_pr_bot_agent(model)
+        retriever_agent = create_retriever_agent(self._model_for("retriever"))
+        editor_agent = create_editor_agent(self._model_for("editor"))
+        executor_agent = create_executor_agent(self._model_for("executor"))
+        verifier_agent = create_verifier_agent(self._model_for("verifier"))
+        pr_bot_agent = create_pr_bot_agent(self._model_for("pr_bot"))
+        
+        agents = [
+            retriever_agent,
+            editor_agent, 
+            executor_agent,
+            verifier_agent,
+            pr_bot_agent
+        ]
+        
+        # In parallel mode the supervisor can fan out to several agents in one step
+        extra_tools = [create_dispatch_tool([agent.name for agent in agents])] if self.parallel_agents else None
         
         # Create supervisor workflow with react agents
         supervisor_workflow = create_supervisor(
-            [
-                retriever_agent,
-                editor_agent, 
-                executor_agent,
-                verifier_agent,
-                pr_bot_agent
-            ],
-            model=model,
+            agents,
+            model=self._model_for("supervisor"),
+            tools=extra_tools,
+            # Fixed instructions first and the session's details last, so the
+            # model server can reuse its cached prompt prefix across sessions
             prompt=(
                 f"You are a software development team supervisor managing specialist agents. "
-                f"Working directory: {self.working_directory} "
                 f"For codebase analysis, use retriever. "
                 f"For code changes, use editor. "
                 f"For running tests, use executor. "
                 f"For code review, use verifier. "
                 f"For git operations, use pr_bot."
-            )
+                f"{PARALLEL_PROMPT if self.parallel_agents else ''}"
+                f"\n\nWorking directory: {self.working_directory}"
+            ),
+            state_schema=AgentState,
         )
         
         self.supervisor_workflow = supervisor_workflow
     
+    def _model_for(self, role: str) -> BaseChatModel:
+        """Chat model of a role: the fixed model when one was given, else the routed one."""
+        return self.model if self.model is not None else self.router.chat_model(role)
+    
     def compile(self):
-        """Compile the graph for execution."""
-        if not self.compiled_graph:
-            self.compiled_graph = self.supervisor_workflow.compile()
+        """Build the agents and compile the graph for execution, once.
+        
+        Safe to call from several threads: the CLI starts it in the background
+        while the user types, and the first turn waits for it to finish.
+        """
+        with self._build_lock:
+            if not self.compiled_graph:
+                if self.supervisor_workflow is None:
+                    self._setup_graph()
+                self.compiled_graph = self.supervisor_workflow.compile(checkpointer=self.checkpointer)
         return self.compiled_graph
     
     def process_user_input(self, user_input: str) -> Dict[str, Any]:
         """Process user input directly through the supervisor workflow."""
-        
-        # Use existing state or initialize new one
-        if self.current_state is None:
-            self.current_state = self._get_initial_state()
-        
-        # Add new user message to existing conversation
-        self.current_state["messages"].append(HumanMessage(content=user_input))
-        self.current_state["goal"] = user_input  # Update current goal
+        graph_input = self._start_turn(user_input)
         
         try:
             # Execute supervisor workflow with current state
             compiled_graph = self.compile()
-            result = compiled_graph.invoke(self.current_state)
+            with use_workspace(self.working_directory):
+                result = compiled_graph.invoke(graph_input, self._run_config())
+            return self._finish_turn(user_input, result)
             
-            # Update current state with result
-            self.current_state = result
+        except Exception as e:
+            return self._error_result(e)
+    
+    async def aprocess_user_input(self, user_input: str) -> Dict[str, Any]:
+        """Async variant of process_user_input for running the workflow under asyncio.
+        
+        Model calls go through the async client APIs, so independent calls (for
+        example in parallel graph branches) overlap instead of serializing.
+        """
+        graph_input = self._start_turn(user_input)
+        
+        try:
+            compiled_graph = self.compile()
+            with use_workspace(self.working_directory):
+                result = await compiled_graph.ainvoke(graph_input, self._run_config())
+            return self._finish_turn(user_input, result)
             
-            # Extract final response
-            messages = result.get("messages", [])
-            if messages:
-                last_message = messages[-1]
-                response = last_message.content if hasattr(last_message, 'content') else str(last_message)
-            else:
-                response = f"Workflow completed for: '{user_input}'"
+        except Exception as e:
+            return self._error_result(e)
+    
+    def stream_user_input(self, user_input: str) -> Iterator[Dict[str, Any]]:
+        """Process user input, yielding events while the workflow runs.
+        
+        Events are dictionaries with a "type" key:
+        - "token": a chunk of model output ("agent", "text")
+        - "tool_call": an agent called a tool ("agent", "name", "args")
+        - "tool_result": a tool returned ("agent", "name", "content")
+        - "final": the finished turn ("response", "state"), always the last event
+        """
+        graph_input = self._start_turn(user_input)
+        yield from self._stream(graph_input, user_input)
+    
+    def pending_run(self) -> bool:
+        """Whether the session's last turn stopped (crash, Ctrl-C) before it finished."""
+        if self.checkpointer is None:
+            return False
+        return bool(self.compile().get_state(self._run_config()).next)
+    
+    def stream_pending_run(self) -> Iterator[Dict[str, Any]]:
+        """Finish an interrupted turn from its last checkpoint, yielding the same events as stream_user_input.
+        
+        Steps that completed before the interruption (retrieval, test runs) are not repeated.
+        """
+        if self.current_state is None:
+            self.current_state = self._load_session() or self._get_initial_state()
+        yield from self._stream(None, self.current_state.get("goal", ""))
+    
+    def _stream(self, graph_input: Optional[Dict[str, Any]], user_input: str) -> Iterator[Dict[str, Any]]:
+        """Run the workflow on an input (None continues from the last checkpoint), yielding events."""
+        try:
+            compiled_graph = self.compile()
+            result = None
+            with use_workspace(self.working_directory):
+                for namespace, mode, data in compiled_graph.stream(
+                    graph_input,
+                    self._run_config(),
+                    stream_mode=["messages", "updates", "values"],
+                    subgraphs=True,
+                ):
+                    if mode == "values":
+                        if not namespace:
+                            result = data
+                        continue
+                    if not namespace:
+                        continue
+                    agent = namespace[0].split(":", 1)[0]
+                    if mode == "messages":
+                        chunk, metadata = data
+                        # Whole messages count when a model run emitted them without streaming
+                        # (e.g. accepted small-tier answers); others are node outputs
+                        from_model = isinstance(chunk, AIMessageChunk) or (
+                            isinstance(chunk, AIMessage) and metadata.get("ls_model_type") == "chat"
+                        )
+                        if from_model and isinstance(chunk.content, str) and chunk.content:
+                            yield {"type": "token", "agent": agent, "text": chunk.content}
+                    else:
+                        yield from self._tool_events(agent, data)
             
-            return {
-                "response": response,
-                "state": result
-            }
+            yield {"type": "final", **self._finish_turn(user_input, result or self.current_state)}
             
         except Exception as e:
-            # Handle any unhandled exceptions but preserve conversation context
-            error_response = f"❌ Unexpected error: {str(e)}\n\nContinuing with existing context. You can try again."
-            return {
-                "response": error_response,
-                "state": self.current_state
-            }
+            yield {"type": "final", **self._error_result(e)}
+    
+    @staticmethod
+    def _tool_events(agent: str, updates: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Turn node updates from inside an agent into tool call/result events."""
+        for update in updates.values():
+            for item in update if isinstance(update, list) else [update]:
+                if not isinstance(item, dict):
+                    continue
+                for message in item.get("messages", []):
+                    if isinstance(message, AIMessage):
+                        for tool_call in message.tool_calls:
+                            yield {"type": "tool_call", "agent": agent, "name": tool_call["name"], "args": tool_call["args"]}
+                    elif isinstance(message, ToolMessage):
+                        yield {"type": "tool_result", "agent": agent, "name": message.name, "content": message.content}
+    
+    def _run_config(self) -> Dict[str, Any]:
+        """Invocation config: the task pool size, the session's thread when checkpointing, and the tracer."""
+        config: Dict[str, Any] = {"max_concurrency": MAX_CONCURRENT_TASKS}
+        if self.checkpointer is not None:
+            config["configurable"] = {"thread_id": self.thread_id}
+            config["metadata"] = {"goal": (self.current_state or {}).get("goal", "")}
+        if self.tracer is not None:
+            config["callbacks"] = [self.tracer]
+        return config
+    
+    def _load_session(self) -> Optional[Dict[str, Any]]:
+        """Restore the state of this thread from the checkpointer, if it has any."""
+        if self.checkpointer is None:
+            return None
+        values = self.compile().get_state(self._run_config()).values
+        if not values:
+            return None
+        self._thread_has_state = True
+        return {**self._get_initial_state(), **values}
+    
+    def _start_turn(self, user_input: str) -> Dict[str, Any]:
+        """Add the user's message to the conversation and build the graph input for the run.
+        
+        Without a checkpointer the whole state is the input. With one, only the
+        new message is sent (the checkpointed history is extended in place),
+        unless compaction rewrote the history, which then replaces it wholesale.
+        """
+        # Use existing state or initialize new one
+        if self.current_state is None:
+            self.current_state = self._load_session() or self._get_initial_state()
+        
+        # Add new user message to existing conversation
+        message = HumanMessage(content=user_input)
+        messages = self.current_state["messages"]
+        messages.append(message)
+        self.current_state["goal"] = user_input  # Update current goal
+        self._compact_context()
+        
+        if self.checkpointer is None or not self._thread_has_state:
+            self._thread_has_state = self.checkpointer is not None
+            return self.current_state
+        if self.current_state["messages"] is messages:
+            return {"messages": [message], "goal": user_input}
+        return {
+            "messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *self.current_state["messages"]],
+            "goal": user_input,
+        }
     
+    def _finish_turn(self, user_input: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Store the workflow result and extract the final response."""
+        # Update current state with result, keeping fields the workflow does not return
+        self.current_state = {**self.current_state, **result}
+        
+        # Extract final response
+        messages = result.get("messages", [])
+        if messages:
+            last_message = messages[-1]
+            response = last_message.content if hasattr(last_message, 'content') else str(last_message)
+        else:
+            response = f"Workflow completed for: '{user_input}'"
+        
+        return {
+            "response": response,
+            "state": result
+        }
+    
+    def _error_result(self, error: Exception) -> Dict[str, Any]:
+        """Handle any unhandled exceptions but preserve conversation context."""
+        error_response = f"❌ Unexpected error: {str(error)}\n\nContinuing with existing context. You can try again."
+        return {
+            "response": error_response,
+            "state": self.current_state,
+            "error": str(error),
+        }
+    
+    def _compact_context(self) -> None:
+        """Compact the conversation history before it is sent to the models."""
+        work_products = {key: self.current_state.get(key) for key in WORK_PRODUCT_KEYS}
+        self.current_state["messages"] = compact_messages(
+            self.current_state["messages"],
+            token_budget=self.context_token_budget,
+            work_products=work_products,
+        )
     
     def _get_initial_state(self) -> Dict[str, Any]:
         """Get clean initial state for new conversation."""
@@ -131,5 +382,12 @@ class DevAgentGraph:
         }
     
     def reset_conversation(self) -> None:
-        """Manually reset conversation state (useful for starting fresh)."""
-        self.current_state = None
\ No newline at end of file
+        """Manually reset conversation state (useful for starting fresh).
+        
+        With a checkpointer this starts a new session; the old one can still be resumed.
+        """
+        self.current_state = None
+        self.thread_id = new_thread_id()
+        if self.tracer is not None:
+            self.tracer.session_id = self.thread_id
+        self._thread_has_state = False
\ No newline at end of file
@@ -1,11 +1,116 @@
 """LLM abstraction layer with extensible and interchangeable clients."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator, AsyncIterator
+import asyncio
+import json
+import os
 import re
+import threading
+import uuid
+import weakref
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
-from langchain_core.outputs import ChatResult, ChatGeneration
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, AIMessageChunk, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatResult, ChatGeneration, ChatGenerationChunk
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from .deadline import (
+    Deadline,
+    RetryPolicy,
+    FirstTokenTimeout,
+    StreamStalled,
+    call_with_retries,
+    acall_with_retries,
+    iter_with_timeouts,
+    aiter_with_timeouts,
+)
+
+
+# Prefixes of the error strings clients return instead of raising
+ERROR_PREFIXES = ("Error: ", "Error calling ", "Timeout: ")
+
+
+def is_error_response(response: str) -> bool:
+    """Check whether a client response is one of the error strings clients return."""
+    return response.startswith(ERROR_PREFIXES)
+
+
+# Instructions for models without native tool calling; {tools} is the JSON tool list
+TOOL_PROMPT = (
+    "You can call these tools:\n{tools}\n\n"
+    "To call tools, reply with only a JSON object: "
+    '{{"tool_calls": [{{"name": "<tool>", "args": {{...}}}}]}}. '
+    "Put every call that does not depend on another call's result in the same reply; "
+    "they run at the same time. Reply with plain text when you need no tool."
+)
+
+
+def new_tool_call_id() -> str:
+    """Id for a tool call whose provider does not assign one."""
+    return f"call_{uuid.uuid4().hex[:16]}"
+
+
+def tool_reply(content: str, calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a tool-calling reply from raw calls with a name and arguments as a dict or JSON text.
+
+    Returns:
+        Dictionary with content, tool_calls (name, args, id) and invalid_tool_calls
+        (calls whose arguments are not a JSON object)
+    """
+    reply: Dict[str, Any] = {"content": content or "", "tool_calls": [], "invalid_tool_calls": []}
+    for call in calls:
+        args = call.get("args", {})
+        call_id = call.get("id") or new_tool_call_id()
+        if isinstance(args, str):
+            try:
+                args = json.loads(args) if args.strip() else {}
+            except json.JSONDecodeError as e:
+                reply["invalid_tool_calls"].append(
+                    {"name": call.get("name"), "args": args, "id": call_id, "error": str(e)}
+                )
+                continue
+        if not isinstance(args, dict):
+            reply["invalid_tool_calls"].append(
+                {"name": call.get("name"), "args": json.dumps(args), "id": call_id, "error": "arguments must be an object"}
+            )
+            continue
+        reply["tool_calls"].append({"name": call.get("name"), "args": args, "id": call_id})
+    return reply
+
+
+def parse_tool_calls(text: str) -> Dict[str, Any]:
+    """Parse a reply to TOOL_PROMPT: tool calls when it is the JSON object, otherwise plain content."""
+    match = re.search(r"```(?:json)?\s*(\{.*\})\s*```", text, re.DOTALL)
+    candidate = match.group(1) if match else text.strip()
+    try:
+        data = json.loads(candidate)
+    except json.JSONDecodeError:
+        return tool_reply(text, [])
+    if isinstance(data, dict) and isinstance(data.get("tool_calls"), list):
+        calls = data["tool_calls"]
+    elif isinstance(data, dict) and "name" in data:
+        calls = [data]
+    else:
+        return tool_reply(text, [])
+    return tool_reply("", [
+        {"name": call.get("name"), "args": call.get("args", call.get("arguments", {}))}
+        for call in calls if isinstance(call, dict)
+    ])
+
+
+def plain_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Flatten tool calls and tool results into plain role/content messages."""
+    plain = []
+    for message in messages:
+        content = message.get("content") or ""
+        if message.get("tool_calls"):
+            calls = [{"name": call["name"], "args": call["args"]} for call in message["tool_calls"]]
+            content = (content + "\n" if content else "") + json.dumps({"tool_calls": calls})
+        if message["role"] == "tool":
+            plain.append({"role": "user", "content": f"Result of {message.get('name')}:\n{content}"})
+        else:
+            plain.append({"role": message["role"], "content": content})
+    return plain
 
 
 class LLMClient(ABC):
@@ -16,6 +121,73 @@ class LLMClient(ABC):
         """Send messages to LLM and get response."""
         pass
     
+    def cache_identity(self) -> Dict[str, Any]:
+        """Describe everything besides the messages that determines a response.
+        
+        Used to build response cache keys; clients should include the provider,
+        model and any generation parameters.
+        """
+        return {"client": type(self).__name__}
+    
+    async def achat(self, messages: List[Dict[str, str]]) -> str:
+        """Send messages to LLM without blocking the event loop.
+        
+        Clients without a native async API run chat() in a worker thread.
+        """
+        return await asyncio.to_thread(self.chat, messages)
+    
+    def stream_chat(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Send messages to LLM and yield the response incrementally.
+        
+        Clients without native streaming yield the whole response at once.
+        """
+        yield self.chat(messages)
+    
+    def chat_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send messages with tools the model may call and return its content and tool calls.
+        
+        Messages may carry ``tool_calls`` (assistant) and tool results (role
+        ``tool`` with ``tool_call_id`` and ``name``); tools are OpenAI-style
+        function schemas. Clients without native tool calling describe the tools
+        in a system message and parse the calls out of the reply.
+        
+        Returns:
+            Dictionary with content, tool_calls (name, args, id) and invalid_tool_calls
+        """
+        instructions = {"role": "system", "content": TOOL_PROMPT.format(tools=json.dumps(tools))}
+        response = self.chat([instructions, *plain_messages(messages)])
+        if is_error_response(response):
+            return tool_reply(response, [])
+        return parse_tool_calls(response)
+    
+    async def achat_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Async variant of chat_with_tools; runs it in a worker thread unless overridden."""
+        return await asyncio.to_thread(self.chat_with_tools, messages, tools)
+    
+    async def astream_chat(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Async variant of stream_chat; drives the sync stream from a worker thread."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        
+        def produce() -> None:
+            try:
+                for token in self.stream_chat(messages):
+                    loop.call_soon_threadsafe(queue.put_nowait, token)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+        
+        threading.Thread(target=produce, daemon=True).start()
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    
     def direct_chat(self, user_message: str) -> str:
         """Direct chat with user message for unclassifiable intents."""
         messages = [
@@ -60,39 +232,249 @@ Respond with ONLY the category name, nothing else."""
         return intent if intent in valid_intents else None
 
 
+class _ClientPool:
+    """Lazily created, long-lived provider clients.
+    
+    One sync client is shared by every thread (the underlying HTTP connection
+    pools are thread-safe); async clients are bound to the event loop they were
+    created on, so one is kept per running loop.
+    """
+    
+    def __init__(self, sync_factory, async_factory):
+        self._sync_factory = sync_factory
+        self._async_factory = async_factory
+        self._sync_client = None
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+    
+    def sync(self) -> Any:
+        if self._sync_client is None:
+            with self._lock:
+                if self._sync_client is None:
+                    self._sync_client = self._sync_factory()
+        return self._sync_client
+    
+    def for_running_loop(self) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._async_clients[loop] = self._async_factory()
+            return client
+
+
 class OllamaClient(LLMClient):
-    """Ollama local LLM client implementation."""
+    """Ollama local LLM client implementation.
+    
+    Timeouts are enforced per request with deadlines that work in any thread or
+    event loop. ``timeout`` bounds a whole non-streaming request and the wait for
+    the first streamed token (model load plus prompt processing); ``idle_timeout``
+    bounds each gap between later tokens, so a slow start is told apart from a
+    stalled stream. Transient connection and 5xx/429 errors are retried with
+    exponential backoff while time remains.
+
+    ``keep_alive`` and ``num_ctx``, when set, are sent with every request so the
+    model stays loaded with one context size (see ModelSessionManager).
+    """
     
-    def __init__(self, model: str = "llama3.1:8b", timeout: int = 20):
+    def __init__(
+        self,
+        model: str = "llama3.1:8b",
+        timeout: float = 20,
+        host: Optional[str] = None,
+        idle_timeout: float = 30,
+        retry: Optional[RetryPolicy] = None,
+        keep_alive: Optional[str] = None,
+        num_ctx: Optional[int] = None,
+    ):
         self.model = model
         self.timeout = timeout
+        self.host = host
+        self.idle_timeout = idle_timeout
+        self.retry = retry or RetryPolicy()
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self._pool = _ClientPool(self._create_client, self._create_async_client)
+    
+    def _http_timeout(self) -> float:
+        # Backstop for abandoned requests; the deadlines below are the real limits
+        return max(self.timeout, self.idle_timeout) + 5
+    
+    def _create_client(self):
+        import ollama
+        return ollama.Client(host=self.host, timeout=self._http_timeout())
+    
+    def _create_async_client(self):
+        import ollama
+        return ollama.AsyncClient(host=self.host, timeout=self._http_timeout())
+    
+    def cache_identity(self) -> Dict[str, Any]:
+        """Identify responses by provider, model and context size when set."""
+        identity = {"provider": "ollama", "model": self.model}
+        if self.num_ctx:
+            identity["num_ctx"] = self.num_ctx
+        return identity
+    
+    def _request_options(self) -> Dict[str, Any]:
+        """Keep-alive and context size arguments sent with every request."""
+        options: Dict[str, Any] = {}
+        if self.keep_alive is not None:
+            options["keep_alive"] = self.keep_alive
+        if self.num_ctx:
+            options["options"] = {"num_ctx": self.num_ctx}
+        return options
+    
+    @staticmethod
+    def _timeout_message(error: TimeoutError) -> str:
+        if isinstance(error, FirstTokenTimeout):
+            return f"Timeout: Ollama produced no first token ({error})"
+        if isinstance(error, StreamStalled):
+            return f"Timeout: Ollama {error}"
+        return f"Timeout: Ollama request {error}"
         
     def chat(self, messages: List[Dict[str, str]]) -> str:
         """Send messages to Ollama and get response."""
         try:
-            import ollama
-            import signal
-            
-            def timeout_handler(signum, frame):
-                raise TimeoutError(f"Ollama request timed out after {self.timeout} seconds")
-            
-            # Set up timeout
-            signal.signal(signal.SIGALRM, timeout_handler)
-            signal.alarm(self.timeout)
-            
-            try:
-                response = ollama.chat(model=self.model, messages=messages)
-                return response.get('message', {}).get('content', '')
-            finally:
-                # Cancel the timeout
-                signal.alarm(0)
-                
+            client = self._pool.sync()
+            response = call_with_retries(
+                lambda: client.chat(model=self.model, messages=messages, **self._request_options()),
+                self.retry,
+                Deadline(self.timeout),
+            )
+            return response.get('message', {}).get('content', '')
+        except ImportError:
+            return "Error: ollama package not installed. Run: pip install ollama"
+        except TimeoutError as e:
+            return self._timeout_message(e)
+        except Exception as e:
+            return f"Error calling Ollama: {str(e)}"
+    
+    async def achat(self, messages: List[Dict[str, str]]) -> str:
+        """Send messages to Ollama without blocking the event loop."""
+        try:
+            client = self._pool.for_running_loop()
+            response = await acall_with_retries(
+                lambda: client.chat(model=self.model, messages=messages, **self._request_options()),
+                self.retry,
+                Deadline(self.timeout),
+            )
+            return response.get('message', {}).get('content', '')
         except ImportError:
             return "Error: ollama package not installed. Run: pip install ollama"
         except TimeoutError as e:
-            return f"Timeout: {str(e)}"
+            return self._timeout_message(e)
         except Exception as e:
             return f"Error calling Ollama: {str(e)}"
+    
+    def stream_chat(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Stream response tokens from Ollama as they are generated."""
+        try:
+            client = self._pool.sync()
+        except ImportError:
+            yield "Error: ollama package not installed. Run: pip install ollama"
+            return
+        try:
+            chunks = iter_with_timeouts(
+                lambda: client.chat(model=self.model, messages=messages, stream=True, **self._request_options()),
+                first_token_timeout=self.timeout,
+                idle_timeout=self.idle_timeout,
+                deadline=Deadline(None),
+                policy=self.retry,
+            )
+            for chunk in chunks:
+                token = chunk.get('message', {}).get('content', '')
+                if token:
+                    yield token
+        except TimeoutError as e:
+            yield self._timeout_message(e)
+        except Exception as e:
+            yield f"Error calling Ollama: {str(e)}"
+    
+    async def astream_chat(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Stream response tokens from Ollama on the event loop."""
+        try:
+            client = self._pool.for_running_loop()
+        except ImportError:
+            yield "Error: ollama package not installed. Run: pip install ollama"
+            return
+        try:
+            chunks = aiter_with_timeouts(
+                lambda: client.chat(model=self.model, messages=messages, stream=True, **self._request_options()),
+                first_token_timeout=self.timeout,
+                idle_timeout=self.idle_timeout,
+                deadline=Deadline(None),
+                policy=self.retry,
+            )
+            async for chunk in chunks:
+                token = chunk.get('message', {}).get('content', '')
+                if token:
+                    yield token
+        except TimeoutError as e:
+            yield self._timeout_message(e)
+        except Exception as e:
+            yield f"Error calling Ollama: {str(e)}"
+    
+    @staticmethod
+    def _provider_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Tool calls and tool results in Ollama's message format."""
+        converted = []
+        for message in messages:
+            content = message.get("content") or ""
+            if message.get("tool_calls"):
+                calls = [{"function": {"name": call["name"], "arguments": call["args"]}} for call in message["tool_calls"]]
+                converted.append({"role": "assistant", "content": content, "tool_calls": calls})
+            elif message["role"] == "tool":
+                converted.append({"role": "tool", "content": content, "tool_name": message.get("name")})
+            else:
+                converted.append({"role": message["role"], "content": content})
+        return converted
+    
+    @staticmethod
+    def _tool_reply(response: Any) -> Dict[str, Any]:
+        message = response.get('message', {})
+        calls = [
+            {"name": call['function']['name'], "args": dict(call['function']['arguments'] or {})}
+            for call in message.get('tool_calls') or []
+        ]
+        return tool_reply(message.get('content', ''), calls)
+    
+    def chat_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send messages and tool schemas to Ollama's native tool calling."""
+        try:
+            client = self._pool.sync()
+            response = call_with_retries(
+                lambda: client.chat(
+                    model=self.model, messages=self._provider_messages(messages), tools=tools, **self._request_options()
+                ),
+                self.retry,
+                Deadline(self.timeout),
+            )
+            return self._tool_reply(response)
+        except ImportError:
+            return tool_reply("Error: ollama package not installed. Run: pip install ollama", [])
+        except TimeoutError as e:
+            return tool_reply(self._timeout_message(e), [])
+        except Exception as e:
+            return tool_reply(f"Error calling Ollama: {str(e)}", [])
+    
+    async def achat_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send messages and tool schemas to Ollama without blocking the event loop."""
+        try:
+            client = self._pool.for_running_loop()
+            response = await acall_with_retries(
+                lambda: client.chat(
+                    model=self.model, messages=self._provider_messages(messages), tools=tools, **self._request_options()
+                ),
+                self.retry,
+                Deadline(self.timeout),
+            )
+            return self._tool_reply(response)
+        except ImportError:
+            return tool_reply("Error: ollama package not installed. Run: pip install ollama", [])
+        except TimeoutError as e:
+            return tool_reply(self._timeout_message(e), [])
+        except Exception as e:
+            return tool_reply(f"Error calling Ollama: {str(e)}", [])
 
 
 class OpenAIClient(LLMClient):
@@ -101,12 +483,24 @@ class OpenAIClient(LLMClient):
     def __init__(self, model: str = "gpt-3.5-turbo", api_key: Optional[str] = None):
         self.model = model
         self.api_key = api_key
+        self._pool = _ClientPool(self._create_client, self._create_async_client)
+    
+    def _create_client(self):
+        import openai
+        return openai.OpenAI(api_key=self.api_key)
+    
+    def _create_async_client(self):
+        import openai
+        return openai.AsyncOpenAI(api_key=self.api_key)
+    
+    def cache_identity(self) -> Dict[str, Any]:
+        """Identify responses by provider, model and generation parameters."""
+        return {"provider": "openai", "model": self.model, "max_tokens": 500}
         
     def chat(self, messages: List[Dict[str, str]]) -> str:
         """Send messages to OpenAI and get response."""
         try:
-            import openai
-            client = openai.OpenAI(api_key=self.api_key)
+            client = self._pool.sync()
             response = client.chat.completions.create(
                 model=self.model,
                 messages=messages,
@@ -117,6 +511,121 @@ class OpenAIClient(LLMClient):
             return "Error: openai package not installed. Run: pip install openai"
         except Exception as e:
             return f"Error calling OpenAI: {str(e)}"
+    
+    async def achat(self, messages: List[Dict[str, str]]) -> str:
+        """Send messages to OpenAI without blocking the event loop."""
+        try:
+            client = self._pool.for_running_loop()
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=500
+            )
+            return response.choices[0].message.content
+        except ImportError:
+            return "Error: openai package not installed. Run: pip install openai"
+        except Exception as e:
+            return f"Error calling OpenAI: {str(e)}"
+    
+    def stream_chat(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Stream response tokens from OpenAI as they are generated."""
+        try:
+            client = self._pool.sync()
+        except ImportError:
+            yield "Error: openai package not installed. Run: pip install openai"
+            return
+        try:
+            stream = client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=500,
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            yield f"Error calling OpenAI: {str(e)}"
+    
+    async def astream_chat(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Stream response tokens from OpenAI on the event loop."""
+        try:
+            client = self._pool.for_running_loop()
+        except ImportError:
+            yield "Error: openai package not installed. Run: pip install openai"
+            return
+        try:
+            stream = await client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=500,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            yield f"Error calling OpenAI: {str(e)}"
+    
+    @staticmethod
+    def _provider_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Tool calls and tool results in OpenAI's message format."""
+        converted = []
+        for message in messages:
+            content = message.get("content") or ""
+            if message.get("tool_calls"):
+                calls = [
+                    {"id": call["id"], "type": "function",
+                     "function": {"name": call["name"], "arguments": json.dumps(call["args"])}}
+                    for call in message["tool_calls"]
+                ]
+                converted.append({"role": "assistant", "content": content, "tool_calls": calls})
+            elif message["role"] == "tool":
+                converted.append({"role": "tool", "content": content, "tool_call_id": message.get("tool_call_id")})
+            else:
+                converted.append({"role": message["role"], "content": content})
+        return converted
+    
+    @staticmethod
+    def _tool_reply(response: Any) -> Dict[str, Any]:
+        message = response.choices[0].message
+        calls = [
+            {"name": call.function.name, "args": call.function.arguments, "id": call.id}
+            for call in message.tool_calls or []
+        ]
+        return tool_reply(message.content or "", calls)
+    
+    def chat_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send messages and tool schemas to OpenAI's native tool calling."""
+        try:
+            client = self._pool.sync()
+            response = client.chat.completions.create(
+                model=self.model,
+                messages=self._provider_messages(messages),
+                tools=tools,
+                max_tokens=500
+            )
+            return self._tool_reply(response)
+        except ImportError:
+            return tool_reply("Error: openai package not installed. Run: pip install openai", [])
+        except Exception as e:
+            return tool_reply(f"Error calling OpenAI: {str(e)}", [])
+    
+    async def achat_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send messages and tool schemas to OpenAI without blocking the event loop."""
+        try:
+            client = self._pool.for_running_loop()
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=self._provider_messages(messages),
+                tools=tools,
+                max_tokens=500
+            )
+            return self._tool_reply(response)
+        except ImportError:
+            return tool_reply("Error: openai package not installed. Run: pip install openai", [])
+        except Exception as e:
+            return tool_reply(f"Error calling OpenAI: {str(e)}", [])
 
 
 class LLMFactory:
@@ -131,6 +640,22 @@ class LLMFactory:
             return OpenAIClient(**kwargs)
         else:
             raise ValueError(f"Unknown LLM provider: {provider}")
+    
+    @staticmethod
+    def create_cached_client(
+        provider: str = "ollama",
+        cache_path: Optional[str] = None,
+        **kwargs,
+    ) -> LLMClient:
+        """Create an LLM client wrapped in a response cache.
+        
+        Args:
+            provider: LLM provider name
+            cache_path: Optional SQLite file for the persistent cache tier
+            **kwargs: Arguments for the underlying client
+        """
+        from .cache import CachedLLMClient
+        return CachedLLMClient(LLMFactory.create_client(provider, **kwargs), disk_path=cache_path)
 
 
 
@@ -142,7 +667,12 @@ def get_llm_client() -> LLMClient:
     """Get singleton LLM client instance."""
     global _llm_client
     if _llm_client is None:
-        _llm_client = LLMFactory.create_client("ollama")
+        # DEVAGENT_LLM_CACHE points at a persistent response cache (e.g. for CI reruns)
+        cache_path = os.environ.get("DEVAGENT_LLM_CACHE")
+        if cache_path:
+            _llm_client = LLMFactory.create_cached_client("ollama", cache_path=cache_path)
+        else:
+            _llm_client = LLMFactory.create_client("ollama")
     return _llm_client
 
 def set_llm_client(client: LLMClient) -> None:
@@ -152,9 +682,15 @@ def set_llm_client(client: LLMClient) -> None:
 
 
 class DevAgentChatModel(BaseChatModel):
-    """Adapter to use DevAgent LLM clients as LangChain chat models."""
+    """Adapter to use DevAgent LLM clients as LangChain chat models.
+    
+    Tools bound with bind_tools are sent to the client as OpenAI-style function
+    schemas and the calls in its reply come back as AIMessage.tool_calls, so
+    react agents can run several independent calls from a single reply.
+    """
     
     llm_client: LLMClient
+    tool_schemas: List[Dict[str, Any]] = []
     
     def __init__(self, llm_client: Optional[LLMClient] = None, **kwargs):
         # Initialize with the LLM client as a model field
@@ -168,6 +704,9 @@ class DevAgentChatModel(BaseChatModel):
         **kwargs: Any,
     ) -> ChatResult:
         """Generate chat response using DevAgent LLM client."""
+        if self.tool_schemas:
+            reply = self.llm_client.chat_with_tools(self._convert_to_tool_messages(messages), self.tool_schemas)
+            return ChatResult(generations=[ChatGeneration(message=self._tool_reply_message(reply))])
         
         # Convert LangChain messages to DevAgent format
         devagent_messages = self._convert_to_devagent_messages(messages)
@@ -181,6 +720,94 @@ class DevAgentChatModel(BaseChatModel):
         
         return ChatResult(generations=[generation])
     
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] = None,
+        run_manager = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Generate chat response asynchronously using DevAgent LLM client."""
+        if self.tool_schemas:
+            reply = await self.llm_client.achat_with_tools(self._convert_to_tool_messages(messages), self.tool_schemas)
+            return ChatResult(generations=[ChatGeneration(message=self._tool_reply_message(reply))])
+        devagent_messages = self._convert_to_devagent_messages(messages)
+        response_text = await self.llm_client.achat(devagent_messages)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=response_text))])
+    
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] = None,
+        run_manager = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """Stream chat response tokens using DevAgent LLM client.
+        
+        With tools bound the reply arrives whole, as one chunk carrying the tool calls.
+        """
+        if self.tool_schemas:
+            reply = self.llm_client.chat_with_tools(self._convert_to_tool_messages(messages), self.tool_schemas)
+            chunk = self._tool_reply_chunk(reply)
+            if run_manager and reply["content"]:
+                run_manager.on_llm_new_token(reply["content"], chunk=chunk)
+            yield chunk
+            return
+        
+        devagent_messages = self._convert_to_devagent_messages(messages)
+        
+        for token in self.llm_client.stream_chat(devagent_messages):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+    
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] = None,
+        run_manager = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """Asynchronously stream chat response tokens using DevAgent LLM client."""
+        if self.tool_schemas:
+            reply = await self.llm_client.achat_with_tools(self._convert_to_tool_messages(messages), self.tool_schemas)
+            chunk = self._tool_reply_chunk(reply)
+            if run_manager and reply["content"]:
+                await run_manager.on_llm_new_token(reply["content"], chunk=chunk)
+            yield chunk
+            return
+        
+        devagent_messages = self._convert_to_devagent_messages(messages)
+        
+        async for token in self.llm_client.astream_chat(devagent_messages):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+    
+    @staticmethod
+    def _tool_reply_message(reply: Dict[str, Any]) -> AIMessage:
+        """AIMessage for a chat_with_tools reply."""
+        return AIMessage(
+            content=reply["content"],
+            tool_calls=reply["tool_calls"],
+            invalid_tool_calls=reply.get("invalid_tool_calls", []),
+        )
+    
+    @staticmethod
+    def _tool_reply_chunk(reply: Dict[str, Any]) -> ChatGenerationChunk:
+        """Single stream chunk for a chat_with_tools reply (arguments travel as JSON text)."""
+        calls = [
+            {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": index}
+            for index, call in enumerate(reply["tool_calls"])
+        ]
+        calls += [
+            {"name": call["name"], "args": call["args"], "id": call["id"], "index": len(calls) + index}
+            for index, call in enumerate(reply.get("invalid_tool_calls", []))
+        ]
+        return ChatGenerationChunk(message=AIMessageChunk(content=reply["content"], tool_call_chunks=calls))
+    
     def _convert_to_devagent_messages(self, messages: List[BaseMessage]) -> List[Dict[str, str]]:
         """Convert LangChain messages to DevAgent format."""
         devagent_messages = []
@@ -202,6 +829,18 @@ class DevAgentChatModel(BaseChatModel):
         
         return devagent_messages
     
+    def _convert_to_tool_messages(self, messages: List[BaseMessage]) -> List[Dict[str, Any]]:
+        """Convert LangChain messages to DevAgent format, keeping tool calls and tool results."""
+        devagent_messages = self._convert_to_devagent_messages(messages)
+        for converted, message in zip(devagent_messages, messages):
+            if isinstance(message, AIMessage) and message.tool_calls:
+                converted["tool_calls"] = [
+                    {"name": call["name"], "args": call["args"], "id": call["id"]} for call in message.tool_calls
+                ]
+            elif isinstance(message, ToolMessage):
+                converted.update(role="tool", tool_call_id=message.tool_call_id, name=message.name)
+        return devagent_messages
+    
     @property
     def _llm_type(self) -> str:
         """Return identifier of llm type."""
@@ -213,10 +852,11 @@ class DevAgentChatModel(BaseChatModel):
         return {"llm_client": str(type(self.llm_client).__name__)}
     
     def bind_tools(self, tools, **kwargs):
-        """Bind tools to the model - required for create_react_agent."""
-        # For now, just return self since our tools are handled by the agent framework
-        # In a full implementation, we'd need to convert tools to the format our LLM understands
-        return self
+        """Bind tools to the model - required for create_react_agent.
+        
+        Returns a copy that sends the tools' function schemas with every request.
+        """
+        return self.model_copy(update={"tool_schemas": [convert_to_openai_tool(tool) for tool in tools]})
 
 
 def get_langchain_model() -> BaseChatModel:
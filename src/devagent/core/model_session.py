@@ -0,0 +1,117 @@
+"""Model sessions on the Ollama server: warm-up, keep-alive and context size.
+
+Loading a 14B model from disk takes seconds, and Ollama unloads a model after
+five idle minutes, so the first request after a pause pays for the load again.
+ModelSessionManager loads the models when the CLI starts (in the background,
+while the user types) and every request carries ``keep_alive`` so they stay
+resident.
+
+The context size is set per role. Ollama reloads a model, dropping its prompt
+cache, whenever a request asks for a different ``num_ctx``; so all roles served
+by one model get the largest size among them and requests to it always agree.
+
+Configured with ``DEVAGENT_KEEP_ALIVE`` (e.g. ``1h``, ``-1`` to never unload)
+and ``DEVAGENT_NUM_CTX`` (e.g. ``editor=32768,verifier=16384``).
+"""
+
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("devagent.model_session")
+
+DEFAULT_KEEP_ALIVE = "30m"
+
+# Context tokens per role. Roles that see the conversation need room for the
+# history budget (DEFAULT_TOKEN_BUDGET) plus prompt, tool schemas and answer.
+DEFAULT_ROLE_NUM_CTX = {
+    "pr_bot": 8192,
+    "executor": 16384,
+    "verifier": 16384,
+    "supervisor": 32768,
+    "retriever": 32768,
+    "editor": 32768,
+}
+
+# Longest a warm-up request (loading a model from disk) may take
+WARMUP_TIMEOUT = 300
+
+
+def parse_role_sizes(spec: str) -> Dict[str, int]:
+    """Parse ``role=tokens`` pairs separated by commas (``editor=32768,verifier=16384``).
+
+    Raises:
+        ValueError: When a pair is malformed or the size is not a positive integer
+    """
+    sizes = {}
+    for pair in filter(None, (part.strip() for part in spec.split(","))):
+        role, _, size = pair.partition("=")
+        if not size.strip().isdigit() or int(size) <= 0:
+            raise ValueError(f"Invalid context size '{pair}': expected role=<tokens>")
+        sizes[role.strip()] = int(size)
+    return sizes
+
+
+class ModelSessionManager:
+    """Keeps the models resident on the server and sizes their context per role.
+
+    Args:
+        keep_alive: How long the server keeps a model loaded after a request
+            (environment or 30 minutes when omitted)
+        role_num_ctx: Context tokens per role, on top of the defaults and environment
+        host: Ollama server URL (the client default when omitted)
+    """
+
+    def __init__(
+        self,
+        keep_alive: Optional[str] = None,
+        role_num_ctx: Optional[Dict[str, int]] = None,
+        host: Optional[str] = None,
+    ):
+        self.keep_alive = keep_alive or os.environ.get("DEVAGENT_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)
+        self.role_num_ctx = {
+            **DEFAULT_ROLE_NUM_CTX,
+            **parse_role_sizes(os.environ.get("DEVAGENT_NUM_CTX", "")),
+            **(role_num_ctx or {}),
+        }
+        self.host = host
+        # Load time of each warmed model in milliseconds (None when the warm-up failed)
+        self.warmup_ms: Dict[str, Optional[float]] = {}
+
+    def num_ctx(self, roles: Iterable[str]) -> Optional[int]:
+        """Context size for a model serving these roles: the largest of theirs."""
+        sizes = [self.role_num_ctx[role] for role in roles if role in self.role_num_ctx]
+        return max(sizes) if sizes else None
+
+    def chat_model_options(self, roles: Iterable[str]) -> Dict[str, Any]:
+        """Keyword arguments for a ChatOllama serving these roles."""
+        return {"keep_alive": self.keep_alive, "num_ctx": self.num_ctx(roles), "base_url": self.host}
+
+    def warm(self, models: Dict[str, List[str]]) -> Dict[str, Optional[float]]:
+        """Load each model with the context size of its roles and keep it resident.
+
+        Args:
+            models: Roles served per model name, in the order to load them
+
+        Returns:
+            Load time per model in milliseconds (None for models that failed to load)
+        """
+        try:
+            import ollama
+            client = ollama.Client(host=self.host, timeout=WARMUP_TIMEOUT)
+        except ImportError:
+            logger.warning("❌ WARMUP: ollama package not installed")
+            return {}
+        for model, roles in models.items():
+            start = time.perf_counter()
+            options = {"num_ctx": self.num_ctx(roles)} if self.num_ctx(roles) else None
+            try:
+                # An empty prompt only loads the model
+                client.generate(model=model, prompt="", keep_alive=self.keep_alive, options=options)
+                self.warmup_ms[model] = round((time.perf_counter() - start) * 1000, 1)
+                logger.info(f"🔥 WARMUP: {model} ready in {self.warmup_ms[model]:.0f} ms (num_ctx {options and options['num_ctx']})")
+            except Exception as e:
+                self.warmup_ms[model] = None
+                logger.warning(f"❌ WARMUP: {model} - {str(e)}")
+        return dict(self.warmup_ms)
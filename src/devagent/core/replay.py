@@ -0,0 +1,126 @@
+"""Deterministic replay of recorded model responses, for offline benchmarks and tests.
+
+A recording is a list of responses in the order the model produced them. Each
+response is either a string or a dictionary with ``content`` and optional
+``tool_calls`` (``name`` and ``args``; ids are generated when missing).
+ReplayLLMClient serves the recording through the LLMClient interface, and
+ReplayChatModel wraps it as a LangChain chat model; with tools bound, the
+recorded tool calls come back through chat_with_tools, so the whole supervisor
+graph runs without a model server or network.
+"""
+
+import json
+import threading
+from typing import Any, Dict, List, Optional, Union
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+
+from .llm import DevAgentChatModel, LLMClient
+from .tracing import UNTRACED_TAG
+
+Response = Union[str, Dict[str, Any]]
+
+
+def load_recording(path: str) -> List[Response]:
+    """Load a recording saved by ResponseRecorder.save (a JSON list of responses)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ReplayLLMClient(LLMClient):
+    """LLM client that returns recorded responses in order.
+
+    Responses are consumed by every call regardless of the prompt, so a
+    recording only replays faithfully against the same scenario. Once it runs
+    out, calls return an error string like the other clients do on failure.
+
+    Args:
+        responses: Recorded responses, in call order
+    """
+
+    def __init__(self, responses: List[Response]):
+        self.responses = list(responses)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def cache_identity(self) -> Dict[str, Any]:
+        """Identify responses by recording, so replays never mix with real cache entries."""
+        return {"client": "replay", "responses": len(self.responses)}
+
+    def next_response(self) -> Dict[str, Any]:
+        """Take the next recorded response as a dictionary with content and tool_calls."""
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+        if index >= len(self.responses):
+            return {"content": f"Error: replay recording exhausted after {len(self.responses)} responses", "tool_calls": []}
+        response = self.responses[index]
+        if isinstance(response, str):
+            return {"content": response, "tool_calls": []}
+        tool_calls = [
+            {"name": call["name"], "args": call.get("args", {}), "id": call.get("id") or f"replay-{index}-{n}"}
+            for n, call in enumerate(response.get("tool_calls", []))
+        ]
+        return {"content": response.get("content", ""), "tool_calls": tool_calls}
+
+    def chat(self, messages: List[Dict[str, str]]) -> str:
+        """Return the content of the next recorded response."""
+        return self.next_response()["content"]
+
+    def chat_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Return the next recorded response with its tool calls."""
+        return {**self.next_response(), "invalid_tool_calls": []}
+
+
+class ReplayChatModel(DevAgentChatModel):
+    """Chat model that replays a ReplayLLMClient, including recorded tool calls."""
+
+    def __init__(self, llm_client: ReplayLLMClient, **kwargs):
+        super().__init__(llm_client=llm_client, **kwargs)
+
+    # Replayed responses arrive whole: undo the streaming overrides so LangChain falls back to _generate
+    _stream = BaseChatModel._stream
+    _astream = BaseChatModel._astream
+
+    @property
+    def _llm_type(self) -> str:
+        return "devagent_replay"
+
+
+class ResponseRecorder(BaseCallbackHandler):
+    """Callback handler that records every chat model response of a run.
+
+    Pass it in the run config (``callbacks``) of a session against a real model,
+    then save the recording to replay the same scenario offline.
+    """
+
+    def __init__(self):
+        self.responses: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # Wrapper runs (the model router) whose inner model call is recorded instead
+        self._delegating = set()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, tags=None, **kwargs) -> None:
+        if UNTRACED_TAG in (tags or []):
+            with self._lock:
+                self._delegating.add(run_id)
+
+    def on_llm_end(self, response, *, run_id, parent_run_id=None, **kwargs) -> None:
+        with self._lock:
+            if run_id in self._delegating:
+                self._delegating.discard(run_id)
+                return
+        for generations in response.generations:
+            for generation in generations:
+                message: Optional[BaseMessage] = getattr(generation, "message", None)
+                tool_calls = [
+                    {"name": call["name"], "args": call["args"]} for call in getattr(message, "tool_calls", None) or []
+                ]
+                with self._lock:
+                    self.responses.append({"content": generation.text or "", "tool_calls": tool_calls})
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.responses, f, indent=2)
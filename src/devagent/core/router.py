@@ -0,0 +1,377 @@
+"""Tiered model routing: a small model for routing and lookups, a large one for code.
+
+Each role (the supervisor and the five agents) maps to a tier, and each tier to
+an Ollama model. Routing and retrieval go to the small model; editing and
+review to the large one. Ollama reports no confidence scores, so a small-tier
+answer is escalated to the large tier on structural signs that it is unusable:
+malformed tool calls, calls to tools the agent does not have, an empty answer
+or an error.
+
+Models are configured with ``DEVAGENT_SMALL_MODEL`` and ``DEVAGENT_LARGE_MODEL``
+and role tiers overridden with ``DEVAGENT_MODEL_TIERS`` (e.g. ``retriever=large``).
+Keep-alive and context sizes come from the ModelSessionManager.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManager, CallbackManager
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langchain_ollama import ChatOllama
+from langgraph.constants import TAG_NOSTREAM
+
+from .model_session import ModelSessionManager
+from .tracing import UNTRACED_TAG
+
+logger = logging.getLogger("devagent.router")
+
+SMALL = "small"
+LARGE = "large"
+
+DEFAULT_TIER_MODELS = {
+    SMALL: "qwen2.5:3b-instruct",
+    LARGE: "qwen2.5:14b-instruct",
+}
+
+DEFAULT_ROLE_TIERS = {
+    "supervisor": SMALL,
+    "retriever": SMALL,
+    "executor": SMALL,
+    "pr_bot": SMALL,
+    "editor": LARGE,
+    "verifier": LARGE,
+}
+
+MODEL_TEMPERATURE = 0.2
+
+
+def parse_role_tiers(spec: str) -> Dict[str, str]:
+    """Parse ``role=tier`` pairs separated by commas (``retriever=large,executor=large``).
+
+    Raises:
+        ValueError: When a pair is malformed or names an unknown tier
+    """
+    tiers = {}
+    for pair in filter(None, (part.strip() for part in spec.split(","))):
+        role, _, tier = pair.partition("=")
+        if tier.strip() not in (SMALL, LARGE):
+            raise ValueError(f"Invalid model tier '{pair}': expected role=small or role=large")
+        tiers[role.strip()] = tier.strip()
+    return tiers
+
+
+def assess_response(message: AIMessage, tool_names: Sequence[str]) -> Optional[str]:
+    """Why a model response looks unusable, or None when it looks fine.
+
+    Args:
+        message: The model's response
+        tool_names: Tools the model was given
+
+    Returns:
+        Short reason used to escalate the call to a larger model
+    """
+    if getattr(message, "invalid_tool_calls", None):
+        return "malformed tool call"
+    unknown = [call["name"] for call in message.tool_calls if call["name"] not in tool_names]
+    if unknown:
+        return f"unknown tool {unknown[0]}"
+    if not message.tool_calls and not str(message.content).strip():
+        return "empty response"
+    return None
+
+
+class ModelRouter:
+    """Picks the model for each role and escalates unusable small-model answers.
+
+    One chat model is created per model name and shared by every role and
+    graph using it, so they also share connection pools.
+
+    Args:
+        tier_models: Model name per tier (environment or defaults when omitted)
+        role_tiers: Tier per role, on top of the defaults and environment
+        model_factory: Builds the chat model for a model name (ChatOllama by default)
+        sessions: Keep-alive, context sizes and warm-up of the default models
+    """
+
+    def __init__(
+        self,
+        tier_models: Optional[Dict[str, str]] = None,
+        role_tiers: Optional[Dict[str, str]] = None,
+        model_factory: Optional[Callable[[str], BaseChatModel]] = None,
+        sessions: Optional[ModelSessionManager] = None,
+    ):
+        self.tier_models = {
+            SMALL: os.environ.get("DEVAGENT_SMALL_MODEL", DEFAULT_TIER_MODELS[SMALL]),
+            LARGE: os.environ.get("DEVAGENT_LARGE_MODEL", DEFAULT_TIER_MODELS[LARGE]),
+            **(tier_models or {}),
+        }
+        self.role_tiers = {
+            **DEFAULT_ROLE_TIERS,
+            **parse_role_tiers(os.environ.get("DEVAGENT_MODEL_TIERS", "")),
+            **(role_tiers or {}),
+        }
+        self.sessions = sessions or ModelSessionManager()
+        self.model_factory = model_factory or (
+            lambda name: ChatOllama(
+                model=name, temperature=MODEL_TEMPERATURE, **self.sessions.chat_model_options(self.roles_on(name))
+            )
+        )
+        self._models: Dict[str, BaseChatModel] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[tuple, Dict[str, Any]] = {}
+
+    def tier_for(self, role: str) -> str:
+        """Tier a role runs on (large for roles without a configured tier)."""
+        return self.role_tiers.get(role, LARGE)
+
+    def escalation_tier(self, tier: str) -> Optional[str]:
+        """Tier to retry an unusable answer on, or None when there is no larger model."""
+        if tier == SMALL and self.tier_models[SMALL] != self.tier_models[LARGE]:
+            return LARGE
+        return None
+
+    def roles_on(self, model_name: str) -> List[str]:
+        """Roles a model may serve, counting the answers escalated to it."""
+        roles = []
+        for role in self.role_tiers:
+            tier = self.tier_for(role)
+            tiers = (tier, self.escalation_tier(tier) or tier)
+            if model_name in (self.tier_models[t] for t in tiers):
+                roles.append(role)
+        return roles
+
+    def warm(self) -> Dict[str, Optional[float]]:
+        """Load every model on the server, smallest tier first, and keep them resident.
+
+        Returns:
+            Load time per model in milliseconds (None for models that failed to load)
+        """
+        models = dict.fromkeys(self.tier_models[tier] for tier in (SMALL, LARGE))
+        return self.sessions.warm({name: self.roles_on(name) for name in models})
+
+    def model(self, tier: str) -> BaseChatModel:
+        """Shared chat model of a tier."""
+        name = self.tier_models[tier]
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self.model_factory(name)
+            return self._models[name]
+
+    def chat_model(self, role: str) -> "RoutedChatModel":
+        """Chat model for an agent or the supervisor that routes each call through this router."""
+        return RoutedChatModel(router=self, role=role)
+
+    def generate(
+        self,
+        role: str,
+        messages: List[BaseMessage],
+        tools: Sequence[Any] = (),
+        tool_kwargs: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        callbacks: Any = None,
+    ) -> AIMessage:
+        """Run a chat call for a role, escalating an unusable small-tier answer.
+
+        Args:
+            role: Role making the call
+            messages: Conversation to answer
+            tools: Tools bound to the call
+            tool_kwargs: Extra bind_tools arguments (e.g. tool_choice)
+            stop: Stop sequences
+            callbacks: Callbacks of the calling run, so the tier model is traced
+                and streamed as part of it
+
+        Returns:
+            The answer of the last tier tried
+        """
+        tool_names = [convert_to_openai_tool(tool)["function"]["name"] for tool in tools]
+        tier: Optional[str] = self.tier_for(role)
+        while True:
+            runnable, config = self._attempt(tier, tools, tool_kwargs, callbacks)
+            start = time.perf_counter()
+            try:
+                message = runnable.invoke(messages, config, stop=stop)
+                reason = assess_response(message, tool_names)
+            except Exception as e:
+                reason = self._failed(role, tier, start, e)
+            tier = self._settle(role, tier, start, reason)
+            if tier is None:
+                return message
+
+    async def agenerate(
+        self,
+        role: str,
+        messages: List[BaseMessage],
+        tools: Sequence[Any] = (),
+        tool_kwargs: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        callbacks: Any = None,
+    ) -> AIMessage:
+        """Async version of generate, awaiting the tier models so concurrent calls overlap."""
+        tool_names = [convert_to_openai_tool(tool)["function"]["name"] for tool in tools]
+        tier: Optional[str] = self.tier_for(role)
+        while True:
+            runnable, config = self._attempt(tier, tools, tool_kwargs, callbacks)
+            start = time.perf_counter()
+            try:
+                message = await runnable.ainvoke(messages, config, stop=stop)
+                reason = assess_response(message, tool_names)
+            except Exception as e:
+                reason = self._failed(role, tier, start, e)
+            tier = self._settle(role, tier, start, reason)
+            if tier is None:
+                return message
+
+    def _attempt(self, tier: str, tools: Sequence[Any], tool_kwargs: Optional[Dict[str, Any]],
+                 callbacks: Any) -> tuple:
+        """Runnable and run config for one tier's attempt at a call."""
+        model = self.model(tier)
+        runnable = model.bind_tools(list(tools), **(tool_kwargs or {})) if tools else model
+        config: Dict[str, Any] = {"callbacks": callbacks, "metadata": {"model_tier": tier}}
+        if self.escalation_tier(tier) is not None:
+            # Tokens of an answer that may still be escalated are not streamed to
+            # the UI; once accepted, the answer is emitted whole
+            config["tags"] = [TAG_NOSTREAM]
+        return runnable, config
+
+    def _failed(self, role: str, tier: str, start: float, error: Exception) -> str:
+        """Escalation reason for a failed call; re-raises when there is no larger tier."""
+        if self.escalation_tier(tier) is None:
+            self._record(role, tier, time.perf_counter() - start, None, error=True)
+            raise error
+        return f"error: {str(error)}"
+
+    def _settle(self, role: str, tier: str, start: float, reason: Optional[str]) -> Optional[str]:
+        """Record an attempt and return the tier to escalate to, or None to accept the answer."""
+        next_tier = self.escalation_tier(tier)
+        if reason is None or next_tier is None:
+            self._record(role, tier, time.perf_counter() - start, None)
+            return None
+        self._record(role, tier, time.perf_counter() - start, reason)
+        logger.info(f"⬆️ ROUTER: {role} escalated from {tier} to {next_tier} model ({reason})")
+        return next_tier
+
+    def _record(self, role: str, tier: str, seconds: float, escalation: Optional[str], error: bool = False) -> None:
+        with self._lock:
+            entry = self._stats.setdefault(
+                (role, tier),
+                {"calls": 0, "escalations": 0, "errors": 0, "seconds": 0.0, "reasons": Counter()},
+            )
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["seconds"] += seconds
+            if escalation is not None:
+                entry["escalations"] += 1
+                entry["reasons"][escalation.split(":", 1)[0]] += 1
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Calls per role and tier: count, escalations (with reasons), errors and mean seconds."""
+        with self._lock:
+            return [
+                {
+                    "role": role,
+                    "tier": tier,
+                    "model": self.tier_models[tier],
+                    "calls": entry["calls"],
+                    "escalations": entry["escalations"],
+                    "errors": entry["errors"],
+                    "mean_s": round(entry["seconds"] / entry["calls"], 3),
+                    "reasons": dict(entry["reasons"]),
+                }
+                for (role, tier), entry in sorted(self._stats.items())
+            ]
+
+    def format_stats(self) -> str:
+        """Routing statistics as plain text lines, one per role and tier."""
+        rows = self.stats()
+        if not rows:
+            return "No model calls routed."
+        lines = ["Model routing:"]
+        for row in rows:
+            line = (
+                f"  {row['role']:<11} {row['tier']:<6} {row['model']:<24} "
+                f"{row['calls']:>4} calls  {row['mean_s']:.2f}s mean"
+            )
+            if row["escalations"]:
+                reasons = ", ".join(f"{reason} x{count}" for reason, count in row["reasons"].items())
+                line += f"  {row['escalations']} escalated ({reasons})"
+            if row["errors"]:
+                line += f"  {row['errors']} failed"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+class RoutedChatModel(BaseChatModel):
+    """Chat model of one role that sends each call to the router.
+
+    The tier model's run is a child of this one and carries the traces and
+    streamed tokens; this wrapper is tagged so tracing does not count it twice.
+    Small-tier answers that could be escalated are not streamed: they reach
+    the message stream whole, as this wrapper's result, once accepted.
+    """
+
+    router: Any
+    role: str
+    tools: List[Any] = []
+    tool_kwargs: Dict[str, Any] = {}
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("tags", [UNTRACED_TAG])
+        super().__init__(**kwargs)
+
+    def bind_tools(self, tools, **kwargs):
+        """Bind tools; they are bound to whichever tier model serves each call."""
+        return self.model_copy(update={"tools": list(tools), "tool_kwargs": kwargs})
+
+    @staticmethod
+    def _child_callbacks(run_manager: Any, manager_class: type) -> Any:
+        """Callbacks for the tier model's run, nested under this one (like the chain managers' get_child)."""
+        if run_manager is None:
+            return None
+        callbacks = manager_class(
+            handlers=run_manager.inheritable_handlers,
+            inheritable_handlers=run_manager.inheritable_handlers,
+            parent_run_id=run_manager.run_id,
+        )
+        callbacks.add_tags(run_manager.inheritable_tags)
+        callbacks.add_metadata(run_manager.inheritable_metadata)
+        return callbacks
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Answer through the router on this role's tier."""
+        callbacks = self._child_callbacks(run_manager, CallbackManager)
+        message = self.router.generate(self.role, messages, self.tools, self.tool_kwargs, stop, callbacks)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Answer through the router on this role's tier without blocking the event loop."""
+        callbacks = self._child_callbacks(run_manager, AsyncCallbackManager)
+        message = await self.router.agenerate(self.role, messages, self.tools, self.tool_kwargs, stop, callbacks)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @property
+    def _llm_type(self) -> str:
+        return "devagent_routed"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"role": self.role, "tier": self.router.tier_for(self.role)}
@@ -1,39 +1,104 @@
 """State management for DevAgent conversations."""
 
-from typing import TypedDict, Optional, Dict, Any, List
+from typing import TypedDict, Optional, Dict, Any, List, Annotated
+from typing_extensions import NotRequired
 from langchain_core.messages import BaseMessage
+from langgraph.graph.message import add_messages
+from langgraph.managed import RemainingSteps
+
+
+def merge_dicts(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reducer that merges dictionaries written by concurrent agents (right wins per key)."""
+    return {**(left or {}), **(right or {})}
+
+
+def merge_lists(left: Optional[List[str]], right: Optional[List[str]]) -> List[str]:
+    """Reducer that appends new items, ignoring ones already present."""
+    merged = list(left or [])
+    merged.extend(item for item in (right or []) if item not in merged)
+    return merged
+
+
+def latest(left: Any, right: Any) -> Any:
+    """Reducer that keeps the most recent write, allowing concurrent writers."""
+    return right
 
 
 class AgentState(TypedDict):
     """State shared across all agents in the supervisor pattern workflow.
-    
-    Compatible with langgraph-supervisor package state requirements.
+
+    Compatible with langgraph-supervisor package state requirements. Every
+    field has a reducer so that agents running in parallel branches can write
+    in the same step: messages are merged by id, lists and dicts are merged,
+    and plain values keep the latest write.
     """
-    
+
     # Required by langgraph-supervisor
-    messages: List[BaseMessage]  # LangChain message format for supervisor
-    
+    messages: Annotated[List[BaseMessage], add_messages]  # LangChain message format for supervisor
+    remaining_steps: RemainingSteps                       # Step budget managed by LangGraph
+
     # DevAgent specific fields
-    goal: str                    # Original user request  
-    user_intent: str            # Classified intent (set by supervisor)
+    goal: Annotated[str, latest]                 # Original user request
+    user_intent: Annotated[str, latest]          # Classified intent (set by supervisor)
+
+    # Agent work products
+    context: Annotated[str, latest]              # Research/analysis from retriever
+    diff: Annotated[str, latest]                 # Code changes from editor
+    run_result: Annotated[Dict[str, Any], latest]  # Test results from executor (each run is complete)
+    review_result: Annotated[str, latest]        # Analysis from verifier
+
+    # Planning and coordination
+    plan: Annotated[Dict[str, Any], merge_dicts]         # High-level execution plan
+    completed_tasks: Annotated[List[str], merge_lists]   # Tasks finished by agents
+    pending_tasks: Annotated[List[str], merge_lists]     # Tasks still needed
+
+    # Flow control
+    max_iterations: Annotated[int, latest]       # Prevent infinite loops
+    iteration_count: Annotated[int, latest]      # Current iteration
+    is_complete: Annotated[bool, latest]         # Task completion flag
+
+    # Error handling and output
+    error_msg: Annotated[str, latest]            # Error details
+    response: Annotated[Optional[str], latest]   # Final response to user
+    pr_url: Annotated[Optional[str], latest]     # GitHub PR if created
+
+
+class RetrieverState(TypedDict):
+    """State seen by the retriever agent: the react-agent fields plus the packed context it writes.
     
-    # Agent work products  
-    context: str                # Research/analysis from retriever
-    diff: str                   # Code changes from editor
-    run_result: Dict[str, Any]  # Test results from executor
-    review_result: str          # Analysis from verifier
+    Like AgentState, the agent states give their fields reducers: the tool
+    calls of one model reply run as concurrent tasks that may write together.
+    """
     
-    # Planning and coordination
-    plan: Dict[str, Any]        # High-level execution plan
-    completed_tasks: List[str]  # Tasks finished by agents
-    pending_tasks: List[str]    # Tasks still needed
+    messages: Annotated[List[BaseMessage], add_messages]
+    remaining_steps: RemainingSteps
+    context: NotRequired[Annotated[str, latest]]
+
+
+class EditorState(TypedDict):
+    """State seen by the editor agent: the react-agent fields plus the cumulative diff its edit tools maintain."""
     
-    # Flow control
-    max_iterations: int         # Prevent infinite loops
-    iteration_count: int        # Current iteration
-    is_complete: bool          # Task completion flag
+    messages: Annotated[List[BaseMessage], add_messages]
+    remaining_steps: RemainingSteps
+    diff: NotRequired[Annotated[str, latest]]
+
+
+class ExecutorState(TypedDict):
+    """State seen by the executor agent.
     
-    # Error handling and output
-    error_msg: str             # Error details
-    response: Optional[str]    # Final response to user
-    pr_url: Optional[str]      # GitHub PR if created
\ No newline at end of file
+    Besides the react-agent fields it carries the editor's diff, which the test
+    tools read to decide what to run, and the structured results they write.
+    """
+    
+    messages: Annotated[List[BaseMessage], add_messages]
+    remaining_steps: RemainingSteps
+    diff: NotRequired[str]
+    run_result: NotRequired[Annotated[Dict[str, Any], latest]]
+
+
+class VerifierState(TypedDict):
+    """State seen by the verifier agent: the react-agent fields plus test results."""
+    
+    messages: Annotated[List[BaseMessage], add_messages]
+    remaining_steps: RemainingSteps
+    run_result: NotRequired[Dict[str, Any]]
@@ -0,0 +1,353 @@
+"""Span tracing for DevAgent turns: agents, model calls and tool calls.
+
+TraceRecorder is a LangChain callback handler. Passed in the run config of a
+workflow invocation, it records one span per turn, per supervisor or agent
+step, per chat model call (tokens, time to first token, model load and prompt
+processing time, total time) and per
+tool call (duration, bytes in and out). Spans are appended to a JSONL file as
+they finish, one object per line with OTLP-style field names.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from ..index.files import devagent_dir
+
+SUPERVISOR = "supervisor"
+
+# Tag of chat model runs that only delegate to another model (e.g. the model router);
+# the inner model call gets the span
+UNTRACED_TAG = "devagent:untraced"
+
+# Hot spots listed by the summary
+SUMMARY_TOP = 15
+
+
+def trace_dir(root: str) -> str:
+    """Directory holding one JSONL trace file per session (``.devagent/traces``)."""
+    directory = os.path.join(devagent_dir(os.path.abspath(root)), "traces")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def find_trace(root: str, session_id: str = "latest") -> Optional[str]:
+    """Trace file of a session, or of the most recently traced one for ``latest``."""
+    directory = trace_dir(root)
+    if session_id != "latest":
+        path = os.path.join(directory, f"{session_id}.jsonl")
+        return path if os.path.exists(path) else None
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".jsonl")]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def _agent_of(metadata: Optional[Dict[str, Any]]) -> str:
+    """Agent a run belongs to: the first component of its checkpoint namespace."""
+    ns = (metadata or {}).get("langgraph_checkpoint_ns") or (metadata or {}).get("checkpoint_ns") or ""
+    return ns.split("|", 1)[0].split(":", 1)[0] or SUPERVISOR
+
+
+def _size(value: Any) -> int:
+    """Bytes of a tool input or output as the model sees it."""
+    content = getattr(value, "content", value)
+    text = content if isinstance(content, str) else json.dumps(content, default=str)
+    return len(text.encode("utf-8", errors="replace"))
+
+
+class TraceRecorder(BaseCallbackHandler):
+    """Callback handler that appends spans to ``<directory>/<session_id>.jsonl``.
+
+    Args:
+        directory: Directory of the trace files
+        session_id: Session the spans belong to; may change between turns
+    """
+
+    def __init__(self, directory: str, session_id: str = "default"):
+        self.directory = directory
+        self.session_id = session_id
+        self._lock = threading.Lock()
+        self._spans: Dict[UUID, Dict[str, Any]] = {}
+        self._parents: Dict[UUID, Optional[UUID]] = {}
+        self._traces: Dict[UUID, str] = {}
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self.session_id}.jsonl")
+
+    # Span bookkeeping
+
+    def _trace_id(self, run_id: UUID, parent_run_id: Optional[UUID]) -> str:
+        self._parents[run_id] = parent_run_id
+        if parent_run_id is None or parent_run_id not in self._traces:
+            self._traces[run_id] = uuid.uuid4().hex
+        else:
+            self._traces[run_id] = self._traces[parent_run_id]
+        return self._traces[run_id]
+
+    def _recorded_parent(self, parent_run_id: Optional[UUID]) -> Optional[str]:
+        """Nearest ancestor that has a span (intermediate runnables are not recorded)."""
+        while parent_run_id is not None and parent_run_id not in self._spans:
+            parent_run_id = self._parents.get(parent_run_id)
+        return parent_run_id.hex[-16:] if parent_run_id is not None else None
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], kind: str, name: str,
+               agent: str, **attributes: Any) -> None:
+        with self._lock:
+            trace_id = self._trace_id(run_id, parent_run_id)
+            self._spans[run_id] = {
+                "trace_id": trace_id,
+                "span_id": run_id.hex[-16:],
+                "parent_span_id": self._recorded_parent(parent_run_id),
+                "name": name,
+                "kind": kind,
+                "start_time_unix_nano": time.time_ns(),
+                "_start": time.perf_counter(),
+                "attributes": {"session.id": self.session_id, "agent": agent,
+                               **{k: v for k, v in attributes.items() if v is not None}},
+            }
+
+    def _inside_span(self, run_id: Optional[UUID], name: str) -> bool:
+        """Whether the nearest recorded ancestor of a run is a span with this name."""
+        with self._lock:
+            while run_id is not None and run_id not in self._spans:
+                run_id = self._parents.get(run_id)
+            return run_id is not None and self._spans[run_id]["name"] == name
+
+    def _track(self, run_id: UUID, parent_run_id: Optional[UUID]) -> None:
+        """Remember a run that gets no span, so its children find their recorded ancestor."""
+        with self._lock:
+            self._trace_id(run_id, parent_run_id)
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **attributes: Any) -> None:
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+            self._parents.pop(run_id, None)
+            self._traces.pop(run_id, None)
+            if span is None:
+                return
+            span["duration_ms"] = round((time.perf_counter() - span.pop("_start")) * 1000, 2)
+            span["end_time_unix_nano"] = time.time_ns()
+            span["attributes"].update({k: v for k, v in attributes.items() if v is not None})
+            span["status"] = {"code": "ERROR", "message": str(error)[:500]} if error else {"code": "OK"}
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(span, default=str) + "\n")
+
+    # Chains: the turn itself and each supervisor/agent step
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+        metadata = metadata or {}
+        ns = metadata.get("langgraph_checkpoint_ns", "")
+        if parent_run_id is None:
+            self._start(run_id, None, "turn", name, SUPERVISOR)
+        elif name == metadata.get("langgraph_node") and "|" not in ns and name != "__start__" and not self._inside_span(
+            parent_run_id, name
+        ):
+            # The node of an agent directly wraps the agent's own graph run: one span for both
+            self._start(run_id, parent_run_id, "agent", name, _agent_of(metadata), step=metadata.get("langgraph_step"))
+        else:
+            self._track(run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, parent_run_id=None, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        self._end(run_id, error)
+
+    # Chat model calls
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, metadata=None,
+                            **kwargs):
+        if UNTRACED_TAG in (tags or []):
+            self._track(run_id, parent_run_id)
+            return
+        prompt_chars = sum(len(str(m.content)) for batch in messages for m in batch)
+        model = (metadata or {}).get("ls_model_name") or kwargs.get("name") or "chat_model"
+        self._start(run_id, parent_run_id, "llm", model, _agent_of(metadata),
+                    prompt_messages=sum(len(batch) for batch in messages), prompt_chars=prompt_chars,
+                    model_tier=(metadata or {}).get("model_tier"))
+
+    def on_llm_new_token(self, token, *, chunk=None, run_id, parent_run_id=None, **kwargs):
+        with self._lock:
+            span = self._spans.get(run_id)
+            if span is not None and "time_to_first_token_ms" not in span["attributes"]:
+                span["attributes"]["time_to_first_token_ms"] = round((time.perf_counter() - span["_start"]) * 1000, 2)
+
+    def on_llm_end(self, response, *, run_id, parent_run_id=None, **kwargs):
+        usage: Dict[str, Any] = {}
+        server: Dict[str, Any] = {}
+        text = ""
+        tool_calls: List[str] = []
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                text += generation.text or ""
+                if message is not None:
+                    usage = getattr(message, "usage_metadata", None) or usage
+                    server = getattr(message, "response_metadata", None) or server
+                    tool_calls += [call["name"] for call in getattr(message, "tool_calls", None) or []]
+        # Ollama reports how long loading the model and reading the prompt took (in ns)
+        load_ms, prompt_eval_ms = (
+            server[key] / 1e6 if server.get(key) is not None else None
+            for key in ("load_duration", "prompt_eval_duration")
+        )
+        with self._lock:
+            span = self._spans.get(run_id)
+            prompt_chars = span["attributes"].get("prompt_chars", 0) if span else 0
+            if span is not None and "time_to_first_token_ms" not in span["attributes"] and prompt_eval_ms is not None:
+                # Nothing was streamed: the server's time before its first token
+                span["attributes"]["time_to_first_token_ms"] = round((load_ms or 0.0) + prompt_eval_ms, 2)
+        estimated = not usage
+        self._end(
+            run_id,
+            prompt_tokens=usage.get("input_tokens") if usage else prompt_chars // 4,
+            completion_tokens=usage.get("output_tokens") if usage else len(text) // 4,
+            tokens_estimated=estimated,
+            tool_calls=tool_calls or None,
+            load_ms=round(load_ms, 2) if load_ms is not None else None,
+            prompt_eval_ms=round(prompt_eval_ms, 2) if prompt_eval_ms is not None else None,
+        )
+
+    def on_llm_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        self._end(run_id, error)
+
+    # Tool calls
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, tags=None, metadata=None,
+                      inputs=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self._start(run_id, parent_run_id, "tool", name, _agent_of(metadata),
+                    bytes_in=len((input_str or "").encode("utf-8", errors="replace")))
+
+    def on_tool_end(self, output, *, run_id, parent_run_id=None, **kwargs):
+        if hasattr(output, "update") and isinstance(getattr(output, "update", None), dict):
+            # Tools returning a Command: measure the messages they add
+            output = [getattr(m, "content", m) for m in output.update.get("messages", [])]
+        self._end(run_id, bytes_out=_size(output))
+
+    def on_tool_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        self._end(run_id, error)
+
+
+def read_spans(path: str) -> List[Dict[str, Any]]:
+    """Load the spans of a trace file, skipping lines cut off by a crash."""
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize_spans(spans: Iterable[Dict[str, Any]], top: int = SUMMARY_TOP) -> Dict[str, Any]:
+    """Aggregate spans into per-operation hot spots.
+
+    Returns:
+        Dictionary with turn count and wall time, per-agent totals, and the
+        operations (kind, agent, name) with the largest total time
+    """
+    turns: List[float] = []
+    agents: Dict[str, Dict[str, float]] = {}
+    operations: Dict[tuple, Dict[str, Any]] = {}
+    first_tokens: Dict[str, List[tuple]] = {}
+    for span in spans:
+        attributes = span.get("attributes", {})
+        duration = span.get("duration_ms", 0.0)
+        if span["kind"] == "turn":
+            turns.append(duration)
+            continue
+        agent = attributes.get("agent", SUPERVISOR)
+        if span["kind"] == "agent":
+            totals = agents.setdefault(agent, {"steps": 0, "ms": 0.0})
+            totals["steps"] += 1
+            totals["ms"] += duration
+            continue
+        key = (span["kind"], agent, span["name"])
+        op = operations.setdefault(key, {
+            "kind": span["kind"], "agent": agent, "name": span["name"], "count": 0, "errors": 0,
+            "durations": [], "prompt_tokens": 0, "completion_tokens": 0, "ttft": [], "bytes_out": 0,
+        })
+        op["count"] += 1
+        op["durations"].append(duration)
+        op["errors"] += span.get("status", {}).get("code") == "ERROR"
+        op["prompt_tokens"] += attributes.get("prompt_tokens", 0) or 0
+        op["completion_tokens"] += attributes.get("completion_tokens", 0) or 0
+        op["bytes_out"] += attributes.get("bytes_out", 0) or 0
+        if attributes.get("time_to_first_token_ms") is not None:
+            op["ttft"].append(attributes["time_to_first_token_ms"])
+            first_tokens.setdefault(agent, []).append(
+                (span.get("start_time_unix_nano", 0), attributes["time_to_first_token_ms"], attributes.get("load_ms") or 0.0)
+            )
+
+    hot = []
+    for op in operations.values():
+        durations = op.pop("durations")
+        ttft = op.pop("ttft")
+        op["total_ms"] = round(sum(durations), 1)
+        op["p95_ms"] = round(_percentile(durations, 0.95), 1)
+        op["mean_ttft_ms"] = round(sum(ttft) / len(ttft), 1) if ttft else None
+        hot.append(op)
+    hot.sort(key=lambda op: -op["total_ms"])
+    time_to_first_token = {}
+    for agent, calls in first_tokens.items():
+        calls.sort()
+        time_to_first_token[agent] = {
+            "calls": len(calls),
+            "first_ms": round(calls[0][1], 1),
+            "mean_ms": round(sum(call[1] for call in calls) / len(calls), 1),
+            "load_ms": round(sum(call[2] for call in calls), 1),
+        }
+    return {
+        "turns": len(turns),
+        "turn_ms": round(sum(turns), 1),
+        "agents": {name: {"steps": t["steps"], "ms": round(t["ms"], 1)} for name, t in agents.items()},
+        "time_to_first_token": time_to_first_token,
+        "hot_spots": hot[:top],
+    }
+
+
+def format_trace_summary(summary: Dict[str, Any]) -> str:
+    """Render a trace summary as a plain-text table."""
+    lines = [f"{summary['turns']} turns, {summary['turn_ms'] / 1000:.1f}s total"]
+    if summary["agents"]:
+        lines.append("Time per agent:")
+        for name, totals in sorted(summary["agents"].items(), key=lambda item: -item[1]["ms"]):
+            lines.append(f"  {name:<12} {totals['ms'] / 1000:8.2f}s  {totals['steps']:>4} steps")
+    if summary.get("time_to_first_token"):
+        # The first call of each agent shows a cold start; load time is spent reloading models
+        lines.append("Time to first token per agent:")
+        for name, ttft in sorted(summary["time_to_first_token"].items()):
+            lines.append(
+                f"  {name:<12} {ttft['mean_ms']:8.0f} ms mean  {ttft['first_ms']:8.0f} ms first  "
+                f"{ttft['load_ms']:8.0f} ms loading  {ttft['calls']:>4} calls"
+            )
+    lines.append("Hot spots:")
+    lines.append(f"  {'kind':<5} {'agent':<11} {'name':<28} {'calls':>5} {'total s':>8} {'p95 ms':>8}  detail")
+    for op in summary["hot_spots"]:
+        if op["kind"] == "llm":
+            detail = f"{op['prompt_tokens']} prompt / {op['completion_tokens']} completion tokens"
+            if op["mean_ttft_ms"] is not None:
+                detail += f", ttft {op['mean_ttft_ms']:.0f} ms"
+        else:
+            detail = f"{op['bytes_out']} bytes out"
+        if op["errors"]:
+            detail += f", {op['errors']} errors"
+        lines.append(
+            f"  {op['kind']:<5} {op['agent']:<11} {op['name'][:28]:<28} {op['count']:>5} "
+            f"{op['total_ms'] / 1000:>8.2f} {op['p95_ms']:>8.0f}  {detail}"
+        )
+    return "\n".join(lines)
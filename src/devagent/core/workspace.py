@@ -0,0 +1,37 @@
+"""Working directory the tools operate on, per run instead of per process.
+
+Tools resolve relative paths against the workspace root. By default that is
+the process working directory; ``use_workspace`` overrides it for the current
+context only, so graphs working on different checkouts can run side by side in
+one process (LangGraph copies the context into the threads that run tools).
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_workspace: ContextVar[Optional[str]] = ContextVar("devagent_workspace", default=None)
+
+
+def workspace_root() -> str:
+    """Absolute path of the directory tools operate on."""
+    return _workspace.get() or os.getcwd()
+
+
+def resolve_path(path: str) -> str:
+    """Resolve a tool path argument against the workspace root."""
+    return os.path.normpath(os.path.join(workspace_root(), os.path.expanduser(path)))
+
+
+@contextmanager
+def use_workspace(root: Optional[str]) -> Iterator[None]:
+    """Run the enclosed code with tools operating on ``root`` (no change when None)."""
+    if root is None:
+        yield
+        return
+    token = _workspace.set(os.path.abspath(root))
+    try:
+        yield
+    finally:
+        _workspace.reset(token)
@@ -0,0 +1,17 @@
+"""Repository indexing for DevAgent retrieval."""
+
+from .files import iter_repo_files, is_binary_file, devagent_dir
+from .repo_index import RepoIndex, close_repo_index, get_repo_index
+from .semantic import SemanticIndex, close_semantic_index, get_semantic_index
+
+__all__ = [
+    "iter_repo_files",
+    "is_binary_file",
+    "devagent_dir",
+    "RepoIndex",
+    "get_repo_index",
+    "close_repo_index",
+    "SemanticIndex",
+    "get_semantic_index",
+    "close_semantic_index"
+]
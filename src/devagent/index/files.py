@@ -0,0 +1,133 @@
+"""Filesystem helpers shared by the repository index and search tools."""
+
+import fnmatch
+import os
+import subprocess
+from typing import Iterator, List, Optional
+
+# Directories that are never worth indexing or searching
+SKIP_DIRS = {
+    ".git", ".hg", ".svn", ".devagent", "__pycache__", "node_modules",
+    ".venv", "venv", ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache",
+    "htmlcov", "dist", "build",
+}
+
+# Directory (relative to the repository root) where DevAgent keeps its own data
+DEVAGENT_DIR = ".devagent"
+
+_BINARY_SNIFF_BYTES = 8192
+
+
+def devagent_dir(root: str) -> str:
+    """Return the DevAgent data directory for a repository, creating it if needed.
+
+    The directory gets its own ``.gitignore`` so index and cache files never show
+    up as untracked changes in the user's repository.
+    """
+    path = os.path.join(root, DEVAGENT_DIR)
+    os.makedirs(path, exist_ok=True)
+    gitignore = os.path.join(path, ".gitignore")
+    if not os.path.exists(gitignore):
+        with open(gitignore, "w", encoding="utf-8") as f:
+            f.write("*\n")
+    return path
+
+
+def is_binary_file(path: str) -> bool:
+    """Heuristically detect binary files by looking for NUL bytes in the first block."""
+    try:
+        with open(path, "rb") as f:
+            return b"\0" in f.read(_BINARY_SNIFF_BYTES)
+    except OSError:
+        return True
+
+
+def _git_ls_files(root: str) -> Optional[List[str]]:
+    """List tracked and untracked-but-not-ignored files using git, if available."""
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=root,
+            capture_output=True,
+            timeout=60,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    paths = result.stdout.decode("utf-8", errors="surrogateescape").split("\0")
+    return [p for p in paths if p]
+
+
+def _load_gitignore(root: str) -> List[str]:
+    """Read the top-level .gitignore patterns for repositories without git."""
+    patterns = []
+    try:
+        with open(os.path.join(root, ".gitignore"), "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#") and not line.startswith("!"):
+                    patterns.append(line)
+    except OSError:
+        pass
+    return patterns
+
+
+def _is_ignored(rel_path: str, patterns: List[str]) -> bool:
+    """Check a relative path against simple gitignore-style patterns."""
+    name = os.path.basename(rel_path)
+    for pattern in patterns:
+        anchored = pattern.startswith("/")
+        pattern = pattern.strip("/")
+        if anchored:
+            if fnmatch.fnmatch(rel_path, pattern) or rel_path.startswith(pattern + "/"):
+                return True
+        elif fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(rel_path, pattern):
+            return True
+        elif f"/{pattern}/" in f"/{rel_path}":
+            return True
+    return False
+
+
+def _walk_files(root: str) -> Iterator[str]:
+    """Walk the tree without git, honouring SKIP_DIRS and the top-level .gitignore."""
+    patterns = _load_gitignore(root)
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root)
+        rel_dir = "" if rel_dir == "." else rel_dir
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in SKIP_DIRS and not _is_ignored(os.path.join(rel_dir, d), patterns)
+        )
+        for filename in sorted(filenames):
+            rel_path = os.path.join(rel_dir, filename)
+            if not _is_ignored(rel_path, patterns):
+                yield rel_path
+
+
+def in_skipped_dir(rel_path: str) -> bool:
+    """Whether a repository-relative path lies under one of SKIP_DIRS."""
+    return any(part in SKIP_DIRS for part in rel_path.replace(os.sep, "/").split("/")[:-1])
+
+
+def iter_repo_files(root: str) -> Iterator[str]:
+    """Yield repository-relative paths of files that are not ignored.
+
+    Uses ``git ls-files`` when the root is inside a git work tree (so every
+    .gitignore rule is respected) and falls back to a filtered directory walk.
+
+    Args:
+        root: Repository root directory
+
+    Returns:
+        Iterator of relative file paths using ``/`` separators
+    """
+    paths = _git_ls_files(root)
+    if paths is None:
+        paths = _walk_files(root)
+    for rel_path in paths:
+        rel_path = rel_path.replace(os.sep, "/")
+        if in_skipped_dir(rel_path):
+            continue
+        if os.path.isfile(os.path.join(root, rel_path)):
+            yield rel_path
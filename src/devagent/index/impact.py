@@ -0,0 +1,304 @@
+"""Map changed files to the tests that exercise them.
+
+Tests are selected from a Python import graph (a test is affected when it
+imports a changed module, directly or transitively) and, when the project
+has a coverage database recorded with per-test contexts
+(``pytest --cov --cov-context=test``), from the tests that executed the
+changed files.
+"""
+
+import ast
+import os
+import re
+import subprocess
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .files import iter_repo_files
+
+# Changes to these files at the repository root can affect any test, so they
+# trigger the full suite (a nested conftest.py only affects the tests below it)
+FULL_SUITE_TRIGGERS = {
+    "conftest.py", "pytest.ini", "tox.ini", "setup.cfg", "setup.py",
+    "pyproject.toml", "requirements.txt", "requirements-dev.txt",
+}
+
+# Documentation that tests do not read; other non-Python files (fixtures,
+# templates, SQL) may be read by any test
+DOC_EXTENSIONS = {".md", ".rst"}
+
+_DIFF_PATH = re.compile(r"^(?:\+\+\+|---) (?:[ab]/)?(.+?)\s*$", re.MULTILINE)
+
+
+def is_test_file(rel_path: str) -> bool:
+    """Whether a path looks like a pytest test module."""
+    name = os.path.basename(rel_path)
+    return name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+def paths_from_diff(diff: str) -> List[str]:
+    """Paths touched by a unified diff (both sides of renames)."""
+    paths = []
+    for path in _DIFF_PATH.findall(diff or ""):
+        if path != "/dev/null" and path not in paths:
+            paths.append(path)
+    return paths
+
+
+def git_changed_files(root: str) -> Optional[List[str]]:
+    """Files changed in the working tree relative to HEAD, plus untracked files.
+
+    Returns:
+        Relative paths, or None when the directory is not a git checkout
+    """
+    def git(*args: str) -> Optional[List[str]]:
+        try:
+            result = subprocess.run(["git", *args], cwd=root, capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        return [line for line in result.stdout.splitlines() if line]
+
+    changed = git("diff", "--name-only", "--relative", "HEAD")
+    if changed is None:
+        return None
+    untracked = git("ls-files", "--others", "--exclude-standard") or []
+    return list(dict.fromkeys(changed + untracked))
+
+
+@dataclass
+class TestSelection:
+    """Tests chosen for a set of changed files.
+
+    Attributes:
+        changed: Changed paths the selection was computed from
+        tests: Affected test files, relative to the root
+        full_suite: True when the impact could not be narrowed down
+        reason: Human-readable explanation of the selection
+    """
+
+    __test__ = False  # not a pytest test class
+
+    changed: List[str]
+    tests: List[str] = field(default_factory=list)
+    full_suite: bool = False
+    reason: str = ""
+
+
+class ImportGraph:
+    """Import graph over the Python files of a repository, refreshed incrementally.
+
+    Args:
+        root: Repository root
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._imports: Dict[str, Tuple[int, Set[str]]] = {}  # path -> (mtime_ns, imported modules)
+        self._modules: Dict[str, str] = {}                   # dotted module -> path
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _module_name(rel_path: str, packages: Set[str]) -> str:
+        """Dotted module name, counting only enclosing directories that are packages."""
+        parts = rel_path[:-3].split("/")
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+            start = len(parts)
+        else:
+            start = len(parts) - 1
+        while start > 0 and "/".join(parts[:start]) in packages:
+            start -= 1
+        return ".".join(parts[start:])
+
+    @staticmethod
+    def _parse_imports(source: str, module: str, is_package: bool) -> Set[str]:
+        try:
+            tree = ast.parse(source)
+        except (SyntaxError, ValueError):
+            return set()
+        package = module if is_package else module.rpartition(".")[0]
+        names: Set[str] = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                if node.level:
+                    base_parts = package.split(".") if package else []
+                    base_parts = base_parts[:len(base_parts) - (node.level - 1)] if node.level > 1 else base_parts
+                    base = ".".join(base_parts + ([node.module] if node.module else []))
+                else:
+                    base = node.module or ""
+                if base:
+                    names.add(base)
+                names.update(f"{base}.{alias.name}" if base else alias.name for alias in node.names)
+        # Importing a.b.c also runs a/__init__ and a/b/__init__
+        for name in list(names):
+            parts = name.split(".")
+            names.update(".".join(parts[:i]) for i in range(1, len(parts)))
+        return names
+
+    def refresh(self) -> None:
+        """Re-parse Python files whose modification time changed."""
+        with self._lock:
+            paths = [p for p in iter_repo_files(self.root) if p.endswith(".py")]
+            packages = {os.path.dirname(p) for p in paths if os.path.basename(p) == "__init__.py"}
+            modules: Dict[str, str] = {}
+            imports: Dict[str, Tuple[int, Set[str]]] = {}
+            for rel in paths:
+                module = self._module_name(rel, packages)
+                modules[module] = rel
+                full = os.path.join(self.root, rel)
+                try:
+                    mtime = os.stat(full).st_mtime_ns
+                except OSError:
+                    continue
+                cached = self._imports.get(rel)
+                if cached and cached[0] == mtime:
+                    imports[rel] = cached
+                    continue
+                try:
+                    with open(full, "r", encoding="utf-8", errors="replace") as f:
+                        source = f.read()
+                except OSError:
+                    continue
+                imports[rel] = (mtime, self._parse_imports(source, module, rel.endswith("__init__.py")))
+            self._modules = modules
+            self._imports = imports
+
+    def dependents(self, paths: Iterable[str]) -> Set[str]:
+        """Every file that imports any of ``paths``, directly or transitively (including them)."""
+        with self._lock:
+            reverse: Dict[str, Set[str]] = {}
+            for importer, (_mtime, names) in self._imports.items():
+                for name in names:
+                    target = self._modules.get(name)
+                    if target and target != importer:
+                        reverse.setdefault(target, set()).add(importer)
+        seen = set(paths)
+        queue = deque(seen)
+        while queue:
+            for importer in reverse.get(queue.popleft(), ()):
+                if importer not in seen:
+                    seen.add(importer)
+                    queue.append(importer)
+        return seen
+
+    def test_files(self) -> List[str]:
+        with self._lock:
+            return sorted(p for p in self._imports if is_test_file(p))
+
+
+def coverage_test_files(root: str, changed: Iterable[str]) -> Set[str]:
+    """Test files that executed any changed file, from a .coverage database with test contexts."""
+    data_file = os.path.join(root, ".coverage")
+    if not os.path.exists(data_file):
+        return set()
+    try:
+        from coverage import CoverageData
+    except ImportError:
+        return set()
+    wanted = {os.path.normpath(os.path.join(root, path)) for path in changed}
+    tests: Set[str] = set()
+    try:
+        data = CoverageData(basename=data_file)
+        data.read()
+        for measured in data.measured_files():
+            if os.path.normpath(measured) not in wanted:
+                continue
+            for contexts in data.contexts_by_lineno(measured).values():
+                for context in contexts:
+                    test_path = context.split("::", 1)[0]
+                    if "::" in context and is_test_file(test_path):
+                        tests.add(test_path)
+    except Exception:
+        return set()
+    return tests
+
+
+_graphs: Dict[str, ImportGraph] = {}
+_graphs_lock = threading.Lock()
+
+
+def get_import_graph(root: str) -> ImportGraph:
+    """Get the shared import graph for a repository root."""
+    root = os.path.abspath(root)
+    with _graphs_lock:
+        if root not in _graphs:
+            _graphs[root] = ImportGraph(root)
+        return _graphs[root]
+
+
+def close_import_graph(root: str) -> None:
+    """Forget the shared import graph of a repository root that is going away."""
+    with _graphs_lock:
+        _graphs.pop(os.path.abspath(root), None)
+
+
+def select_tests(root: str, changed: Optional[List[str]] = None, diff: str = "") -> TestSelection:
+    """Pick the tests affected by a change.
+
+    Args:
+        root: Repository root
+        changed: Changed paths relative to the root; taken from ``diff`` and git when omitted
+        diff: Unified diff to read changed paths from
+
+    Returns:
+        TestSelection; full_suite is set when the change cannot be narrowed down
+    """
+    if not changed:
+        # The diff only holds the edit tools' changes; files written with
+        # write_file_tool or bash show up in git
+        from_diff = paths_from_diff(diff) if diff else []
+        from_git = git_changed_files(root)
+        if from_git is None and not from_diff:
+            return TestSelection(changed=[], full_suite=True, reason="no diff given and not a git checkout")
+        changed = list(dict.fromkeys(from_diff + (from_git or [])))
+    if not changed:
+        return TestSelection(changed=[], reason="no changed files")
+
+    triggers = [path for path in changed if path in FULL_SUITE_TRIGGERS]
+    if triggers:
+        return TestSelection(changed=changed, full_suite=True,
+                             reason=f"{', '.join(triggers)} can affect every test")
+
+    # A deleted module is gone from the import graph along with its importers' edges
+    deleted = [
+        path for path in changed
+        if path.endswith(".py") and not is_test_file(path) and os.path.basename(path) != "conftest.py"
+        and not os.path.exists(os.path.join(root, path))
+    ]
+    if deleted:
+        return TestSelection(changed=changed, full_suite=True,
+                             reason=f"{', '.join(deleted)} deleted; the tests that imported it are unknown")
+    unmapped = [
+        path for path in changed
+        if not path.endswith(".py") and os.path.splitext(path)[1].lower() not in DOC_EXTENSIONS
+        and not coverage_test_files(root, [path])
+    ]
+    if unmapped:
+        return TestSelection(changed=changed, full_suite=True,
+                             reason=f"{', '.join(unmapped)} may be read by any test and no coverage data maps it")
+
+    graph = get_import_graph(root)
+    graph.refresh()
+    python_changes = [path for path in changed if path.endswith(".py")]
+    affected = graph.dependents(python_changes)
+    tests = {path for path in affected if is_test_file(path)}
+    tests |= coverage_test_files(root, changed)
+    for conftest in (path for path in changed if os.path.basename(path) == "conftest.py"):
+        directory = os.path.dirname(conftest) + "/"
+        tests |= {path for path in graph.test_files() if path.startswith(directory)}
+    tests = {path for path in tests if os.path.exists(os.path.join(root, path))}
+
+    if not tests:
+        reason = "no tests import the changed files" if python_changes else "only documentation changed"
+        return TestSelection(changed=changed, reason=reason)
+    return TestSelection(
+        changed=changed,
+        tests=sorted(tests),
+        reason=f"{len(tests)} of {len(graph.test_files())} test files depend on the change",
+    )
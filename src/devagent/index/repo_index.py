@@ -0,0 +1,531 @@
+"""Persistent, incrementally updated repository index backed by SQLite."""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .files import devagent_dir, in_skipped_dir, iter_repo_files
+from .symbols import python_symbols
+
+SCHEMA_VERSION = 2
+
+# Files larger than this are tracked as metadata only (no chunks or symbols)
+MAX_INDEXED_BYTES = 1_000_000
+
+# Number of lines per content chunk
+CHUNK_LINES = 60
+
+LANGUAGES = {
+    ".py": "python", ".pyi": "python",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript",
+    ".go": "go", ".rs": "rust", ".java": "java", ".rb": "ruby",
+    ".c": "c", ".h": "c", ".cc": "cpp", ".cpp": "cpp", ".hpp": "cpp",
+    ".md": "markdown", ".rst": "rst", ".txt": "text",
+    ".json": "json", ".yaml": "yaml", ".yml": "yaml", ".toml": "toml",
+    ".sh": "shell", ".sql": "sql", ".html": "html", ".css": "css",
+}
+
+# Lightweight definition patterns for languages without an AST parser here
+_REGEX_SYMBOLS = {
+    "javascript": [
+        ("function", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(\w+)")),
+        ("class", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?class\s+(\w+)")),
+    ],
+    "typescript": [
+        ("function", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(\w+)")),
+        ("class", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(\w+)")),
+        ("interface", re.compile(r"^\s*(?:export\s+)?interface\s+(\w+)")),
+    ],
+    "go": [
+        ("function", re.compile(r"^func\s+(?:\([^)]*\)\s*)?(\w+)")),
+        ("type", re.compile(r"^type\s+(\w+)")),
+    ],
+    "rust": [
+        ("function", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?fn\s+(\w+)")),
+        ("type", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait)\s+(\w+)")),
+    ],
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha1 TEXT NOT NULL,
+    language TEXT,
+    line_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    parent TEXT,
+    line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    signature TEXT
+);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols(name);
+CREATE INDEX IF NOT EXISTS symbols_path ON symbols(path);
+CREATE TABLE IF NOT EXISTS refs (
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    kind TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS refs_name ON refs(name);
+CREATE INDEX IF NOT EXISTS refs_path ON refs(path);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT NOT NULL,
+    module TEXT NOT NULL,
+    name TEXT,
+    alias TEXT,
+    line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS imports_path ON imports(path);
+CREATE TABLE IF NOT EXISTS bases (
+    path TEXT NOT NULL,
+    class TEXT NOT NULL,
+    base TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bases_base ON bases(base);
+CREATE INDEX IF NOT EXISTS bases_path ON bases(path);
+"""
+
+# Per-file tables cleared whenever a file is re-indexed or removed
+_FILE_TABLES = ("symbols", "refs", "imports", "bases", "chunks")
+
+_FTS_CHUNKS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5("
+    "path UNINDEXED, start_line UNINDEXED, end_line UNINDEXED, text)"
+)
+_PLAIN_CHUNKS = (
+    "CREATE TABLE IF NOT EXISTS chunks ("
+    "path TEXT NOT NULL, start_line INTEGER, end_line INTEGER, text TEXT)"
+)
+
+
+def _regex_symbols(language: str, lines: List[str]) -> List[Tuple[str, str, Optional[str], int, int, str]]:
+    """Extract definitions with simple per-line regexes."""
+    symbols = []
+    for lineno, line in enumerate(lines, 1):
+        for kind, pattern in _REGEX_SYMBOLS.get(language, []):
+            match = pattern.match(line)
+            if match:
+                symbols.append((match.group(1), kind, None, lineno, lineno, line.strip()[:200]))
+                break
+    return symbols
+
+
+def _fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query that ORs quoted terms."""
+    terms = re.findall(r"\w+", query)
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class RepoIndex:
+    """On-disk index of file metadata, symbol definitions and content chunks.
+
+    The index lives in ``.devagent/index.sqlite`` under the repository root and is
+    refreshed incrementally: unchanged files are detected by size and mtime (and
+    by content hash when the mtime moved), and inside a git work tree only the
+    paths reported by ``git diff``/``git ls-files`` since the last refresh are
+    re-examined.
+    """
+
+    def __init__(self, root: str, db_path: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        self.db_path = db_path or os.path.join(devagent_dir(self.root), "index.sqlite")
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._has_fts = True
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._lock, self._conn:
+            version = None
+            try:
+                row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+                version = int(row["value"]) if row else None
+            except sqlite3.OperationalError:
+                pass
+            if version is not None and version != SCHEMA_VERSION:
+                for table in ("meta", "files") + _FILE_TABLES:
+                    self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._conn.executescript(_SCHEMA)
+            try:
+                self._conn.execute(_FTS_CHUNKS)
+            except sqlite3.OperationalError:
+                self._has_fts = False
+                self._conn.execute(_PLAIN_CHUNKS)
+            self._set_meta("schema_version", str(SCHEMA_VERSION))
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Metadata helpers
+    # ------------------------------------------------------------------
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def _git(self, *args: str) -> Optional[str]:
+        try:
+            result = subprocess.run(
+                ["git", *args], cwd=self.root, capture_output=True, timeout=60
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode("utf-8", errors="surrogateescape")
+
+    # ------------------------------------------------------------------
+    # Updating
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> Dict[str, int]:
+        """Bring the index up to date, narrowing the work with git when possible.
+
+        Returns:
+            Counts of added, updated, removed and unchanged files
+        """
+        with self._lock:
+            last_head = self._get_meta("git_head")
+            head = self._git("rev-parse", "HEAD")
+            if last_head and head:
+                changed = self._git_changed_paths(last_head)
+                if changed is not None:
+                    return self._update(changed, head.strip(), full_scan=False)
+            return self._update(iter_repo_files(self.root), head.strip() if head else None, full_scan=True)
+
+    def rebuild(self) -> Dict[str, int]:
+        """Re-scan the whole tree, re-checking every file against the index."""
+        with self._lock:
+            head = self._git("rev-parse", "HEAD")
+            return self._update(iter_repo_files(self.root), head.strip() if head else None, full_scan=True)
+
+    def _git_changed_paths(self, last_head: str) -> Optional[Set[str]]:
+        """Paths that may differ from what was indexed at ``last_head``.
+
+        Like iter_repo_files, paths are relative to the index root (which may be
+        a subdirectory of the repository) and exclude SKIP_DIRS.
+        """
+        changed = self._git_paths(last_head)
+        if changed is None:
+            return None
+        # Files that were dirty at the last refresh may since have been reverted
+        changed.update(json.loads(self._get_meta("dirty_paths") or "[]"))
+        return changed
+
+    def _git_paths(self, base: str) -> Optional[Set[str]]:
+        """Files differing from ``base`` plus untracked ones, relative to the index root."""
+        # Without --relative, git diff names paths from the repository top
+        diff = self._git("diff", "--name-only", "--relative", "-z", base)
+        untracked = self._git("ls-files", "-z", "--others", "--exclude-standard")
+        if diff is None or untracked is None:
+            return None
+        return {p for p in (diff + untracked).split("\0") if p and not in_skipped_dir(p)}
+
+    def _update(self, paths: Iterable[str], head: Optional[str], full_scan: bool) -> Dict[str, int]:
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        known = {
+            row["path"]: row
+            for row in self._conn.execute("SELECT path, size, mtime_ns, sha1 FROM files")
+        }
+        seen = set()
+        with self._conn:
+            for rel_path in paths:
+                rel_path = rel_path.replace(os.sep, "/")
+                seen.add(rel_path)
+                full_path = os.path.join(self.root, rel_path)
+                try:
+                    st = os.stat(full_path)
+                except OSError:
+                    if rel_path in known:
+                        self._delete(rel_path)
+                        stats["removed"] += 1
+                    continue
+                row = known.get(rel_path)
+                if row and row["size"] == st.st_size and row["mtime_ns"] == st.st_mtime_ns:
+                    stats["unchanged"] += 1
+                    continue
+                try:
+                    with open(full_path, "rb") as f:
+                        data = f.read()
+                except OSError:
+                    continue
+                sha1 = hashlib.sha1(data).hexdigest()
+                if row and row["sha1"] == sha1:
+                    self._conn.execute(
+                        "UPDATE files SET mtime_ns = ? WHERE path = ?", (st.st_mtime_ns, rel_path)
+                    )
+                    stats["unchanged"] += 1
+                    continue
+                self._index_file(rel_path, data, st, sha1)
+                stats["updated" if row else "added"] += 1
+
+            if full_scan:
+                for rel_path in set(known) - seen:
+                    self._delete(rel_path)
+                    stats["removed"] += 1
+
+            if head:
+                self._set_meta("git_head", head)
+                self._set_meta("dirty_paths", json.dumps(sorted(self._git_paths("HEAD") or ())))
+            self._set_meta("refreshed_at", str(time.time()))
+        return stats
+
+    def _delete(self, rel_path: str) -> None:
+        self._conn.execute("DELETE FROM files WHERE path = ?", (rel_path,))
+        for table in _FILE_TABLES:
+            self._conn.execute(f"DELETE FROM {table} WHERE path = ?", (rel_path,))
+
+    def _index_file(self, rel_path: str, data: bytes, st: os.stat_result, sha1: str) -> None:
+        language = LANGUAGES.get(os.path.splitext(rel_path)[1].lower())
+        for table in _FILE_TABLES:
+            self._conn.execute(f"DELETE FROM {table} WHERE path = ?", (rel_path,))
+
+        text = None
+        if len(data) <= MAX_INDEXED_BYTES and b"\0" not in data[:8192]:
+            text = data.decode("utf-8", errors="replace")
+        lines = text.splitlines() if text is not None else []
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha1, language, line_count) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (rel_path, st.st_size, st.st_mtime_ns, sha1, language, len(lines)),
+        )
+        if text is None:
+            return
+
+        if language == "python":
+            extracted = python_symbols(text)
+            symbols = extracted.definitions
+            self._conn.executemany(
+                "INSERT INTO refs (path, name, line, col, kind) VALUES (?, ?, ?, ?, ?)",
+                [(rel_path, *ref) for ref in extracted.references],
+            )
+            self._conn.executemany(
+                "INSERT INTO imports (path, module, name, alias, line) VALUES (?, ?, ?, ?, ?)",
+                [(rel_path, *imp) for imp in extracted.imports],
+            )
+            self._conn.executemany(
+                "INSERT INTO bases (path, class, base, line) VALUES (?, ?, ?, ?)",
+                [(rel_path, *base) for base in extracted.bases],
+            )
+        else:
+            symbols = _regex_symbols(language or "", lines)
+        self._conn.executemany(
+            "INSERT INTO symbols (path, name, kind, parent, line, end_line, signature) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(rel_path, *symbol) for symbol in symbols],
+        )
+
+        self._conn.executemany(
+            "INSERT INTO chunks (path, start_line, end_line, text) VALUES (?, ?, ?, ?)",
+            [
+                (rel_path, start + 1, min(start + CHUNK_LINES, len(lines)),
+                 "\n".join(lines[start:start + CHUNK_LINES]))
+                for start in range(0, len(lines), CHUNK_LINES)
+            ],
+        )
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def find_files(self, pattern: str, limit: int = 200) -> List[str]:
+        """Find indexed files whose path matches a glob pattern."""
+        glob_pattern = pattern.replace("**/", "*").replace("/**", "/*")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM files WHERE path GLOB ? OR path GLOB ? ORDER BY path LIMIT ?",
+                (glob_pattern, f"*/{glob_pattern}", limit),
+            ).fetchall()
+        return [row["path"] for row in rows]
+
+    def find_symbols(self, name: str, kind: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Find symbol definitions by exact name, falling back to a prefix match."""
+        query = "SELECT path, name, kind, parent, line, end_line FROM symbols WHERE name {op} ?"
+        params: List[Any] = []
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        query += " ORDER BY path, line LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query.format(op="="), [name, *params, limit]).fetchall()
+            if not rows:
+                rows = self._conn.execute(query.format(op="LIKE"), [f"{name}%", *params, limit]).fetchall()
+        return [dict(row) for row in rows]
+
+    def find_definitions(self, name: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Find definitions by exact name; ``Class.method`` restricts the parent."""
+        parent, _, short = name.rpartition(".")
+        query = "SELECT path, name, kind, parent, line, end_line, signature FROM symbols WHERE name = ?"
+        params: List[Any] = [short]
+        if parent:
+            query += " AND (parent = ? OR parent LIKE ?)"
+            params += [parent, f"%.{parent}"]
+        query += " ORDER BY kind = 'constant', path, line LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, [*params, limit]).fetchall()
+        return [dict(row) for row in rows]
+
+    def find_references(self, name: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Find uses of a name (as a bare name or an attribute) in indexed Python files."""
+        short = name.rpartition(".")[2]
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, name, line, col, kind FROM refs WHERE name = ? "
+                "UNION ALL SELECT path, name, line, 0, 'import' FROM imports WHERE name = ? "
+                "ORDER BY path, line, col LIMIT ?",
+                (short, short, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def file_outline(self, rel_path: str) -> Dict[str, Any]:
+        """Definitions (with signatures), imports and class bases of one file."""
+        rel_path = rel_path.replace(os.sep, "/")
+        with self._lock:
+            symbols = self._conn.execute(
+                "SELECT name, kind, parent, line, end_line, signature FROM symbols WHERE path = ? ORDER BY line",
+                (rel_path,),
+            ).fetchall()
+            imports = self._conn.execute(
+                "SELECT module, name, alias, line FROM imports WHERE path = ? ORDER BY line", (rel_path,)
+            ).fetchall()
+            bases = self._conn.execute(
+                "SELECT class, base FROM bases WHERE path = ? ORDER BY line", (rel_path,)
+            ).fetchall()
+        class_bases: Dict[str, List[str]] = {}
+        for row in bases:
+            class_bases.setdefault(row["class"], []).append(row["base"])
+        return {
+            "path": rel_path,
+            "symbols": [dict(row) for row in symbols],
+            "imports": [dict(row) for row in imports],
+            "bases": class_bases,
+        }
+
+    def subclasses(self, name: str) -> List[Dict[str, Any]]:
+        """Classes that list ``name`` (or ``something.name``) among their bases."""
+        short = name.rpartition(".")[2]
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, class, base, line FROM bases WHERE base = ? OR base LIKE ? ORDER BY path, line",
+                (short, f"%.{short}"),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def file_symbols(self, rel_path: str) -> List[Dict[str, Any]]:
+        """List the symbol definitions recorded for one file."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, name, kind, parent, line, end_line FROM symbols WHERE path = ? ORDER BY line",
+                (rel_path.replace(os.sep, "/"),),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def file_hashes(self) -> Dict[str, str]:
+        """Content hash of every indexed file, keyed by path."""
+        with self._lock:
+            return {row["path"]: row["sha1"] for row in self._conn.execute("SELECT path, sha1 FROM files")}
+
+    def file_chunks(self, rel_path: str) -> List[Dict[str, Any]]:
+        """Content chunks of one file, in order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, start_line, end_line, text FROM chunks WHERE path = ? ORDER BY start_line",
+                (rel_path,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search_chunks(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Full-text search over content chunks, best matches first."""
+        with self._lock:
+            if self._has_fts:
+                fts_query = _fts_query(query)
+                if not fts_query:
+                    return []
+                rows = self._conn.execute(
+                    "SELECT path, start_line, end_line, text FROM chunks WHERE chunks MATCH ? "
+                    "ORDER BY bm25(chunks) LIMIT ?",
+                    (fts_query, limit),
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT path, start_line, end_line, text FROM chunks WHERE text LIKE ? LIMIT ?",
+                    (f"%{query}%", limit),
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def overview(self, max_dirs: int = 30) -> Dict[str, Any]:
+        """Summarize the indexed tree: file counts per language and per top-level directory."""
+        with self._lock:
+            total = self._conn.execute(
+                "SELECT COUNT(*) AS n, COALESCE(SUM(size), 0) AS bytes FROM files"
+            ).fetchone()
+            languages = self._conn.execute(
+                "SELECT COALESCE(language, 'other') AS language, COUNT(*) AS n FROM files "
+                "GROUP BY language ORDER BY n DESC"
+            ).fetchall()
+            paths = [row["path"] for row in self._conn.execute("SELECT path FROM files")]
+
+        directories: Dict[str, int] = {}
+        for path in paths:
+            top = path.split("/", 1)[0] if "/" in path else "."
+            directories[top] = directories.get(top, 0) + 1
+        top_dirs = sorted(directories.items(), key=lambda item: (-item[1], item[0]))[:max_dirs]
+
+        return {
+            "files": total["n"],
+            "bytes": total["bytes"],
+            "languages": {row["language"]: row["n"] for row in languages},
+            "directories": dict(top_dirs),
+            "root_files": sorted(p for p in paths if "/" not in p),
+        }
+
+
+_indexes: Dict[str, RepoIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_repo_index(root: str = ".") -> RepoIndex:
+    """Get the shared RepoIndex instance for a repository root."""
+    key = os.path.abspath(root)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = RepoIndex(key)
+        return _indexes[key]
+
+
+def close_repo_index(root: str) -> None:
+    """Close and forget the shared index of a repository root that is going away."""
+    with _indexes_lock:
+        index = _indexes.pop(os.path.abspath(root), None)
+    if index is not None:
+        index.close()
@@ -0,0 +1,295 @@
+"""Local embedding-based semantic search over repository chunks.
+
+Chunks come from the RepoIndex (so they are only re-embedded when a file's
+content hash changes). Vectors are stored in ``.devagent/semantic.sqlite`` and
+searched with FAISS when it is installed, otherwise with NumPy. Embeddings are
+computed locally: with a cached sentence-transformers model when available,
+otherwise with a hashing embedder over identifier sub-tokens, so queries never
+touch the network.
+"""
+
+import hashlib
+import math
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .files import devagent_dir
+from .repo_index import LANGUAGES, RepoIndex, get_repo_index
+
+# sentence-transformers model used when it is installed and cached locally
+DEFAULT_MODEL = os.environ.get("DEVAGENT_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# Dimension of the hashing embedder
+HASHING_DIM = 1024
+
+# Chunks embedded per batch, and the batch count above which hashing uses worker processes
+EMBED_BATCH_SIZE = 256
+PARALLEL_MIN_BATCHES = 4
+
+# Only these file types are embedded
+EMBEDDED_LANGUAGES = {
+    "python", "javascript", "typescript", "go", "rust", "java", "ruby", "c", "cpp",
+    "markdown", "rst", "text", "shell", "sql", "yaml", "toml",
+}
+
+_SUBTOKEN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def _stem(token: str) -> str:
+    """Crude suffix stripping so retry/retries/retrying share a feature."""
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("es", ""), ("s", "")):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)] + replacement
+    return token
+
+
+def code_tokens(text: str) -> List[str]:
+    """Split text into lower-case, stemmed identifier sub-tokens (camelCase and snake_case aware)."""
+    tokens = []
+    for word in re.findall(r"[A-Za-z0-9_]+", text):
+        parts = [p.lower() for p in _SUBTOKEN.findall(word)]
+        tokens.extend(_stem(p) for p in parts if len(p) > 1)
+    return tokens
+
+
+class HashingEmbedder:
+    """Dependency-free embedder: signed feature hashing of sub-tokens and sub-token bigrams.
+
+    Args:
+        dim: Vector dimension
+    """
+
+    def __init__(self, dim: int = HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _bucket(self, feature: str) -> tuple:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if value >> 63 else -1.0
+
+    def embed_one(self, text: str) -> np.ndarray:
+        tokens = code_tokens(text)
+        features = Counter(tokens)
+        features.update(f"{a}_{b}" for a, b in zip(tokens, tokens[1:]))
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in features.items():
+            index, sign = self._bucket(feature)
+            vector[index] += sign * (1.0 + math.log(count))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self.embed_one(text) for text in texts])
+
+
+class SentenceTransformerEmbedder:
+    """CPU sentence-transformers embedder loaded from the local model cache only.
+
+    Args:
+        model_name: Model name or local path
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu", local_files_only=True)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        # torch already spreads each batch over all cores
+        return self.model.encode(
+            texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False
+        ).astype(np.float32)
+
+
+def get_embedder():
+    """Pick the embedder: DEVAGENT_EMBEDDER=hashing forces the built-in one.
+
+    Falls back to hashing when sentence-transformers or the model is not available locally.
+    """
+    if os.environ.get("DEVAGENT_EMBEDDER", "") != "hashing":
+        try:
+            return SentenceTransformerEmbedder()
+        except Exception:
+            pass
+    return HashingEmbedder()
+
+
+def _hash_embed_batch(args: tuple) -> np.ndarray:
+    dim, texts = args
+    return HashingEmbedder(dim).embed(texts)
+
+
+def embed_texts(embedder: Any, texts: List[str]) -> np.ndarray:
+    """Embed texts in batches, using a process per core for the pure-Python hashing embedder."""
+    batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+    workers = os.cpu_count() or 1
+    if isinstance(embedder, HashingEmbedder) and workers > 1 and len(batches) >= PARALLEL_MIN_BATCHES:
+        # Spawned, not forked: this runs on a tool thread while other threads
+        # hold locks (sandbox readers, HTTP pools) that a forked child would inherit
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            parts = list(pool.map(_hash_embed_batch, [(embedder.dim, batch) for batch in batches]))
+    else:
+        parts = [embedder.embed(batch) for batch in batches]
+    if not parts:
+        return np.zeros((0, embedder.dim), dtype=np.float32)
+    return np.concatenate(parts).astype(np.float32)
+
+
+class SemanticIndex:
+    """Vector index over RepoIndex chunks, persisted next to the repository.
+
+    Args:
+        repo_index: Index providing file hashes and chunks
+        embedder: Embedder with ``name``, ``dim`` and ``embed(texts)``; chosen automatically when omitted
+        db_path: SQLite file for the vectors (defaults to ``.devagent/semantic.sqlite``)
+    """
+
+    def __init__(self, repo_index: RepoIndex, embedder: Any = None, db_path: Optional[str] = None):
+        self.repo_index = repo_index
+        self.root = repo_index.root
+        self.embedder = embedder or get_embedder()
+        self.db_path = db_path or os.path.join(devagent_dir(self.root), "semantic.sqlite")
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._matrix: Optional[np.ndarray] = None
+        self._rows: List[tuple] = []
+        self._faiss = None
+        with self._conn:
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+                "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, sha1 TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS vectors ("
+                "path TEXT NOT NULL, start_line INTEGER, end_line INTEGER, vector BLOB NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS vectors_path ON vectors(path);"
+            )
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'embedder'").fetchone()
+            if row is None or row[0] != self.embedder.name:
+                # Vectors from another model are not comparable
+                self._conn.execute("DELETE FROM files")
+                self._conn.execute("DELETE FROM vectors")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('embedder', ?)", (self.embedder.name,)
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def refresh(self) -> Dict[str, int]:
+        """Re-embed the chunks of files whose content hash changed since the last refresh.
+
+        The RepoIndex is expected to be refreshed by the caller.
+
+        Returns:
+            Counts of embedded files, embedded chunks and removed files
+        """
+        with self._lock:
+            current = {
+                path: sha1 for path, sha1 in self.repo_index.file_hashes().items()
+                if LANGUAGES.get(os.path.splitext(path)[1].lower()) in EMBEDDED_LANGUAGES
+            }
+            known = dict(self._conn.execute("SELECT path, sha1 FROM files").fetchall())
+            changed = [path for path, sha1 in current.items() if known.get(path) != sha1]
+            removed = [path for path in known if path not in current]
+
+            chunks = [chunk for path in changed for chunk in self.repo_index.file_chunks(path)]
+            # The path is part of the embedded text: file names carry a lot of meaning
+            vectors = embed_texts(self.embedder, [f"{c['path']}\n{c['text']}" for c in chunks])
+
+            with self._conn:
+                for path in changed + removed:
+                    self._conn.execute("DELETE FROM vectors WHERE path = ?", (path,))
+                    self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                self._conn.executemany(
+                    "INSERT INTO vectors (path, start_line, end_line, vector) VALUES (?, ?, ?, ?)",
+                    [
+                        (c["path"], c["start_line"], c["end_line"], vector.tobytes())
+                        for c, vector in zip(chunks, vectors)
+                    ],
+                )
+                self._conn.executemany(
+                    "INSERT INTO files (path, sha1) VALUES (?, ?)", [(path, current[path]) for path in changed]
+                )
+            if changed or removed:
+                self._matrix = None
+            return {"files": len(changed), "chunks": len(chunks), "removed": len(removed)}
+
+    def _load(self) -> None:
+        """Load all vectors into memory (and a FAISS index when available)."""
+        rows = self._conn.execute("SELECT path, start_line, end_line, vector FROM vectors").fetchall()
+        self._rows = [row[:3] for row in rows]
+        if rows:
+            self._matrix = np.stack([np.frombuffer(row[3], dtype=np.float32) for row in rows])
+        else:
+            self._matrix = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._faiss = None
+        try:
+            import faiss
+
+            self._faiss = faiss.IndexFlatIP(self._matrix.shape[1])
+            self._faiss.add(self._matrix)
+        except ImportError:
+            pass
+
+    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Return the k chunks most similar to the query.
+
+        Returns:
+            Dictionaries with path, start_line, end_line and score (cosine similarity)
+        """
+        with self._lock:
+            if self._matrix is None:
+                self._load()
+            if not self._rows:
+                return []
+            query_vector = embed_texts(self.embedder, [query])[0]
+            k = min(k, len(self._rows))
+            if self._faiss is not None:
+                scores, indices = self._faiss.search(query_vector[None, :], k)
+                ranked = list(zip(indices[0], scores[0]))
+            else:
+                scores = self._matrix @ query_vector
+                top = np.argpartition(-scores, k - 1)[:k]
+                ranked = sorted(((i, scores[i]) for i in top), key=lambda item: -item[1])
+            return [
+                {"path": self._rows[i][0], "start_line": self._rows[i][1], "end_line": self._rows[i][2],
+                 "score": round(float(score), 4)}
+                for i, score in ranked
+            ]
+
+
+_semantic_indexes: Dict[str, SemanticIndex] = {}
+_semantic_lock = threading.Lock()
+
+
+def get_semantic_index(root: str = ".") -> SemanticIndex:
+    """Get the shared SemanticIndex for a repository root."""
+    key = os.path.abspath(root)
+    with _semantic_lock:
+        if key not in _semantic_indexes:
+            _semantic_indexes[key] = SemanticIndex(get_repo_index(key))
+        return _semantic_indexes[key]
+
+
+def close_semantic_index(root: str) -> None:
+    """Close and forget the shared SemanticIndex of a repository root that is going away.
+
+    The RepoIndex it reads from stays open; close it with close_repo_index.
+    """
+    with _semantic_lock:
+        index = _semantic_indexes.pop(os.path.abspath(root), None)
+    if index is not None:
+        index.close()
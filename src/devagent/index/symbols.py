@@ -0,0 +1,134 @@
+"""Python symbol extraction: definitions, references, imports and class bases."""
+
+import ast
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+
+@dataclass
+class FileSymbols:
+    """Symbols extracted from one source file.
+
+    Attributes:
+        definitions: (name, kind, parent, line, end_line, signature) tuples
+        references: (name, line, col, kind) tuples; kind is "call" or "read"
+        imports: (module, name, alias, line) tuples; name is None for ``import x``
+        bases: (class qualified name, base expression, line) tuples
+    """
+
+    definitions: List[Tuple[str, str, Optional[str], int, int, str]] = field(default_factory=list)
+    references: List[Tuple[str, int, int, str]] = field(default_factory=list)
+    imports: List[Tuple[str, Optional[str], Optional[str], int]] = field(default_factory=list)
+    bases: List[Tuple[str, str, int]] = field(default_factory=list)
+
+
+def _signature(node: ast.AST, lines: List[str]) -> str:
+    """The header line(s) of a definition, up to the colon."""
+    start = node.lineno - 1
+    body_start = node.body[0].lineno - 1 if getattr(node, "body", None) else start
+    header = lines[start:max(body_start, start + 1)]
+    return " ".join(line.strip() for line in header)[:200]
+
+
+class _Collector(ast.NodeVisitor):
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.result = FileSymbols()
+        self.scope: List[str] = []
+        self.class_depth = 0
+        self._call_funcs = set()
+
+    def _parent(self) -> Optional[str]:
+        return ".".join(self.scope) if self.scope else None
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        parent = self._parent()
+        self.result.definitions.append(
+            (node.name, "class", parent, node.lineno, node.end_lineno or node.lineno, _signature(node, self.lines))
+        )
+        qualname = f"{parent}.{node.name}" if parent else node.name
+        for base in node.bases:
+            self.result.bases.append((qualname, ast.unparse(base), node.lineno))
+        for expr in node.bases + node.keywords + node.decorator_list:
+            self.visit(expr)
+        self.scope.append(node.name)
+        self.class_depth += 1
+        for child in node.body:
+            self.visit(child)
+        self.class_depth -= 1
+        self.scope.pop()
+
+    def _visit_function(self, node) -> None:
+        parent = self._parent()
+        kind = "method" if self.class_depth and self.scope else "function"
+        self.result.definitions.append(
+            (node.name, kind, parent, node.lineno, node.end_lineno or node.lineno, _signature(node, self.lines))
+        )
+        for expr in node.decorator_list + [node.args] + ([node.returns] if node.returns else []):
+            self.visit(expr)
+        self.scope.append(node.name)
+        depth, self.class_depth = self.class_depth, 0
+        for child in node.body:
+            self.visit(child)
+        self.class_depth = depth
+        self.scope.pop()
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def _visit_assign_targets(self, node: ast.AST, targets: List[ast.AST]) -> None:
+        if not self.scope:
+            for target in targets:
+                if isinstance(target, ast.Name) and target.id.isupper():
+                    self.result.definitions.append(
+                        (target.id, "constant", None, node.lineno, node.end_lineno or node.lineno,
+                         self.lines[node.lineno - 1].strip()[:200])
+                    )
+        self.generic_visit(node)
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        self._visit_assign_targets(node, node.targets)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
+        self._visit_assign_targets(node, [node.target])
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.result.imports.append((alias.name, None, alias.asname, node.lineno))
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        module = "." * node.level + (node.module or "")
+        for alias in node.names:
+            self.result.imports.append((module, alias.name, alias.asname, node.lineno))
+
+    def visit_Call(self, node: ast.Call) -> None:
+        self._call_funcs.add(id(node.func))
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            kind = "call" if id(node) in self._call_funcs else "read"
+            self.result.references.append((node.id, node.lineno, node.col_offset, kind))
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if isinstance(node.ctx, ast.Load):
+            kind = "call" if id(node) in self._call_funcs else "read"
+            # Point at the attribute name itself, after the dot
+            end_col = node.end_col_offset or 0
+            col = max(end_col - len(node.attr), 0) if node.end_lineno == node.lineno else node.col_offset
+            self.result.references.append((node.attr, node.end_lineno or node.lineno, col, kind))
+        self.visit(node.value)
+
+
+def python_symbols(source: str) -> FileSymbols:
+    """Extract definitions, references, imports and class bases from Python source.
+
+    Returns an empty FileSymbols when the source does not parse.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return FileSymbols()
+    collector = _Collector(source.splitlines())
+    collector.visit(tree)
+    return collector.result
@@ -3,9 +3,21 @@
 from .core_tools import (
     read_file_tool,
     write_file_tool, 
+    edit_file_tool,
+    apply_patch_tool,
     glob_tool,
     bash_tool,
     grep_tool,
+    repo_overview_tool,
+    find_files_tool,
+    find_symbol_tool,
+    search_index_tool,
+    find_definition_tool,
+    find_references_tool,
+    outline_file_tool,
+    semantic_search_tool,
+    gather_context_tool,
+    run_affected_tests_tool,
     RETRIEVER_TOOLS,
     EDITOR_TOOLS,
     EXECUTOR_TOOLS,
@@ -16,9 +28,21 @@ from .core_tools import (
 __all__ = [
     "read_file_tool",
     "write_file_tool",
+    "edit_file_tool",
+    "apply_patch_tool",
     "glob_tool", 
     "bash_tool",
     "grep_tool",
+    "repo_overview_tool",
+    "find_files_tool",
+    "find_symbol_tool",
+    "search_index_tool",
+    "find_definition_tool",
+    "find_references_tool",
+    "outline_file_tool",
+    "semantic_search_tool",
+    "gather_context_tool",
+    "run_affected_tests_tool",
     "RETRIEVER_TOOLS",
     "EDITOR_TOOLS", 
     "EXECUTOR_TOOLS",
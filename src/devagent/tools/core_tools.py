@@ -1,12 +1,24 @@
 """Core tools for DevAgent specialist agents."""
 
-import subprocess
 import glob
 import os
 import logging
+import mmap
 from typing import Dict, Any, List
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
+from ..core.workspace import resolve_path, workspace_root
+from .sandbox import DEFAULT_TIMEOUT, get_sandbox_pool, session_key
+from .search import search_files
+from .index_tools import (
+    repo_overview_tool, find_files_tool, find_symbol_tool, search_index_tool,
+    find_definition_tool, find_references_tool, outline_file_tool, semantic_search_tool,
+)
+from .editing import edit_file_tool, apply_patch_tool
+from .retrieval import gather_context_tool
+from .testing import run_affected_tests_tool
+
 # Set up basic logging for tools to stdout
 logger = logging.getLogger("devagent.tools")
 if not logger.handlers:
@@ -16,22 +28,119 @@ if not logger.handlers:
     logger.setLevel(logging.INFO)
 
 
+# Per-call budget for read_file_tool output (roughly 8k tokens)
+READ_MAX_BYTES = 32_000
+READ_MAX_LINES = 2000
+
+# Files larger than this are paged through mmap instead of buffered reads
+READ_MMAP_THRESHOLD = 1_000_000
+
+# Longest timeout an agent may ask bash_tool for, and output lines echoed to the log
+BASH_MAX_TIMEOUT = 1800
+BASH_LOG_LINES = 20
+
+
+def _read_file_window(file_path: str, offset: int, limit: int, max_bytes: int) -> Dict[str, Any]:
+    """Read a window of lines from a file without loading the rest of it.
+    
+    Returns:
+        Dictionary with text, first_line, last_line, has_more, total_lines (None when
+        the file was paged through mmap and not counted) and line_truncated
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        source = f
+        mm = None
+        if size > READ_MMAP_THRESHOLD:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            source = mm
+        try:
+            readline = source.readline
+            line_number = 0
+            while line_number < offset - 1 and readline():
+                line_number += 1
+            
+            chunks: List[bytes] = []
+            used = 0
+            line_truncated = False
+            while len(chunks) < limit:
+                raw = readline()
+                if not raw:
+                    break
+                if used + len(raw) > max_bytes:
+                    if not chunks:
+                        # A single oversized line (minified code): show its head only
+                        chunks.append(raw[:max_bytes])
+                        line_truncated = True
+                    else:
+                        source.seek(source.tell() - len(raw))
+                    break
+                chunks.append(raw)
+                used += len(raw)
+            
+            first_line = line_number + 1
+            last_line = line_number + len(chunks)
+            has_more = bool(readline())
+            total_lines = None
+            if mm is None:
+                total_lines = last_line + (1 + sum(1 for _ in f) if has_more else 0)
+        finally:
+            if mm is not None:
+                mm.close()
+    
+    return {
+        "text": b"".join(chunks).decode('utf-8', errors='replace'),
+        "first_line": first_line,
+        "last_line": last_line,
+        "has_more": has_more or line_truncated,
+        "total_lines": total_lines,
+        "line_truncated": line_truncated,
+    }
+
+
 @tool
-def read_file_tool(file_path: str) -> str:
-    """Read contents of a file.
+def read_file_tool(file_path: str, offset: int = 1, limit: int = READ_MAX_LINES, max_bytes: int = READ_MAX_BYTES) -> str:
+    """Read a file, or a window of its lines for large files.
+    
+    Output is capped at max_bytes per call. When the file does not fit, a
+    truncation marker at the end says which offset to pass to read the next page.
     
     Args:
         file_path: Path to the file to read
+        offset: 1-based line number to start reading from
+        limit: Maximum number of lines to return
+        max_bytes: Maximum number of bytes to return in this call
         
     Returns:
-        File contents as string
+        File contents (or the requested window) as string
     """
-    logger.info(f"📖 READ_FILE: {file_path}")
+    logger.info(f"📖 READ_FILE: {file_path}" + (f" (from line {offset})" if offset > 1 else ""))
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            logger.info(f"✅ READ_FILE: Success ({len(content)} chars)")
-            return content
+        offset = max(1, offset)
+        limit = max(1, min(limit, READ_MAX_LINES))
+        max_bytes = max(1, min(max_bytes, READ_MAX_BYTES))
+        window = _read_file_window(resolve_path(file_path), offset, limit, max_bytes)
+        content = window["text"]
+        
+        if window["has_more"] or offset > 1:
+            total_lines = window["total_lines"]
+            total = f" of {total_lines}" if total_lines is not None else ""
+            if window["last_line"] < window["first_line"]:
+                count = total_lines if total_lines is not None else "fewer"
+                marker = f"[No lines at offset {offset}; the file has {count} lines]"
+            else:
+                marker = f"[Showing lines {window['first_line']}-{window['last_line']}{total}"
+                if window["line_truncated"]:
+                    marker += f"; line {window['last_line']} was cut at {max_bytes} bytes"
+                if window["has_more"] and not window["line_truncated"]:
+                    marker += f"; call read_file_tool with offset={window['last_line'] + 1} to continue"
+                marker += "]"
+            if content and not content.endswith("\n"):
+                content += "\n"
+            content += marker
+        
+        logger.info(f"✅ READ_FILE: Success ({len(content)} chars)")
+        return content
     except Exception as e:
         error_msg = f"Error reading file {file_path}: {str(e)}"
         logger.error(f"❌ READ_FILE: {error_msg}")
@@ -51,8 +160,9 @@ def write_file_tool(file_path: str, content: str) -> str:
     """
     logger.info(f"✍️ WRITE_FILE: {file_path} ({len(content)} chars)")
     try:
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, 'w', encoding='utf-8') as f:
+        full_path = resolve_path(file_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w', encoding='utf-8') as f:
             f.write(content)
         success_msg = f"Successfully wrote to {file_path}"
         logger.info(f"✅ WRITE_FILE: {success_msg}")
@@ -77,9 +187,9 @@ def glob_tool(pattern: str, recursive: bool = True) -> List[str]:
     logger.info(f"🔍 GLOB: {pattern} (recursive={recursive})")
     try:
         if recursive:
-            files = glob.glob(pattern, recursive=True)
+            files = glob.glob(pattern, root_dir=workspace_root(), recursive=True)
         else:
-            files = glob.glob(pattern)
+            files = glob.glob(pattern, root_dir=workspace_root())
         sorted_files = sorted(files)
         logger.info(f"✅ GLOB: Found {len(sorted_files)} files")
         return sorted_files
@@ -90,50 +200,41 @@ def glob_tool(pattern: str, recursive: bool = True) -> List[str]:
 
 
 @tool
-def bash_tool(command: str) -> Dict[str, Any]:
+def bash_tool(command: str, timeout: int = DEFAULT_TIMEOUT, config: RunnableConfig = None) -> Dict[str, Any]:
     """Execute a bash command.
     
+    Commands run in a persistent shell session leased to the calling agent, so
+    the working directory, exported variables and activated virtualenvs carry
+    over to the agent's next command (a command that times out is killed with
+    its session, so the next one starts fresh). Long output is cut to its head and tail;
+    the full output is saved to a file named in the result (stdout_file /
+    stderr_file) that can be paged through with read_file_tool.
+    
     Args:
         command: The bash command to execute
+        timeout: Seconds before the command is killed (raise it for long test suites)
         
     Returns:
         Dictionary with stdout, stderr, and return_code
     """
     logger.info(f"💻 BASH: {command}")
+    timeout = max(1, min(timeout, BASH_MAX_TIMEOUT))
     try:
-        result = subprocess.run(
-            command, 
-            shell=True, 
-            capture_output=True, 
-            text=True,
-            timeout=30  # 30 second timeout
-        )
-        result_dict = {
-            "stdout": result.stdout,
-            "stderr": result.stderr, 
-            "return_code": result.returncode,
-            "success": result.returncode == 0
-        }
+        result = get_sandbox_pool().run(command, key=session_key(config), timeout=timeout)
+        if result.pop("timed_out"):
+            result["stderr"] += f"\nCommand '{command}' timed out after {timeout} seconds"
+            logger.error(f"❌ BASH: Timeout - {command}")
+            return result
         
-        if result.returncode == 0:
-            output_preview = result.stdout.strip()[:100] + "..." if len(result.stdout.strip()) > 100 else result.stdout.strip()
+        if result["success"]:
             logger.info("✅ BASH: Success")
             logger.info("```")
-            logger.info(result.stdout)
+            logger.info(_log_preview(result["stdout"]))
             logger.info("```")
         else:
-            logger.error(f"❌ BASH: Failed (code {result.returncode}) - {result.stderr.strip()[:100]}")
+            logger.error(f"❌ BASH: Failed (code {result['return_code']}) - {result['stderr'].strip()[:100]}")
             
-        return result_dict
-    except subprocess.TimeoutExpired:
-        error_result = {
-            "stdout": "",
-            "stderr": f"Command '{command}' timed out after 30 seconds",
-            "return_code": -1,
-            "success": False
-        }
-        logger.error(f"❌ BASH: Timeout - {command}")
-        return error_result
+        return result
     except Exception as e:
         error_result = {
             "stdout": "",
@@ -145,39 +246,82 @@ def bash_tool(command: str) -> Dict[str, Any]:
         return error_result
 
 
+def _log_preview(output: str) -> str:
+    """First lines of command output for the log."""
+    lines = output.rstrip("\n").splitlines()
+    if len(lines) <= BASH_LOG_LINES:
+        return "\n".join(lines)
+    return "\n".join(lines[:BASH_LOG_LINES] + [f"... ({len(lines) - BASH_LOG_LINES} more lines)"])
+
+
 @tool
-def grep_tool(pattern: str, file_path: str) -> List[str]:
-    """Search for pattern in a file.
+def grep_tool(
+    pattern: str,
+    path: str = ".",
+    glob: str = "",
+    ignore_case: bool = False,
+    context_lines: int = 2,
+    max_results: int = 50,
+) -> List[str]:
+    """Search for a regex pattern across a file or a whole directory tree.
+    
+    Files ignored by .gitignore and binary files are skipped. Matches are ranked
+    (definitions first) and capped.
     
     Args:
         pattern: Search pattern/regex
-        file_path: Path to file to search in
+        path: File or directory to search in (defaults to the current directory)
+        glob: Optional glob limiting which files are searched (e.g., "**/*.py")
+        ignore_case: Whether to ignore case when matching
+        context_lines: Number of context lines to show around each match
+        max_results: Maximum number of matches to return
         
     Returns:
-        List of matching lines
+        List of matches formatted as "path:line: text" with context lines
     """
-    logger.info(f"🔎 GREP: '{pattern}' in {file_path}")
+    logger.info(f"🔎 GREP: '{pattern}' in {path}" + (f" ({glob})" if glob else ""))
     try:
-        import re
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        if os.path.isfile(resolve_path(path)):
+            root, paths = os.path.dirname(path) or ".", [os.path.basename(path)]
+        else:
+            root, paths = path, None
+        result = search_files(
+            pattern,
+            root=resolve_path(root),
+            paths=paths,
+            glob=glob or None,
+            ignore_case=ignore_case,
+            context_lines=max(0, context_lines),
+            max_results=max_results,
+        )
         
         matches = []
-        for i, line in enumerate(lines, 1):
-            if re.search(pattern, line):
-                matches.append(f"{i}: {line.rstrip()}")
-        
-        logger.info(f"✅ GREP: Found {len(matches)} matches")
+        for match in result.matches:
+            match.path = os.path.normpath(os.path.join(root, match.path))
+            matches.append(match.format())
+        if result.truncated:
+            matches.append(
+                f"... {result.total_matches - len(result.matches)} more matches omitted; "
+                f"narrow the pattern, path or glob"
+            )
+        logger.info(
+            f"✅ GREP: Found {result.total_matches} matches in {result.files_matched} of "
+            f"{result.files_searched} files"
+        )
         return matches
     except Exception as e:
-        error_msg = f"Error searching in {file_path}: {str(e)}"
+        error_msg = f"Error searching in {path}: {str(e)}"
         logger.error(f"❌ GREP: {error_msg}")
         return [error_msg]
 
 
 # Tool collections for different agent types
-RETRIEVER_TOOLS = [read_file_tool, glob_tool, grep_tool, bash_tool]
-EDITOR_TOOLS = [read_file_tool, write_file_tool, bash_tool]
-EXECUTOR_TOOLS = [bash_tool, read_file_tool]
+RETRIEVER_TOOLS = [
+    gather_context_tool, repo_overview_tool, find_files_tool, find_symbol_tool, search_index_tool,
+    find_definition_tool, find_references_tool, outline_file_tool, semantic_search_tool,
+    read_file_tool, glob_tool, grep_tool, bash_tool
+]
+EDITOR_TOOLS = [read_file_tool, edit_file_tool, apply_patch_tool, write_file_tool, bash_tool]
+EXECUTOR_TOOLS = [run_affected_tests_tool, bash_tool, read_file_tool]
 VERIFIER_TOOLS = [read_file_tool, bash_tool]
 PR_BOT_TOOLS = [bash_tool, read_file_tool]
\ No newline at end of file
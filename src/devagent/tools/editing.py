@@ -0,0 +1,431 @@
+"""Diff-based editing tools for the editor agent.
+
+Edits are exact search/replace operations or unified diffs. Both are validated
+against the current file content and applied atomically: every file is written
+to a temporary file and renamed into place, and a multi-file patch is rolled
+back if any file fails. Each edit also updates the cumulative diff of the
+session in ``AgentState["diff"]`` (one section per file, relative to the
+content before the first edit).
+"""
+
+import difflib
+import logging
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from typing import Annotated, Dict, List, Optional, Tuple
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import InjectedToolCallId, tool
+from langgraph.prebuilt import InjectedState
+from langgraph.types import Command
+
+from ..core.workspace import workspace_root
+
+logger = logging.getLogger("devagent.tools")
+
+# Hunks may be found this many lines away from the position in their header
+MAX_HUNK_OFFSET = 1000
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_NO_NEWLINE = "\\ No newline at end of file"
+
+
+class PatchError(ValueError):
+    """An edit does not apply to the current file content."""
+
+
+@dataclass
+class Hunk:
+    """One hunk of a unified diff; lines keep their ' ', '-' or '+' prefix."""
+
+    old_start: int
+    new_start: int
+    lines: List[str] = field(default_factory=list)
+
+    def old_lines(self) -> List[str]:
+        return [line[1:] for line in self.lines if line[0] in " -"]
+
+    def new_lines(self) -> List[str]:
+        return [line[1:] for line in self.lines if line[0] in " +"]
+
+    def reversed(self) -> "Hunk":
+        swap = {"-": "+", "+": "-", " ": " "}
+        return Hunk(self.new_start, self.old_start, [swap[line[0]] + line[1:] for line in self.lines])
+
+
+@dataclass
+class FilePatch:
+    """The hunks for one file; a path of None means /dev/null (file created or deleted)."""
+
+    old_path: Optional[str]
+    new_path: Optional[str]
+    hunks: List[Hunk] = field(default_factory=list)
+
+    @property
+    def path(self) -> str:
+        return self.new_path or self.old_path or ""
+
+    def reversed(self) -> "FilePatch":
+        return FilePatch(self.new_path, self.old_path, [hunk.reversed() for hunk in self.hunks])
+
+
+def _diff_path(header: str) -> Optional[str]:
+    path = header[4:].split("\t", 1)[0].strip()
+    if path == "/dev/null":
+        return None
+    return path[2:] if path[:2] in ("a/", "b/") else path
+
+
+def parse_unified_diff(patch: str) -> List[FilePatch]:
+    """Parse a (possibly multi-file) unified diff.
+
+    Hunk line counts are honoured when the header has them; blank lines inside a
+    hunk are read as empty context lines, which models often emit without the
+    leading space.
+
+    Raises:
+        PatchError: When the text has no file headers or a hunk is malformed
+    """
+    lines = patch.splitlines()
+    patches: List[FilePatch] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+            patches.append(FilePatch(_diff_path(line), _diff_path(lines[i + 1])))
+            i += 2
+            continue
+        if line.startswith("@@"):
+            if not patches:
+                raise PatchError("Hunk found before any '--- a/path' / '+++ b/path' file header")
+            match = _HUNK_HEADER.match(line)
+            old_start, old_count, new_count = 0, None, None
+            if match:
+                old_start = int(match.group(1))
+                old_count = int(match.group(2)) if match.group(2) is not None else 1
+                new_count = int(match.group(4)) if match.group(4) is not None else 1
+            hunk = Hunk(old_start, int(match.group(3)) if match else 0)
+            seen_old = seen_new = 0
+            i += 1
+            while i < len(lines):
+                body = lines[i]
+                if old_count is not None:
+                    if seen_old >= old_count and seen_new >= new_count:
+                        break
+                elif body.startswith("@@") or (body.startswith("--- ") and i + 1 < len(lines)
+                                               and lines[i + 1].startswith("+++ ")):
+                    break
+                if body.startswith("\\"):
+                    i += 1
+                    continue
+                if body == "":
+                    body = " "
+                if body[0] not in " -+":
+                    if old_count is None:
+                        break
+                    raise PatchError(f"Malformed hunk line {i + 1}: {body[:80]!r}")
+                hunk.lines.append(body)
+                seen_old += body[0] in " -"
+                seen_new += body[0] in " +"
+                i += 1
+            patches[-1].hunks.append(hunk)
+            continue
+        i += 1
+    if not patches:
+        raise PatchError("No file headers found; expected '--- a/path' and '+++ b/path' lines")
+    return patches
+
+
+def _find_block(lines: List[str], block: List[str], expected: int, start: int) -> int:
+    """Index where ``block`` occurs in ``lines`` at or after ``start``, closest to ``expected``."""
+    stripped = [line.rstrip("\r\n") for line in lines]
+    last = len(lines) - len(block)
+    for offset in range(MAX_HUNK_OFFSET + 1):
+        for position in (expected - offset, expected + offset) if offset else (expected,):
+            if start <= position <= last and stripped[position:position + len(block)] == block:
+                return position
+    return -1
+
+
+def apply_hunks(text: str, hunks: List[Hunk], path: str = "") -> str:
+    """Apply hunks to text, checking every context and removed line.
+
+    Raises:
+        PatchError: When a hunk's old lines are not found in the file
+    """
+    lines = text.splitlines(keepends=True)
+    eol = "\r\n" if "\r\n" in text else "\n"
+    ends_with_newline = text.endswith("\n") or not text
+    result: List[str] = []
+    cursor = 0
+    for number, hunk in enumerate(hunks, 1):
+        old = hunk.old_lines()
+        expected = max(hunk.old_start - 1, 0) if old else hunk.old_start
+        position = _find_block(lines, old, expected, cursor) if old else min(max(expected, cursor), len(lines))
+        if position < 0:
+            preview = "\n".join(old[:5])
+            raise PatchError(f"Hunk {number} does not match the current content of {path}; expected:\n{preview}")
+        result.extend(lines[cursor:position])
+        result.extend(line + eol for line in hunk.new_lines())
+        cursor = position + len(old)
+    result.extend(lines[cursor:])
+    new_text = "".join(result)
+    if not ends_with_newline and cursor >= len(lines) and new_text.endswith(eol):
+        new_text = new_text[:-len(eol)]
+    return new_text
+
+
+def replace_in_text(text: str, old: str, new: str, replace_all: bool = False) -> str:
+    """Replace an exact substring, which must occur exactly once unless ``replace_all``.
+
+    Raises:
+        PatchError: When the text is missing or ambiguous
+    """
+    count = text.count(old)
+    if count == 0:
+        hint = ""
+        first = next((line.strip() for line in old.splitlines() if line.strip()), "")
+        if first:
+            close = [i + 1 for i, line in enumerate(text.splitlines()) if line.strip() == first]
+            if close:
+                hint = f" (a line matching '{first[:60]}' is at line {close[0]}; check the whitespace around it)"
+        raise PatchError(f"old_string was not found{hint}")
+    if count > 1 and not replace_all:
+        raise PatchError(f"old_string occurs {count} times; add surrounding lines to make it unique or set replace_all")
+    return text.replace(old, new)
+
+
+def make_diff(path: str, before: Optional[str], after: Optional[str]) -> str:
+    """Unified diff between two versions of a file (None means the file does not exist)."""
+    def split(text: Optional[str]) -> List[str]:
+        lines = (text or "").splitlines(keepends=True)
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n" + _NO_NEWLINE + "\n"
+        return lines
+
+    from_file = f"a/{path}" if before is not None else "/dev/null"
+    to_file = f"b/{path}" if after is not None else "/dev/null"
+    return "".join(difflib.unified_diff(split(before), split(after), from_file, to_file))
+
+
+def split_diff(diff: str) -> Dict[str, str]:
+    """Split a multi-file diff into sections keyed by file path, in order."""
+    sections: Dict[str, str] = {}
+    lines = diff.splitlines(keepends=True)
+    starts = [
+        i for i, line in enumerate(lines)
+        if line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ ")
+    ]
+    for start, end in zip(starts, starts[1:] + [len(lines)]):
+        path = _diff_path(lines[start + 1].rstrip("\n")) or _diff_path(lines[start].rstrip("\n")) or ""
+        sections[path] = sections.get(path, "") + "".join(lines[start:end])
+    return sections
+
+
+def update_cumulative_diff(cumulative: str, path: str, before: Optional[str], after: Optional[str]) -> str:
+    """Fold one file change into the session diff, keeping a single section per file.
+
+    The file's original content is recovered by reverse-applying its current
+    section; if the file was changed behind the diff's back (for example by a
+    shell command) the new change is appended to the section instead.
+    """
+    sections = split_diff(cumulative)
+    original = before
+    previous = sections.get(path)
+    if previous:
+        try:
+            file_patch = parse_unified_diff(previous)[0]
+            if file_patch.old_path is None:
+                original = None
+            elif before is not None:
+                original = apply_hunks(before, file_patch.reversed().hunks, path)
+            else:
+                raise PatchError("deleted file was recreated")
+        except PatchError:
+            sections[path] = previous + make_diff(path, before, after)
+            return "".join(sections.values())
+    section = make_diff(path, original, after)
+    if section:
+        sections[path] = section
+    else:
+        sections.pop(path, None)
+    return "".join(sections.values())
+
+
+def _resolve(root: str, rel_path: str) -> str:
+    """Absolute path of a file inside the repository."""
+    full = os.path.normpath(os.path.join(root, rel_path))
+    if os.path.commonpath([root, full]) != root:
+        raise PatchError(f"{rel_path} is outside the repository")
+    return full
+
+
+def _read(full_path: str) -> Optional[str]:
+    if not os.path.exists(full_path):
+        return None
+    with open(full_path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def _write_atomic(full_path: str, content: Optional[str]) -> None:
+    """Replace a file in one rename (or delete it when content is None)."""
+    if content is None:
+        if os.path.exists(full_path):
+            os.unlink(full_path)
+        return
+    directory = os.path.dirname(full_path)
+    os.makedirs(directory, exist_ok=True)
+    mode = os.stat(full_path).st_mode & 0o7777 if os.path.exists(full_path) else None
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".devagent-edit-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, full_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_changes(root: str, changes: List[Tuple[str, Optional[str], Optional[str]]]) -> None:
+    """Write (path, before, after) changes atomically, restoring every file if one write fails."""
+    written = []
+    try:
+        for rel_path, before, after in changes:
+            _write_atomic(_resolve(root, rel_path), after)
+            written.append((rel_path, before))
+    except OSError:
+        for rel_path, before in reversed(written):
+            _write_atomic(_resolve(root, rel_path), before)
+        raise
+
+
+def _line_counts(diff: str) -> Tuple[int, int]:
+    added = sum(1 for l in diff.splitlines() if l.startswith("+") and not l.startswith("+++"))
+    removed = sum(1 for l in diff.splitlines() if l.startswith("-") and not l.startswith("---"))
+    return added, removed
+
+
+def _edit_result(
+    tool_name: str,
+    tool_call_id: str,
+    state: Optional[dict],
+    changes: List[Tuple[str, Optional[str], Optional[str]]],
+) -> Command:
+    """Record applied changes in the cumulative diff and report this edit's own diff."""
+    cumulative = (state or {}).get("diff", "") or ""
+    edit_diffs = []
+    for rel_path, before, after in changes:
+        cumulative = update_cumulative_diff(cumulative, rel_path, before, after)
+        edit_diffs.append(make_diff(rel_path, before, after))
+    edit_diff = "".join(edit_diffs)
+    added, removed = _line_counts(edit_diff)
+    files = ", ".join(path for path, _before, _after in changes)
+    logger.info(f"✅ {tool_name.removesuffix('_tool').upper()}: {files} (+{added} -{removed})")
+    content = f"Applied to {files} (+{added} -{removed} lines):\n{edit_diff}"
+    return Command(update={
+        "diff": cumulative,
+        "messages": [ToolMessage(content=content, name=tool_name, tool_call_id=tool_call_id)],
+    })
+
+
+def _edit_error(tool_name: str, tool_call_id: str, error: str) -> Command:
+    logger.error(f"❌ {tool_name.removesuffix('_tool').upper()}: {error}")
+    return Command(update={
+        "messages": [ToolMessage(content=error, name=tool_name, tool_call_id=tool_call_id, status="error")],
+    })
+
+
+@tool
+def edit_file_tool(
+    file_path: str,
+    old_string: str,
+    new_string: str,
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    replace_all: bool = False,
+    state: Annotated[dict, InjectedState] = None,
+) -> Command:
+    """Replace an exact piece of text in a file, without rewriting the rest of it.
+
+    old_string must match the file exactly (including indentation) and occur
+    once; include a few surrounding lines to make it unique. To create a new
+    file, pass an empty old_string and the whole content as new_string.
+
+    Args:
+        file_path: Path of the file to edit
+        old_string: Exact text to replace
+        new_string: Replacement text
+        replace_all: Replace every occurrence instead of requiring a unique one
+
+    Returns:
+        The diff of the edit, or an error describing why it did not apply
+    """
+    logger.info(f"✏️ EDIT_FILE: {file_path} (-{len(old_string)} +{len(new_string)} chars)")
+    root = workspace_root()
+    try:
+        rel_path = os.path.relpath(_resolve(root, file_path), root).replace(os.sep, "/")
+        before = _read(_resolve(root, rel_path))
+        if before is None:
+            if old_string:
+                raise PatchError(f"{file_path} does not exist; pass an empty old_string to create it")
+            after = new_string
+        elif not old_string:
+            raise PatchError(f"{file_path} already exists; old_string must not be empty")
+        else:
+            after = replace_in_text(before, old_string, new_string, replace_all)
+        if after == before:
+            raise PatchError("old_string and new_string are identical; nothing to change")
+        write_changes(root, [(rel_path, before, after)])
+        return _edit_result("edit_file_tool", tool_call_id, state, [(rel_path, before, after)])
+    except (PatchError, OSError, UnicodeDecodeError) as e:
+        return _edit_error("edit_file_tool", tool_call_id, f"Error editing {file_path}: {str(e)}")
+
+
+@tool
+def apply_patch_tool(
+    patch: str,
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    state: Annotated[dict, InjectedState] = None,
+) -> Command:
+    """Apply a unified diff to one or more files, all or nothing.
+
+    Every hunk's context and removed lines must match the current files; line
+    numbers in hunk headers may be approximate. Use '--- /dev/null' to create a
+    file and '+++ /dev/null' to delete one.
+
+    Args:
+        patch: Unified diff with '--- a/path' / '+++ b/path' headers and '@@' hunks
+
+    Returns:
+        The applied diff, or an error naming the hunk that did not match
+    """
+    logger.info(f"🩹 APPLY_PATCH: {len(patch)} chars")
+    root = workspace_root()
+    try:
+        changes: List[Tuple[str, Optional[str], Optional[str]]] = []
+        contents: Dict[str, Optional[str]] = {}
+        for file_patch in parse_unified_diff(patch):
+            rel_path = os.path.relpath(_resolve(root, file_patch.path), root).replace(os.sep, "/")
+            before = contents[rel_path] if rel_path in contents else _read(_resolve(root, rel_path))
+            if file_patch.old_path is None and before is not None:
+                raise PatchError(f"{rel_path} already exists")
+            if file_patch.old_path is not None and before is None:
+                raise PatchError(f"{rel_path} does not exist")
+            after = None if file_patch.new_path is None else apply_hunks(before or "", file_patch.hunks, rel_path)
+            contents[rel_path] = after
+            changes.append((rel_path, before, after))
+        # Collapse repeated sections for the same file into one change
+        merged: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        for rel_path, before, after in changes:
+            merged[rel_path] = (merged[rel_path][0] if rel_path in merged else before, after)
+        changes = [(path, before, after) for path, (before, after) in merged.items() if before != after]
+        if not changes:
+            raise PatchError("The patch makes no changes")
+        write_changes(root, changes)
+        return _edit_result("apply_patch_tool", tool_call_id, state, changes)
+    except (PatchError, OSError, UnicodeDecodeError) as e:
+        return _edit_error("apply_patch_tool", tool_call_id, f"Error applying patch: {str(e)}")
@@ -0,0 +1,309 @@
+"""Repository index lookup tools for the retriever agent."""
+
+import logging
+import os
+import re
+import time
+from typing import Dict, List
+
+from langchain_core.tools import tool
+
+from ..core.workspace import resolve_path, workspace_root
+from ..index import RepoIndex, close_repo_index, close_semantic_index, get_repo_index, get_semantic_index
+from ..index.impact import close_import_graph
+from .search import search_files
+
+logger = logging.getLogger("devagent.tools")
+
+# Minimum seconds between incremental refreshes of the same index
+REFRESH_INTERVAL = 2.0
+
+# Longest definition body returned by find_definition_tool
+DEFINITION_MAX_LINES = 60
+
+_last_refresh: Dict[str, float] = {}
+
+
+def fresh_index() -> RepoIndex:
+    """Get the index for the workspace, refreshing it if it may be stale."""
+    index = get_repo_index(workspace_root())
+    now = time.monotonic()
+    if now - _last_refresh.get(index.root, float("-inf")) >= REFRESH_INTERVAL:
+        stats = index.refresh()
+        _last_refresh[index.root] = time.monotonic()
+        if stats["added"] or stats["updated"] or stats["removed"]:
+            logger.info(
+                f"🗂️ INDEX: +{stats['added']} ~{stats['updated']} -{stats['removed']} "
+                f"({stats['unchanged']} unchanged)"
+            )
+    return index
+
+
+def close_workspace_indexes(root: str) -> None:
+    """Release the indexes of a working directory that is going away (e.g. a removed worktree).
+
+    Closes the shared repository and semantic indexes' database connections and
+    drops their in-memory vectors and the import graph.
+    """
+    root = os.path.abspath(root)
+    close_semantic_index(root)
+    close_repo_index(root)
+    close_import_graph(root)
+    _last_refresh.pop(root, None)
+
+
+@tool
+def repo_overview_tool() -> str:
+    """Summarize the repository layout from the index without scanning the tree.
+
+    Returns:
+        File counts per language and top-level directory, plus root-level files
+    """
+    logger.info("🗂️ OVERVIEW")
+    try:
+        overview = fresh_index().overview()
+        lines = [f"{overview['files']} files ({overview['bytes']} bytes)", "Languages:"]
+        lines += [f"  {lang}: {count}" for lang, count in overview["languages"].items()]
+        lines.append("Top-level directories (file counts):")
+        lines += [f"  {name}/: {count}" for name, count in overview["directories"].items() if name != "."]
+        lines.append("Root files: " + ", ".join(overview["root_files"]))
+        logger.info(f"✅ OVERVIEW: {overview['files']} files")
+        return "\n".join(lines)
+    except Exception as e:
+        error_msg = f"Error building repository overview: {str(e)}"
+        logger.error(f"❌ OVERVIEW: {error_msg}")
+        return error_msg
+
+
+@tool
+def find_files_tool(pattern: str) -> List[str]:
+    """Find files in the repository index matching a glob pattern.
+
+    Args:
+        pattern: Glob pattern (e.g., "**/*.py", "src/*/models.py")
+
+    Returns:
+        List of matching file paths (ignored files are never included)
+    """
+    logger.info(f"🗂️ FIND_FILES: {pattern}")
+    try:
+        files = fresh_index().find_files(pattern)
+        logger.info(f"✅ FIND_FILES: Found {len(files)} files")
+        return files
+    except Exception as e:
+        error_msg = f"Error finding files for {pattern}: {str(e)}"
+        logger.error(f"❌ FIND_FILES: {error_msg}")
+        return [error_msg]
+
+
+@tool
+def find_symbol_tool(name: str) -> List[str]:
+    """Look up where a function, class, method or constant is defined.
+
+    Args:
+        name: Symbol name, or a name prefix
+
+    Returns:
+        List of "path:line-end_line kind name" entries
+    """
+    logger.info(f"🗂️ FIND_SYMBOL: {name}")
+    try:
+        symbols = fresh_index().find_symbols(name)
+        results = [
+            f"{s['path']}:{s['line']}-{s['end_line']} {s['kind']} "
+            f"{s['parent'] + '.' if s['parent'] else ''}{s['name']}"
+            for s in symbols
+        ]
+        logger.info(f"✅ FIND_SYMBOL: Found {len(results)} definitions")
+        return results
+    except Exception as e:
+        error_msg = f"Error looking up symbol {name}: {str(e)}"
+        logger.error(f"❌ FIND_SYMBOL: {error_msg}")
+        return [error_msg]
+
+
+@tool
+def search_index_tool(query: str, limit: int = 5) -> str:
+    """Full-text search of indexed file contents, returning the best matching chunks.
+
+    Args:
+        query: Words to search for
+        limit: Maximum number of chunks to return
+
+    Returns:
+        Matching chunks with file paths and line ranges
+    """
+    logger.info(f"🗂️ SEARCH_INDEX: '{query}'")
+    try:
+        chunks = fresh_index().search_chunks(query, limit=limit)
+        logger.info(f"✅ SEARCH_INDEX: Found {len(chunks)} chunks")
+        if not chunks:
+            return f"No indexed content matches '{query}'"
+        return "\n\n".join(
+            f"--- {c['path']}:{c['start_line']}-{c['end_line']} ---\n{c['text']}" for c in chunks
+        )
+    except Exception as e:
+        error_msg = f"Error searching index for '{query}': {str(e)}"
+        logger.error(f"❌ SEARCH_INDEX: {error_msg}")
+        return error_msg
+
+
+def file_lines(root: str, rel_path: str, cache: Dict[str, List[str]]) -> List[str]:
+    """Lines of a repository file, read once per tool call."""
+    if rel_path not in cache:
+        try:
+            with open(os.path.join(root, rel_path), "r", encoding="utf-8", errors="replace") as f:
+                cache[rel_path] = f.read().splitlines()
+        except OSError:
+            cache[rel_path] = []
+    return cache[rel_path]
+
+
+@tool
+def find_definition_tool(name: str, include_source: bool = True) -> str:
+    """Go to the definition of a function, class, method or constant.
+
+    Args:
+        name: Exact symbol name, or "Class.method" to pick a method
+        include_source: Include the definition's source lines
+
+    Returns:
+        Each definition with its path and line span, followed by its code
+    """
+    logger.info(f"🧭 FIND_DEFINITION: {name}")
+    try:
+        index = fresh_index()
+        definitions = index.find_definitions(name)
+        if not definitions:
+            logger.info("✅ FIND_DEFINITION: No definitions")
+            return f"No definition of '{name}' found (try find_symbol_tool for a prefix search)"
+        cache: Dict[str, List[str]] = {}
+        blocks = []
+        for d in definitions:
+            qualname = f"{d['parent']}.{d['name']}" if d["parent"] else d["name"]
+            header = f"--- {d['path']}:{d['line']}-{d['end_line']} {d['kind']} {qualname} ---"
+            if d["kind"] == "class":
+                bases = index.file_outline(d["path"])["bases"].get(qualname)
+                if bases:
+                    header += f" (bases: {', '.join(bases)})"
+            if not include_source:
+                blocks.append(f"{header}\n{d['signature'] or ''}")
+                continue
+            lines = file_lines(index.root, d["path"], cache)
+            end = min(d["end_line"], d["line"] + DEFINITION_MAX_LINES - 1)
+            body = [f"{n}: {lines[n - 1]}" for n in range(d["line"], end + 1) if n <= len(lines)]
+            if end < d["end_line"]:
+                body.append(
+                    f"... ({d['end_line'] - end} more lines; read_file_tool with offset={end + 1} to continue)"
+                )
+            blocks.append("\n".join([header, *body]))
+        logger.info(f"✅ FIND_DEFINITION: Found {len(definitions)} definitions")
+        return "\n\n".join(blocks)
+    except Exception as e:
+        error_msg = f"Error finding definition of {name}: {str(e)}"
+        logger.error(f"❌ FIND_DEFINITION: {error_msg}")
+        return error_msg
+
+
+@tool
+def find_references_tool(name: str, limit: int = 50) -> List[str]:
+    """Find every place a function, class, method or variable is used or imported.
+
+    Args:
+        name: Symbol name (for "Class.method" the method name is searched)
+        limit: Maximum number of references to return
+
+    Returns:
+        List of "path:line: [call|read|import] source line" entries
+    """
+    logger.info(f"🧭 FIND_REFERENCES: {name}")
+    try:
+        index = fresh_index()
+        references = index.find_references(name, limit=limit)
+        cache: Dict[str, List[str]] = {}
+        results = []
+        for ref in references:
+            lines = file_lines(index.root, ref["path"], cache)
+            text = lines[ref["line"] - 1].strip() if ref["line"] <= len(lines) else ""
+            results.append(f"{ref['path']}:{ref['line']}: [{ref['kind']}] {text}")
+        if not results:
+            # Non-Python files have no reference table; fall back to a word match
+            short = name.rpartition(".")[2]
+            result = search_files(rf"\b{re.escape(short)}\b", index.root, max_results=limit)
+            results = [f"{m.path}:{m.line_number}: [text] {m.line.strip()}" for m in result.matches]
+        logger.info(f"✅ FIND_REFERENCES: Found {len(results)} references")
+        return results
+    except Exception as e:
+        error_msg = f"Error finding references to {name}: {str(e)}"
+        logger.error(f"❌ FIND_REFERENCES: {error_msg}")
+        return [error_msg]
+
+
+@tool
+def outline_file_tool(file_path: str) -> str:
+    """Outline a file without reading it: imports, classes (with bases), functions and line spans.
+
+    Args:
+        file_path: Path relative to the repository root
+
+    Returns:
+        Indented outline with "line-end_line" spans and signatures
+    """
+    logger.info(f"🧭 OUTLINE: {file_path}")
+    try:
+        index = fresh_index()
+        rel_path = os.path.relpath(resolve_path(file_path), index.root).replace(os.sep, "/")
+        outline = index.file_outline(rel_path)
+        if not outline["symbols"] and not outline["imports"]:
+            return f"No symbols indexed for {rel_path}"
+        lines = [rel_path]
+        if outline["imports"]:
+            imported = [
+                (f"{i['module']}.{i['name']}" if i["name"] else i["module"])
+                + (f" as {i['alias']}" if i["alias"] else "")
+                for i in outline["imports"]
+            ]
+            lines.append("imports: " + ", ".join(imported))
+        for s in outline["symbols"]:
+            depth = s["parent"].count(".") + 1 if s["parent"] else 0
+            lines.append(f"{'  ' * depth}{s['line']}-{s['end_line']} {s['signature'] or s['kind'] + ' ' + s['name']}")
+        logger.info(f"✅ OUTLINE: {len(outline['symbols'])} symbols")
+        return "\n".join(lines)
+    except Exception as e:
+        error_msg = f"Error outlining {file_path}: {str(e)}"
+        logger.error(f"❌ OUTLINE: {error_msg}")
+        return error_msg
+
+
+@tool
+def semantic_search_tool(query: str, k: int = 5) -> str:
+    """Find code by meaning rather than exact words, using local embeddings of indexed chunks.
+
+    Args:
+        query: Natural-language description of the code to find (e.g. "retry with backoff")
+        k: Number of chunks to return
+
+    Returns:
+        The k most similar chunks with file paths, line ranges and similarity scores
+    """
+    logger.info(f"🧠 SEMANTIC: '{query}'")
+    try:
+        index = fresh_index()
+        semantic = get_semantic_index(index.root)
+        stats = semantic.refresh()
+        if stats["files"] or stats["removed"]:
+            logger.info(f"🧠 SEMANTIC: Embedded {stats['chunks']} chunks from {stats['files']} files")
+        hits = semantic.search(query, k=k)
+        logger.info(f"✅ SEMANTIC: Found {len(hits)} chunks")
+        if not hits:
+            return f"No indexed content is similar to '{query}'"
+        cache: Dict[str, List[str]] = {}
+        return "\n\n".join(
+            f"--- {h['path']}:{h['start_line']}-{h['end_line']} (score {h['score']:.2f}) ---\n"
+            + "\n".join(file_lines(index.root, h["path"], cache)[h["start_line"] - 1:h["end_line"]])
+            for h in hits
+        )
+    except Exception as e:
+        error_msg = f"Error in semantic search for '{query}': {str(e)}"
+        logger.error(f"❌ SEMANTIC: {error_msg}")
+        return error_msg
@@ -0,0 +1,236 @@
+"""Hybrid retrieval: merge lexical, symbol and semantic hits into a token-bounded context."""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Annotated, Dict, List, Optional, Tuple
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import InjectedToolCallId, tool
+from langgraph.types import Command
+
+from ..index import RepoIndex, get_semantic_index
+from .index_tools import file_lines, fresh_index
+from .search import search_files
+
+logger = logging.getLogger("devagent.tools")
+
+# Default and maximum size of the packed context, in estimated tokens
+CONTEXT_TOKEN_BUDGET = 4_000
+MAX_CONTEXT_TOKEN_BUDGET = 16_000
+
+# Same estimate as the conversation compactor: about 4 characters per token
+CHARS_PER_TOKEN = 4
+
+# Hits taken from each source before fusion
+HITS_PER_SOURCE = 10
+
+# Reciprocal rank fusion constant: higher values flatten the rank differences
+RRF_K = 60
+
+# Lines of context around a grep match, and the longest snippet packed
+GREP_WINDOW = 5
+MAX_SNIPPET_LINES = 80
+
+# Snippets that would be cut below this many lines are skipped instead
+MIN_SNIPPET_LINES = 5
+
+_STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "into", "where", "what", "which",
+    "how", "does", "are", "when", "not", "all", "its", "code", "file", "files", "function",
+}
+
+
+@dataclass
+class Snippet:
+    """A span of a file selected for the context, with its fused score.
+
+    Attributes:
+        path: Path relative to the repository root
+        start_line: First line (1-based)
+        end_line: Last line (inclusive)
+        score: Sum of the reciprocal-rank scores of the hits it covers
+        sources: Retrieval sources that hit the span
+    """
+
+    path: str
+    start_line: int
+    end_line: int
+    score: float = 0.0
+    sources: List[str] = field(default_factory=list)
+
+    def overlaps(self, other: "Snippet") -> bool:
+        return self.path == other.path and self.start_line <= other.end_line and other.start_line <= self.end_line
+
+
+def query_terms(query: str) -> List[str]:
+    """Identifier-like words of a query, without stopwords and very short words."""
+    terms = []
+    for term in re.findall(r"[A-Za-z_][A-Za-z0-9_.]*", query):
+        term = term.strip(".")
+        if len(term) >= 3 and term.lower() not in _STOPWORDS and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def _grep_hits(index: RepoIndex, terms: List[str]) -> List[Snippet]:
+    if not terms:
+        return []
+    pattern = "|".join(re.escape(term) for term in terms)
+    result = search_files(pattern, root=index.root, ignore_case=True, context_lines=0, max_results=HITS_PER_SOURCE)
+    return [
+        Snippet(m.path, max(1, m.line_number - GREP_WINDOW), m.line_number + GREP_WINDOW)
+        for m in result.matches
+    ]
+
+
+def _symbol_hits(index: RepoIndex, terms: List[str]) -> List[Snippet]:
+    hits = []
+    for term in terms:
+        for definition in index.find_definitions(term, limit=3):
+            hits.append(Snippet(definition["path"], definition["line"], definition["end_line"]))
+    return hits[:HITS_PER_SOURCE]
+
+
+def _fulltext_hits(index: RepoIndex, query: str) -> List[Snippet]:
+    return [Snippet(c["path"], c["start_line"], c["end_line"]) for c in index.search_chunks(query, limit=HITS_PER_SOURCE)]
+
+
+def _semantic_hits(index: RepoIndex, query: str) -> List[Snippet]:
+    semantic = get_semantic_index(index.root)
+    semantic.refresh()
+    return [Snippet(h["path"], h["start_line"], h["end_line"]) for h in semantic.search(query, k=HITS_PER_SOURCE)]
+
+
+def fuse_hits(ranked_lists: Dict[str, List[Snippet]]) -> List[Snippet]:
+    """Merge ranked hit lists with reciprocal rank fusion, folding overlapping spans together.
+
+    A hit that overlaps an already selected span is merged into it (and adds its
+    score) when the union stays under MAX_SNIPPET_LINES; otherwise it only adds
+    its score, so the same code is never packed twice.
+
+    Args:
+        ranked_lists: Hits per source, best first
+
+    Returns:
+        Snippets ordered by fused score, best first
+    """
+    scored: List[Tuple[float, str, Snippet]] = []
+    for source, hits in ranked_lists.items():
+        for rank, hit in enumerate(hits):
+            scored.append((1.0 / (RRF_K + rank + 1), source, hit))
+    scored.sort(key=lambda item: -item[0])
+
+    snippets: List[Snippet] = []
+    for score, source, hit in scored:
+        target = next((s for s in snippets if s.overlaps(hit)), None)
+        if target is None:
+            snippets.append(Snippet(hit.path, hit.start_line, hit.end_line, score, [source]))
+            continue
+        start, end = min(target.start_line, hit.start_line), max(target.end_line, hit.end_line)
+        if end - start + 1 <= MAX_SNIPPET_LINES:
+            target.start_line, target.end_line = start, end
+        target.score += score
+        if source not in target.sources:
+            target.sources.append(source)
+    return sorted(snippets, key=lambda s: (-s.score, s.path, s.start_line))
+
+
+def pack_context(root: str, snippets: List[Snippet], token_budget: int) -> Tuple[str, List[Snippet]]:
+    """Pack the best snippets into a token budget.
+
+    Snippets are taken in score order and cut to MAX_SNIPPET_LINES; one that does
+    not fit is cut to the remaining budget, or skipped when that leaves too little.
+
+    Returns:
+        The packed text and the snippets it contains (with their final spans)
+    """
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    cache: Dict[str, List[str]] = {}
+    sections: List[str] = []
+    packed: List[Snippet] = []
+    used = 0
+    for snippet in snippets:
+        lines = file_lines(root, snippet.path, cache)[snippet.start_line - 1:snippet.end_line][:MAX_SNIPPET_LINES]
+        if not lines:
+            continue
+        header_chars = len(snippet.path) + 40
+        kept: List[str] = []
+        size = header_chars
+        for line in lines:
+            if used + size + len(line) + 1 > budget_chars:
+                break
+            kept.append(line)
+            size += len(line) + 1
+        if len(kept) < min(len(lines), MIN_SNIPPET_LINES):
+            continue
+        end_line = snippet.start_line + len(kept) - 1
+        sections.append(f"--- {snippet.path}:{snippet.start_line}-{end_line} ---\n" + "\n".join(kept))
+        packed.append(Snippet(snippet.path, snippet.start_line, end_line, snippet.score, snippet.sources))
+        used += size
+    return "\n\n".join(sections), packed
+
+
+def retrieve_context(
+    query: str, index: Optional[RepoIndex] = None, token_budget: int = CONTEXT_TOKEN_BUDGET
+) -> Tuple[str, List[Snippet]]:
+    """Run every retrieval source for a query, fuse the hits and pack them into a budget.
+
+    A source that fails (for example an embedder that cannot load) is skipped.
+
+    Returns:
+        The packed context text and the packed snippets
+    """
+    index = index or fresh_index()
+    terms = query_terms(query)
+    sources = {
+        "symbol": lambda: _symbol_hits(index, terms),
+        "grep": lambda: _grep_hits(index, terms),
+        "fulltext": lambda: _fulltext_hits(index, query),
+        "semantic": lambda: _semantic_hits(index, query),
+    }
+    ranked_lists: Dict[str, List[Snippet]] = {}
+    for name, run in sources.items():
+        try:
+            ranked_lists[name] = run()
+        except Exception as e:
+            logger.warning(f"⚠️ CONTEXT: {name} search failed - {str(e)}")
+    return pack_context(index.root, fuse_hits(ranked_lists), token_budget)
+
+
+@tool
+def gather_context_tool(
+    query: str,
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> Command:
+    """Collect the code most relevant to a question into a compact, ranked context.
+
+    Combines grep matches, symbol definitions, full-text and semantic search,
+    removes overlapping snippets and keeps the best ones within the token budget.
+    The result is saved as the shared context for the other agents.
+
+    Args:
+        query: What the code should be about; include identifiers when known
+        token_budget: Maximum size of the packed context in tokens
+
+    Returns:
+        The packed snippets with file paths and line ranges
+    """
+    logger.info(f"📦 CONTEXT: '{query}'")
+    token_budget = max(1, min(token_budget, MAX_CONTEXT_TOKEN_BUDGET))
+    update = {}
+    try:
+        text, snippets = retrieve_context(query, token_budget=token_budget)
+        if snippets:
+            logger.info(f"✅ CONTEXT: Packed {len(snippets)} snippets (~{len(text) // CHARS_PER_TOKEN} tokens)")
+            text = f"Context for '{query}':\n\n{text}"
+            update["context"] = text
+        else:
+            logger.info("✅ CONTEXT: Nothing relevant found")
+            text = f"No code found for '{query}'"
+    except Exception as e:
+        text = f"Error gathering context for '{query}': {str(e)}"
+        logger.error(f"❌ CONTEXT: {text}")
+    update["messages"] = [ToolMessage(content=text, name="gather_context_tool", tool_call_id=tool_call_id)]
+    return Command(update=update)
@@ -0,0 +1,505 @@
+"""Pool of warm, long-lived shell sessions for running agent commands.
+
+Each session is one persistent ``bash`` process (locally, or inside a
+container started from the sandbox image in the Dockerfile). Commands are
+written to its stdin and their end is detected with a per-session sentinel,
+so cwd, exported variables and virtualenv activation survive between calls
+and a command costs only its own runtime. Sessions are leased per agent and
+replaced when they die or time out: a timed-out command line is stopped by
+killing its whole session, since killing only the running job would let the
+shell go on with the rest of the line.
+"""
+
+import atexit
+import os
+import queue
+import re
+import shlex
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ..core.workspace import workspace_root
+
+# Default per-command timeout in seconds
+DEFAULT_TIMEOUT = 30
+
+# Sessions started ahead of demand, and the most a pool will run at once
+WARM_SESSIONS = 2
+MAX_SESSIONS = 8
+
+# Per-stream output kept in memory for the agent; the rest spills to a temp file
+OUTPUT_HEAD_BYTES = 6_000
+OUTPUT_TAIL_BYTES = 6_000
+
+# How long the output of a killed session is drained before it is returned
+KILL_GRACE_SECONDS = 2
+
+# Image built from the repository Dockerfile
+SANDBOX_IMAGE = os.environ.get("DEVAGENT_SANDBOX_IMAGE", "devagent-sandbox")
+
+LOCAL_SHELL = ["bash", "--noprofile", "--norc"]
+
+# Keep tools from paging or prompting inside a non-interactive session
+SESSION_ENV = {"PAGER": "cat", "GIT_PAGER": "cat", "TERM": "dumb", "GIT_TERMINAL_PROMPT": "0"}
+
+
+class OutputCapture:
+    """Bounded capture of one output stream.
+
+    Keeps the first ``head_bytes`` and a ring buffer of the last ``tail_bytes``.
+    Once the output outgrows both, the whole stream (including what was already
+    seen) is written to a temp file that can be paged through with read_file_tool.
+
+    Args:
+        head_bytes: Bytes kept from the start of the stream
+        tail_bytes: Bytes kept from the end of the stream
+        label: Name used in the spill file name
+    """
+
+    def __init__(self, head_bytes: int = OUTPUT_HEAD_BYTES, tail_bytes: int = OUTPUT_TAIL_BYTES, label: str = "output"):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.label = label
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+        self.spill_path: Optional[str] = None
+        self._spill = None
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        if self._spill is not None:
+            self._spill.write(data)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data:
+            return
+        self.tail += data
+        if len(self.tail) > self.tail_bytes:
+            if self._spill is None:
+                self._start_spill()
+            del self.tail[:len(self.tail) - self.tail_bytes]
+
+    def _start_spill(self) -> None:
+        spill = tempfile.NamedTemporaryFile(prefix=f"devagent-{self.label}-", suffix=".log", delete=False)
+        spill.write(self.head)
+        spill.write(self.tail)
+        self._spill = spill
+        self.spill_path = spill.name
+        _spill_files.append(spill.name)
+
+    @property
+    def omitted(self) -> int:
+        """Bytes left out of text()."""
+        return self.total - len(self.head) - len(self.tail)
+
+    def text(self) -> str:
+        """The captured output, with a marker where the middle was dropped."""
+        head = self.head.decode("utf-8", errors="replace")
+        tail = self.tail.decode("utf-8", errors="replace")
+        if not self.omitted:
+            return head + tail
+        return (
+            f"{head}\n[... {self.omitted} bytes omitted; full {self.label} ({self.total} bytes) "
+            f"in {self.spill_path}, page through it with read_file_tool ...]\n{tail}"
+        )
+
+    def close(self) -> None:
+        if self._spill is not None:
+            self._spill.close()
+
+
+class _SentinelReader:
+    """Routes one stream's output into a capture until the end-of-command sentinel.
+
+    The last few bytes are held back so a sentinel split across reads is never
+    written into the capture.
+    """
+
+    def __init__(self, marker: "re.Pattern[bytes]", capture: OutputCapture):
+        self.marker = marker
+        self.capture = capture
+        self.hold = len(marker.pattern) + 8
+        self.pending = bytearray()
+        self.done = False
+        self.return_code: Optional[int] = None
+
+    def feed(self, data: bytes) -> None:
+        if self.done:
+            return
+        self.pending += data
+        match = self.marker.search(self.pending)
+        if match:
+            self.capture.write(bytes(self.pending[:match.start()]))
+            self.return_code = int(match.group(1)) if match.groups() else None
+            self.pending.clear()
+            self.done = True
+            return
+        keep = len(self.pending) - self.hold
+        if keep > 0:
+            self.capture.write(bytes(self.pending[:keep]))
+            del self.pending[:keep]
+
+    def finish(self) -> None:
+        """Flush held-back bytes when the stream ends without a sentinel."""
+        self.capture.write(bytes(self.pending))
+        self.pending.clear()
+        self.done = True
+
+
+class ShellSession:
+    """A persistent bash process that runs one command at a time.
+
+    Args:
+        cwd: Directory the shell starts in
+        argv: Command that starts the shell (defaults to a local bash)
+    """
+
+    def __init__(self, cwd: str, argv: Optional[List[str]] = None):
+        self.cwd = cwd
+        self.commands_run = 0
+        self._token = uuid.uuid4().hex
+        self._stdout_marker = re.compile(rb"__DEVAGENT_" + self._token.encode() + rb"__:(\d+)\n")
+        self._stderr_marker = re.compile(rb"__DEVAGENT_" + self._token.encode() + rb"__\n")
+        self._broken = False
+        self._chunks: "queue.Queue[tuple]" = queue.Queue()
+        self.process = subprocess.Popen(
+            argv or LOCAL_SHELL,
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env={**os.environ, **SESSION_ENV},
+            start_new_session=True,  # own process group, so a timeout can kill everything it started
+        )
+        for name, stream in (("stdout", self.process.stdout), ("stderr", self.process.stderr)):
+            threading.Thread(target=self._pump, args=(name, stream), daemon=True).start()
+
+    def _pump(self, name: str, stream) -> None:
+        """Forward raw output chunks from one pipe to the reader queue."""
+        fd = stream.fileno()
+        while True:
+            try:
+                data = os.read(fd, 65536)
+            except OSError:
+                data = b""
+            if not data:
+                self._chunks.put((name, None))
+                return
+            self._chunks.put((name, data))
+
+    @property
+    def alive(self) -> bool:
+        """Whether the session can run another command."""
+        return not self._broken and self.process.poll() is None
+
+    def run(self, command: str, timeout: Optional[float] = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+        """Run a command in the session and wait for it to finish.
+
+        The command is evaluated from a quoted string with stdin closed, so a
+        syntax error or a command waiting for input cannot swallow the sentinel.
+        Output is captured incrementally with a head/tail cap; when it outgrows
+        the cap the full stream is spilled to a temp file.
+
+        When the timeout hits, the session is closed with everything it started,
+        so nothing after the running job executes; the output printed until
+        then is returned and the pool replaces the session.
+
+        Returns:
+            Dictionary with stdout, stderr, return_code, success and timed_out, plus
+            stdout_file/stderr_file when that stream was spilled to disk
+        """
+        if not self.alive:
+            raise RuntimeError("shell session is not running")
+        marker = f"__DEVAGENT_{self._token}__"
+        script = (
+            f"eval {shlex.quote(command)} < /dev/null\n"
+            f"__devagent_rc=$?\n"
+            f"printf '{marker}:%s\\n' \"$__devagent_rc\"\n"
+            f"printf '{marker}\\n' >&2\n"
+        )
+        self.commands_run += 1
+        try:
+            self.process.stdin.write(script.encode("utf-8"))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self._broken = True
+            raise RuntimeError("shell session exited") from None
+
+        streams = {
+            "stdout": _SentinelReader(self._stdout_marker, OutputCapture(label="stdout")),
+            "stderr": _SentinelReader(self._stderr_marker, OutputCapture(label="stderr")),
+        }
+        try:
+            timed_out = not self._wait(streams, timeout)
+            if timed_out:
+                self.close()
+                self._wait(streams, KILL_GRACE_SECONDS)
+                for stream in streams.values():
+                    if not stream.done:
+                        # A process that escaped the kill still holds the pipe
+                        stream.finish()
+            return_code = -1 if timed_out else streams["stdout"].return_code
+            if return_code is None:
+                # The command ended the shell itself (e.g. `exit 3`)
+                return_code = self.process.wait()
+            return self._result(streams, return_code, timed_out)
+        finally:
+            for stream in streams.values():
+                stream.capture.close()
+
+    def _wait(self, streams: Dict[str, "_SentinelReader"], timeout: Optional[float]) -> bool:
+        """Feed output into the streams until both sentinels arrive; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not all(stream.done for stream in streams.values()):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                name, data = self._chunks.get(timeout=remaining)
+            except queue.Empty:
+                return False
+            if data is None:
+                # The shell exited; drain whatever the other stream still has
+                self._broken = True
+                streams[name].finish()
+            else:
+                streams[name].feed(data)
+        return True
+
+    @staticmethod
+    def _result(streams: Dict[str, "_SentinelReader"], return_code: int, timed_out: bool = False) -> Dict[str, Any]:
+        result = {
+            "stdout": streams["stdout"].capture.text(),
+            "stderr": streams["stderr"].capture.text(),
+            "return_code": return_code,
+            "success": return_code == 0 and not timed_out,
+            "timed_out": timed_out,
+        }
+        for name, stream in streams.items():
+            if stream.capture.spill_path:
+                result[f"{name}_file"] = stream.capture.spill_path
+        return result
+
+    def close(self) -> None:
+        """Kill the shell and everything it started."""
+        self._broken = True
+        if self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                self.process.kill()
+            self.process.wait()
+
+
+class DockerSession(ShellSession):
+    """A persistent bash session inside a container from the sandbox image.
+
+    The working directory is mounted at /workspace, the image's WORKDIR.
+    """
+
+    def __init__(self, cwd: str, image: str = SANDBOX_IMAGE):
+        self.container = f"devagent-{uuid.uuid4().hex[:12]}"
+        super().__init__(cwd, [
+            "docker", "run", "--rm", "-i", "--init",
+            "--name", self.container,
+            "-v", f"{os.path.abspath(cwd)}:/workspace",
+            "-w", "/workspace",
+            image, *LOCAL_SHELL,
+        ])
+
+    def close(self) -> None:
+        super().close()
+        subprocess.run(["docker", "rm", "-f", self.container], capture_output=True)
+
+
+def default_session_factory() -> Callable[[str], ShellSession]:
+    """Pick the session type from DEVAGENT_SANDBOX ("local" or "docker")."""
+    if os.environ.get("DEVAGENT_SANDBOX", "local") == "docker":
+        return DockerSession
+    return ShellSession
+
+
+class SandboxPool:
+    """Warm shell sessions leased to agents.
+
+    An agent gets back the session it used last (so its cwd and environment
+    persist) when that session is idle, otherwise a pre-warmed spare. Sessions
+    that die or time out are discarded and replaced in the background.
+
+    Args:
+        cwd: Directory new sessions start in
+        warm_sessions: Spare sessions to keep started ahead of demand
+        max_sessions: Most sessions alive at once; further leases wait
+        factory: Callable creating a session for a directory
+    """
+
+    def __init__(
+        self,
+        cwd: str,
+        warm_sessions: int = WARM_SESSIONS,
+        max_sessions: int = MAX_SESSIONS,
+        factory: Optional[Callable[[str], ShellSession]] = None,
+    ):
+        self.cwd = cwd
+        self.warm_sessions = warm_sessions
+        self.max_sessions = max(max_sessions, 1)
+        self.factory = factory or default_session_factory()
+        self._owned: Dict[str, ShellSession] = {}
+        self._spare: List[ShellSession] = []
+        self._count = 0  # sessions alive or being started
+        self._closed = False
+        self._cond = threading.Condition()
+        self._replenish()
+
+    def _replenish(self) -> None:
+        """Start spare sessions in the background until the warm target is met."""
+        with self._cond:
+            missing = min(self.warm_sessions - len(self._spare), self.max_sessions - self._count)
+            if self._closed or missing <= 0:
+                return
+            self._count += missing
+        for _ in range(missing):
+            threading.Thread(target=self._start_spare, daemon=True).start()
+
+    def _start_spare(self) -> None:
+        try:
+            session = self.factory(self.cwd)
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify_all()
+            return
+        with self._cond:
+            if self._closed:
+                self._count -= 1
+                session.close()
+                return
+            self._spare.append(session)
+            self._cond.notify_all()
+
+    def _acquire(self, key: str) -> ShellSession:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("sandbox pool is closed")
+                session = self._owned.pop(key, None)
+                if session is not None and session.alive:
+                    return session
+                if session is not None:
+                    self._discard(session)
+                while self._spare:
+                    session = self._spare.pop()
+                    if session.alive:
+                        return session
+                    self._discard(session)
+                if self._count < self.max_sessions:
+                    self._count += 1
+                    break
+                self._cond.wait()
+        try:
+            return self.factory(self.cwd)
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify_all()
+            raise
+
+    def _discard(self, session: ShellSession) -> None:
+        """Drop a dead session (caller holds the lock)."""
+        session.close()
+        self._count -= 1
+
+    def _release(self, key: str, session: ShellSession) -> None:
+        with self._cond:
+            if self._closed or not session.alive:
+                self._discard(session)
+            elif key in self._owned:
+                # Another lease for the same agent got back first; keep this one as a spare
+                self._spare.append(session)
+            else:
+                self._owned[key] = session
+            self._cond.notify_all()
+        self._replenish()
+
+    @contextmanager
+    def lease(self, key: str = "default") -> Iterator[ShellSession]:
+        """Borrow a session for one agent; it is returned (or recycled) on exit."""
+        session = self._acquire(key)
+        try:
+            yield session
+        except BaseException:
+            session.close()
+            raise
+        finally:
+            self._release(key, session)
+
+    def run(self, command: str, key: str = "default", timeout: Optional[float] = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+        """Run a command in the session leased to ``key``."""
+        with self.lease(key) as session:
+            return session.run(command, timeout=timeout)
+
+    def close(self) -> None:
+        """Shut down every session in the pool."""
+        with self._cond:
+            self._closed = True
+            sessions = list(self._owned.values()) + self._spare
+            self._owned.clear()
+            self._spare.clear()
+            self._count -= len(sessions)
+            self._cond.notify_all()
+        for session in sessions:
+            session.close()
+
+
+def session_key(config: Optional[Dict[str, Any]] = None) -> str:
+    """Name of the agent calling a tool (from its RunnableConfig), used as the lease key."""
+    metadata = (config or {}).get("metadata", {})
+    namespace = metadata.get("langgraph_checkpoint_ns") or metadata.get("checkpoint_ns") or ""
+    return namespace.split(":", 1)[0] or "default"
+
+
+_pools: Dict[str, SandboxPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_sandbox_pool(cwd: Optional[str] = None) -> SandboxPool:
+    """Get the shared pool for a working directory (the workspace by default), creating it on first use."""
+    cwd = os.path.abspath(cwd or workspace_root())
+    with _pools_lock:
+        if cwd not in _pools:
+            _pools[cwd] = SandboxPool(cwd)
+        return _pools[cwd]
+
+
+def close_sandbox_pool(cwd: str) -> None:
+    """Shut down the pool of a working directory that is going away (e.g. a removed worktree)."""
+    with _pools_lock:
+        pool = _pools.pop(os.path.abspath(cwd), None)
+    if pool is not None:
+        pool.close()
+
+
+# Spilled output files, removed when the process exits
+_spill_files: List[str] = []
+
+
+@atexit.register
+def _close_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+    for path in _spill_files:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
@@ -0,0 +1,183 @@
+"""Repository-wide streaming grep engine used by grep_tool."""
+
+import fnmatch
+import mmap
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+from ..index.files import iter_repo_files
+
+# Files above this size are skipped entirely (generated bundles, data dumps)
+MAX_FILE_BYTES = 20_000_000
+
+# Per-file cap so a single noisy file cannot crowd out the rest of the results
+MAX_MATCHES_PER_FILE = 20
+
+_DEFINITION_RE = re.compile(rb"^\s*(?:async\s+)?(?:def|class|function|func|fn|interface|struct|type)\s")
+
+
+@dataclass
+class SearchMatch:
+    """A single matching line with its surrounding context."""
+
+    path: str
+    line_number: int
+    line: str
+    before: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+    score: float = 1.0
+
+    def format(self) -> str:
+        """Render the match in grep-style ``path:line: text`` form with context."""
+        start = self.line_number - len(self.before)
+        lines = [f"{self.path}-{start + i}- {text}" for i, text in enumerate(self.before)]
+        lines.append(f"{self.path}:{self.line_number}: {self.line}")
+        lines += [f"{self.path}-{self.line_number + 1 + i}- {text}" for i, text in enumerate(self.after)]
+        return "\n".join(lines)
+
+
+@dataclass
+class SearchResult:
+    """Ranked, capped matches plus counters describing the search."""
+
+    matches: List[SearchMatch]
+    files_searched: int = 0
+    files_matched: int = 0
+    total_matches: int = 0
+    truncated: bool = False
+
+
+def glob_matches(rel_path: str, pattern: str) -> bool:
+    """Match a relative path against a glob, treating ``**/`` as any directory prefix."""
+    return (
+        fnmatch.fnmatch(rel_path, pattern)
+        or fnmatch.fnmatch(rel_path, pattern.replace("**/", ""))
+        or fnmatch.fnmatch(os.path.basename(rel_path), pattern)
+    )
+
+
+def _decode(raw: bytes) -> str:
+    return raw.rstrip(b"\r\n").decode("utf-8", errors="replace")
+
+
+def _search_file(
+    root: str,
+    rel_path: str,
+    regex: Pattern[bytes],
+    prefilter: Pattern[bytes],
+    context_lines: int,
+) -> Tuple[List[SearchMatch], int]:
+    """Search one file, scanning the mmap with the compiled pattern before splitting lines.
+
+    Returns:
+        The first MAX_MATCHES_PER_FILE matches, and the number of matching lines in the file
+    """
+    full_path = os.path.join(root, rel_path)
+    try:
+        size = os.path.getsize(full_path)
+        if size == 0 or size > MAX_FILE_BYTES:
+            return [], 0
+        with open(full_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if b"\0" in mm[:8192]:
+                return [], 0
+            # Fast path: most files do not match at all, so never split them into lines
+            if prefilter.search(mm) is None:
+                return [], 0
+
+            matches: List[SearchMatch] = []
+            total = 0
+            before: deque = deque(maxlen=context_lines)
+            pending: List[SearchMatch] = []
+            line_number = 0
+            for raw in iter(mm.readline, b""):
+                line_number += 1
+                if len(matches) >= MAX_MATCHES_PER_FILE and not pending:
+                    # Past the cap only the count is needed
+                    total += regex.search(raw) is not None
+                    continue
+                for match in pending:
+                    match.after.append(_decode(raw))
+                pending = [m for m in pending if len(m.after) < context_lines]
+                if regex.search(raw):
+                    total += 1
+                    if len(matches) < MAX_MATCHES_PER_FILE:
+                        score = 1.0 + (2.0 if _DEFINITION_RE.match(raw) else 0.0)
+                        match = SearchMatch(rel_path, line_number, _decode(raw), list(before), score=score)
+                        matches.append(match)
+                        if context_lines:
+                            pending.append(match)
+                before.append(_decode(raw))
+            return matches, total
+    except (OSError, ValueError):
+        return [], 0
+
+
+def search_files(
+    pattern: str,
+    root: str = ".",
+    paths: Optional[Iterable[str]] = None,
+    glob: Optional[str] = None,
+    ignore_case: bool = False,
+    fixed_string: bool = False,
+    context_lines: int = 2,
+    max_results: int = 50,
+    max_workers: Optional[int] = None,
+) -> SearchResult:
+    """Search many files in parallel with a single compiled pattern.
+
+    Args:
+        pattern: Regular expression (or literal text with ``fixed_string``)
+        root: Directory that relative paths are resolved against
+        paths: Explicit relative paths to search; defaults to every non-ignored file
+        glob: Optional glob restricting which files are searched
+        ignore_case: Case-insensitive matching
+        fixed_string: Treat the pattern as literal text
+        context_lines: Lines of context before and after each match
+        max_results: Maximum number of matches returned
+        max_workers: Thread pool size (defaults to a multiple of the CPU count)
+
+    Returns:
+        SearchResult with matches ranked best-first
+    """
+    source = re.escape(pattern) if fixed_string else pattern
+    flags = re.IGNORECASE if ignore_case else 0
+    regex = re.compile(source.encode("utf-8"), flags)
+    # Whole-file prefilter needs MULTILINE so anchors behave as they do per line
+    prefilter = re.compile(source.encode("utf-8"), flags | re.MULTILINE)
+
+    candidates = list(paths) if paths is not None else list(iter_repo_files(root))
+    if glob:
+        candidates = [p for p in candidates if glob_matches(p, glob)]
+
+    workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        per_file = list(pool.map(lambda p: _search_file(root, p, regex, prefilter, context_lines), candidates))
+
+    needle = pattern.lower()
+    all_matches: List[SearchMatch] = []
+    files_matched = 0
+    total_matches = 0
+    for matches, file_total in per_file:
+        total_matches += file_total
+        if not matches:
+            continue
+        files_matched += 1
+        # Prefer files whose path mentions the pattern, and fewer-but-specific hits
+        path_bonus = 1.0 if needle in matches[0].path.lower() else 0.0
+        density_penalty = 0.05 * (len(matches) - 1)
+        for match in matches:
+            match.score += path_bonus - density_penalty
+        all_matches.extend(matches)
+
+    all_matches.sort(key=lambda m: (-m.score, m.path, m.line_number))
+    return SearchResult(
+        matches=all_matches[:max_results],
+        files_searched=len(candidates),
+        files_matched=files_matched,
+        total_matches=total_matches,
+        truncated=total_matches > min(len(all_matches), max_results),
+    )
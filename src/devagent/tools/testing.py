@@ -0,0 +1,223 @@
+"""Test execution tools for the executor agent."""
+
+import logging
+import os
+import shlex
+import uuid
+from typing import Annotated, Any, Dict, List, Optional
+from xml.etree import ElementTree
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import InjectedToolCallId, tool
+from langgraph.prebuilt import InjectedState
+from langgraph.types import Command
+
+from ..core.workspace import workspace_root
+from ..index import devagent_dir
+from ..index.impact import select_tests
+from .sandbox import get_sandbox_pool, session_key
+
+logger = logging.getLogger("devagent.tools")
+
+# Default timeout for a test run, in seconds
+TEST_TIMEOUT = 600
+
+PYTEST_COMMAND = "python -m pytest -q --tb=short"
+
+# Size limits for run_result
+MAX_REPORTED_TESTS = 50
+TRACEBACK_LINES = 20
+TRACEBACK_CHARS = 1500
+SLOWEST_TESTS = 5
+
+
+def _node_id(root: str, classname: str, name: str) -> str:
+    """Rebuild a pytest node id (path::Class::test) from junit classname/name."""
+    parts = classname.split(".") if classname else []
+    for i in range(len(parts), 0, -1):
+        path = "/".join(parts[:i]) + ".py"
+        if os.path.exists(os.path.join(root, path)):
+            return "::".join([path, *parts[i:], name])
+    return "::".join([*([classname] if classname else []), name])
+
+
+def _trim_traceback(text: str) -> str:
+    """Keep the end of a traceback, where the assertion or exception is."""
+    lines = (text or "").strip().splitlines()
+    if len(lines) > TRACEBACK_LINES:
+        lines = [f"... ({len(lines) - TRACEBACK_LINES} lines trimmed)"] + lines[-TRACEBACK_LINES:]
+    trimmed = "\n".join(lines)
+    return trimmed if len(trimmed) <= TRACEBACK_CHARS else "..." + trimmed[-TRACEBACK_CHARS:]
+
+
+def parse_junit_xml(path: str, root: str) -> Dict[str, Any]:
+    """Summarize a pytest junit XML report.
+
+    Returns:
+        Dictionary with counts (total, passed, failed, errors, skipped), duration,
+        failures (test, outcome, message, trimmed traceback), skipped test ids and
+        the slowest tests
+    """
+    tree = ElementTree.parse(path)
+    cases = []
+    for case in tree.iter("testcase"):
+        test = _node_id(root, case.get("classname", ""), case.get("name", ""))
+        duration = float(case.get("time") or 0)
+        outcome, detail = "passed", None
+        for tag in ("failure", "error", "skipped"):
+            detail = case.find(tag)
+            if detail is not None:
+                outcome = {"failure": "failed", "error": "error", "skipped": "skipped"}[tag]
+                break
+        cases.append((test, outcome, duration, detail))
+
+    counts = {name: 0 for name in ("passed", "failed", "error", "skipped")}
+    for _test, outcome, _duration, _detail in cases:
+        counts[outcome] += 1
+    suites = list(tree.iter("testsuite"))
+    failures = [
+        {
+            "test": test,
+            "outcome": outcome,
+            "message": next(iter((detail.get("message") or "").strip().splitlines()), "")[:300],
+            "traceback": _trim_traceback(detail.text),
+        }
+        for test, outcome, _duration, detail in cases
+        if outcome in ("failed", "error")
+    ]
+    slowest = sorted(cases, key=lambda case: case[2], reverse=True)[:SLOWEST_TESTS]
+    return {
+        "total": len(cases),
+        "passed": counts["passed"],
+        "failed": counts["failed"],
+        "errors": counts["error"],
+        "skipped": counts["skipped"],
+        "duration": round(sum(float(suite.get("time") or 0) for suite in suites), 2),
+        "failures": failures[:MAX_REPORTED_TESTS],
+        "skipped_tests": [test for test, outcome, _d, _x in cases if outcome == "skipped"][:MAX_REPORTED_TESTS],
+        "slowest": [{"test": test, "duration": round(duration, 3)} for test, _o, duration, _x in slowest],
+    }
+
+
+def format_run_result(run_result: Dict[str, Any]) -> str:
+    """Render a run_result as a short report for the model."""
+    if not run_result:
+        return "No test results yet."
+    if "total" not in run_result:
+        status = "passed" if run_result.get("success") else "failed"
+        lines = [f"Tests {status} ({run_result.get('scope', 'unknown scope')}) with no structured report."]
+        if run_result.get("output"):
+            lines += ["Output tail:", run_result["output"]]
+        return "\n".join(lines)
+    status = "PASSED" if run_result.get("success") else "FAILED"
+    lines = [
+        f"{status}: {run_result['passed']} passed, {run_result['failed']} failed, "
+        f"{run_result['errors']} errors, {run_result['skipped']} skipped "
+        f"in {run_result['duration']}s ({run_result.get('scope', '')})"
+    ]
+    for failure in run_result.get("failures", []):
+        lines.append(f"- {failure['outcome'].upper()} {failure['test']}: {failure['message']}")
+        if failure["traceback"]:
+            lines += ["    " + line for line in failure["traceback"].splitlines()]
+    if run_result.get("output"):
+        lines += ["Output tail:", run_result["output"]]
+    return "\n".join(lines)
+
+
+def _run_pytest(test_paths: List[str], timeout: int, config: RunnableConfig = None) -> Dict[str, Any]:
+    """Run pytest on the given paths (the whole suite when empty) in the agent's shell session.
+
+    Returns:
+        run_result dictionary: command, success, return_code and the junit summary,
+        or the tail of the output when pytest produced no report
+    """
+    root = workspace_root()
+    report = os.path.join(devagent_dir(root), f"junit-{uuid.uuid4().hex}.xml")
+    command = " ".join([PYTEST_COMMAND, *(shlex.quote(path) for path in test_paths)])
+    # Run from the repository root in a subshell so the agent's own cwd is untouched
+    script = f"(cd {shlex.quote(root)} && {command} --junitxml={shlex.quote(report)})"
+    result = get_sandbox_pool().run(script, key=session_key(config), timeout=timeout)
+
+    run_result: Dict[str, Any] = {
+        "command": command,
+        "success": result["success"],
+        "return_code": result["return_code"],
+        "output": "",
+    }
+    try:
+        run_result.update(parse_junit_xml(report, root))
+    except (OSError, ElementTree.ParseError):
+        # Collection crashed or the run was killed: keep the end of the log instead
+        output = (result["stdout"] + "\n" + result["stderr"]).strip()
+        run_result["output"] = _trim_traceback(output)
+    finally:
+        if os.path.exists(report):
+            os.unlink(report)
+    if result["timed_out"]:
+        run_result["output"] = (run_result["output"] + f"\nTest run timed out after {timeout} seconds").strip()
+    return run_result
+
+
+@tool
+def run_affected_tests_tool(
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    changed_files: Optional[List[str]] = None,
+    run_full_suite: bool = False,
+    timeout: int = TEST_TIMEOUT,
+    state: Annotated[dict, InjectedState] = None,
+    config: RunnableConfig = None,
+) -> Command:
+    """Run only the tests affected by the current changes.
+
+    Changed files are taken from the argument, else from the diff in the agent
+    state, else from git. Tests are picked from the import graph (and per-test
+    coverage data when available). The full suite runs instead when the change
+    cannot be narrowed down (e.g. conftest.py or pyproject.toml changed, a
+    module was deleted, or a data file that tests may read changed).
+
+    Args:
+        changed_files: Paths relative to the repository root (optional)
+        run_full_suite: Also run the full suite once the affected tests pass
+        timeout: Seconds before a test run is killed
+
+    Returns:
+        A compact report (counts, failures with trimmed tracebacks); the structured
+        results are stored in run_result
+    """
+    root = workspace_root()
+    diff = (state or {}).get("diff", "")
+    selection = select_tests(root, changed=changed_files or None, diff=diff)
+    logger.info(f"🧪 TESTS: {selection.reason}")
+
+    run_result: Dict[str, Any] = {
+        "changed_files": selection.changed,
+        "selected_tests": selection.tests,
+        "selection": selection.reason,
+    }
+    try:
+        if selection.full_suite:
+            run_result.update(_run_pytest([], timeout, config), scope="full suite")
+        elif selection.tests:
+            run_result.update(_run_pytest(selection.tests, timeout, config), scope="affected tests")
+            if run_result["success"] and run_full_suite:
+                logger.info("✅ TESTS: Affected tests passed, running the full suite")
+                run_result.update(_run_pytest([], timeout, config), scope="affected tests, then full suite")
+        elif run_full_suite:
+            run_result.update(_run_pytest([], timeout, config), scope="full suite")
+        else:
+            logger.info("✅ TESTS: Nothing to run")
+            run_result.update(scope="none", success=True, output=f"No tests to run: {selection.reason}")
+    except Exception as e:
+        logger.error(f"❌ TESTS: Exception - {str(e)}")
+        run_result.update(scope="error", success=False, return_code=-1, output=f"Error running tests: {str(e)}")
+
+    if run_result["success"]:
+        logger.info(f"✅ TESTS: Passed ({run_result['scope']})")
+    else:
+        logger.error(f"❌ TESTS: Failed ({run_result['scope']}) - {run_result.get('failed', 0)} failed")
+    report = f"Selection: {selection.reason}\n{format_run_result(run_result)}"
+    return Command(update={
+        "run_result": run_result,
+        "messages": [ToolMessage(content=report, name="run_affected_tests_tool", tool_call_id=tool_call_id)],
+    })
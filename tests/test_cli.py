@@ -13,4 +13,24 @@ def test_cli_starts():
     
     assert result.exit_code == 0
     assert "DevAgent" in result.output
-    assert "coding assistant" in result.output
\ No newline at end of file
+    assert "coding assistant" in result.output
+
+
+def test_cli_rejects_resuming_without_checkpoints():
+    """Test that --resume and --fork refuse to start an unsaved session under --no-checkpoint."""
+    runner = CliRunner()
+    for option in ("--resume", "--fork"):
+        result = runner.invoke(main, [option, "latest", "--no-checkpoint"])
+        assert result.exit_code == 2
+        assert "--no-checkpoint" in result.output
+
+
+def test_cli_import_is_lazy():
+    """Test that importing the CLI does not load the agent frameworks, so the prompt shows at once."""
+    import subprocess
+    import sys
+
+    heavy = ["langchain_core", "langgraph", "langgraph_supervisor", "langchain_ollama", "numpy", "devagent.core.graph"]
+    code = f"import sys\nimport devagent.cli\nprint([m for m in {heavy!r} if m in sys.modules])\n"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
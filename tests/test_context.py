@@ -0,0 +1,44 @@
+"""Test conversation context compaction."""
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from devagent.core.context import compact_messages, estimate_tokens
+
+
+def _turn(index, output_chars):
+    return [
+        HumanMessage(content=f"question {index}"),
+        AIMessage(content="", tool_calls=[{"name": "read_file_tool", "args": {"file_path": "a.py"}, "id": f"call-{index}"}]),
+        ToolMessage(content="x" * output_chars, tool_call_id=f"call-{index}", name="read_file_tool"),
+        AIMessage(content=f"answer {index}"),
+    ]
+
+
+def test_compaction_elides_old_tool_output_first():
+    """Test that old tool outputs are elided while recent turns stay verbatim."""
+    messages = _turn(1, 20_000) + _turn(2, 20_000) + _turn(3, 400)
+
+    compacted = compact_messages(messages, token_budget=6_000, keep_recent_turns=2)
+
+    assert len(compacted) == len(messages)
+    assert compacted[2].content.startswith("[Elided read_file_tool output (20000 chars)")
+    assert compacted[2].tool_call_id == "call-1"
+    assert compacted[6].content == "x" * 20_000
+    assert estimate_tokens(compacted) <= 6_000
+
+
+def test_compaction_folds_old_turns_into_summary():
+    """Test that whole old turns are summarized when eliding is not enough."""
+    messages = []
+    for index in range(1, 30):
+        messages += _turn(index, 100)
+
+    compacted = compact_messages(
+        messages, token_budget=500, keep_recent_turns=1, work_products={"diff": "+new line"}
+    )
+
+    assert isinstance(compacted[0], SystemMessage)
+    assert "- User: question 1" in compacted[0].content
+    assert "Answer: answer 28" in compacted[0].content
+    assert "Current diff:\n+new line" in compacted[0].content
+    assert compacted[1:] == messages[-4:]
@@ -0,0 +1,281 @@
+"""Test the supervisor graph."""
+
+import os
+import threading
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import devagent.core.router as router_module
+from devagent.core.graph import DevAgentGraph
+
+
+# Both dispatched branches must be inside the model at once to get past it
+BRANCH_BARRIER = threading.Barrier(2)
+
+
+class ScriptedModel(BaseChatModel):
+    """Fake model: the supervisor dispatches two agents, which wait for each other."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        last = messages[-1]
+        if isinstance(last, ToolMessage) and last.content.startswith("Successfully dispatched"):
+            BRANCH_BARRIER.wait(timeout=10)
+            message = AIMessage(content="branch finished")
+        elif any(isinstance(m, ToolMessage) and "transferred back" in m.content for m in messages):
+            message = AIMessage(content="all done")
+        else:
+            message = AIMessage(content="", tool_calls=[{
+                "name": "dispatch_agents",
+                "args": {"agents": ["retriever", "verifier"]},
+                "id": "dispatch-1",
+            }])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def test_parallel_agents_run_concurrently(monkeypatch):
+    """Test that dispatched agents run as concurrent branches and both results are merged."""
+    monkeypatch.setattr(router_module, "ChatOllama", lambda **kwargs: ScriptedModel())
+    graph = DevAgentGraph(parallel_agents=True)
+    BRANCH_BARRIER.reset()
+
+    result = graph.process_user_input("review the project")
+
+    assert result["response"] == "all done"
+    messages = result["state"]["messages"]
+    contents = [m.content for m in messages]
+    assert contents.count("branch finished") == 2
+    # The dispatch itself is recorded once in the parent state
+    calls = [c["name"] for m in messages if m.type == "ai" for c in m.tool_calls]
+    assert calls.count("dispatch_agents") == 1
+    assert sum(1 for c in contents if c.startswith("Successfully dispatched")) == 1
+
+
+class EchoModel(BaseChatModel):
+    """Fake model: the supervisor answers directly with the number of user messages it has seen."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    @property
+    def _llm_type(self):
+        return "echo"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        turns = sum(1 for m in messages if m.type == "human")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"turn {turns}"))])
+
+
+def test_sessions_are_checkpointed_incrementally(tmp_path, monkeypatch):
+    """Test that a session survives a restart, stores message deltas and can be forked."""
+    from devagent.core.checkpoint import SqliteCheckpointSaver
+
+    monkeypatch.setattr(router_module, "ChatOllama", lambda **kwargs: EchoModel())
+    store = SqliteCheckpointSaver(str(tmp_path / "sessions.sqlite"))
+    graph = DevAgentGraph(checkpointer=store)
+    assert graph.process_user_input("first")["response"] == "turn 1"
+    assert graph.process_user_input("second")["response"] == "turn 2"
+
+    # A new process picks the conversation up from the database
+    resumed = DevAgentGraph(checkpointer=SqliteCheckpointSaver(store.path), thread_id=graph.thread_id)
+    result = resumed.process_user_input("third")
+    assert result["response"] == "turn 3"
+    assert [m.content for m in result["state"]["messages"]][-2:] == ["third", "turn 3"]
+    assert not resumed.pending_run()
+
+    # Later versions of the message list only store the appended messages
+    kinds = dict(store._conn.execute(
+        "SELECT kind, COUNT(*) FROM blobs WHERE channel = 'messages' AND checkpoint_ns = '' GROUP BY kind"
+    ).fetchall())
+    assert kinds["delta"] > kinds["value"]
+
+    fork_id = store.fork_session(graph.thread_id)
+    forked = DevAgentGraph(checkpointer=store, thread_id=fork_id)
+    assert forked.process_user_input("branch")["response"] == "turn 4"
+    assert resumed.process_user_input("main line")["response"] == "turn 4"
+    sessions = {s["thread_id"]: s for s in store.list_sessions()}
+    assert sessions[fork_id]["forked_from"] == graph.thread_id
+    assert sessions[graph.thread_id]["title"] == "first"
+
+
+class QueueModel(BaseChatModel):
+    """Fake model that returns its replies in order, whichever agent asks."""
+
+    replies: list
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    @property
+    def _llm_type(self):
+        return "queue"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=self.replies.pop(0))])
+
+
+def test_trace_records_agent_model_and_tool_spans(tmp_path, monkeypatch):
+    """Test that a traced turn writes one span per agent step, model call and tool call."""
+    from devagent.core.tracing import TraceRecorder, format_trace_summary, read_spans, summarize_spans
+
+    model = QueueModel(replies=[
+        AIMessage(content="", tool_calls=[{"name": "transfer_to_retriever", "args": {}, "id": "t1"}]),
+        AIMessage(content="", tool_calls=[{"name": "glob_tool", "args": {"pattern": "*.toml"}, "id": "t2"}]),
+        AIMessage(content="found pyproject.toml"),
+        AIMessage(content="done"),
+    ])
+    monkeypatch.setattr(router_module, "ChatOllama", lambda **kwargs: model)
+    tracer = TraceRecorder(str(tmp_path))
+    graph = DevAgentGraph(tracer=tracer)
+    assert graph.process_user_input("find the project file")["response"] == "done"
+
+    spans = read_spans(tracer.path)
+    by_kind = {}
+    for span in spans:
+        by_kind.setdefault(span["kind"], []).append(span)
+    turn, = by_kind["turn"]
+    assert [(s["name"], s["attributes"]["step"]) for s in by_kind["agent"]] == [
+        ("supervisor", 1), ("retriever", 2), ("supervisor", 3)
+    ]
+    assert all(s["parent_span_id"] == turn["span_id"] for s in by_kind["agent"])
+    assert [s["attributes"]["agent"] for s in by_kind["llm"]] == ["supervisor", "retriever", "retriever", "supervisor"]
+    assert by_kind["llm"][0]["attributes"]["tool_calls"] == ["transfer_to_retriever"]
+    glob_span = next(s for s in by_kind["tool"] if s["name"] == "glob_tool")
+    assert glob_span["attributes"]["agent"] == "retriever"
+    assert glob_span["attributes"]["bytes_out"] > 0
+
+    summary = summarize_spans(spans)
+    assert summary["turns"] == 1
+    assert summary["agents"]["retriever"]["steps"] == 1
+    assert "glob_tool" in format_trace_summary(summary)
+
+
+def test_replay_benchmark_runs_scenario_offline():
+    """Test that a recorded scenario replays through the whole graph against its fixture."""
+    from devagent.benchmark import load_scenarios, run_scenario
+
+    bench_dir = os.path.join(os.path.dirname(__file__), "..", "benchmarks")
+    scenario, = load_scenarios(os.path.join(bench_dir, "scenarios"), ["explain"])
+    result = run_scenario(scenario, os.path.join(bench_dir, "fixtures"), repeat=1, measure_memory=False)
+
+    assert result["ok"], result["failures"]
+    assert result["llm_calls"] == len(scenario["responses"])
+    assert result["tool_calls"]["gather_context_tool"] == 1
+    assert result["tool_calls"]["transfer_to_retriever"] == 1
+
+
+def test_editor_runs_a_batch_of_edits_in_order(tmp_path):
+    """Test that several edits in one reply apply in order and all end up in the cumulative diff."""
+    from devagent.core.replay import ReplayChatModel, ReplayLLMClient
+
+    (tmp_path / "a.py").write_text("x = 1\ny = 2\n")
+    (tmp_path / "b.py").write_text("z = 3\n")
+
+    def edit(path, old, new):
+        return {"name": "edit_file_tool", "args": {"file_path": path, "old_string": old, "new_string": new}}
+
+    client = ReplayLLMClient([
+        {"content": "", "tool_calls": [{"name": "transfer_to_editor", "args": {}}]},
+        # The second edit of a.py only applies on top of the first
+        {"content": "", "tool_calls": [edit("a.py", "x = 1", "x = 10"), edit("a.py", "x = 10", "x = 100"),
+                                       edit("b.py", "z = 3", "z = 30")]},
+        "edited",
+        "done",
+    ])
+    graph = DevAgentGraph(working_directory=str(tmp_path), model=ReplayChatModel(client))
+    result = graph.process_user_input("bump the constants")
+
+    assert result["response"] == "done"
+    assert (tmp_path / "a.py").read_text() == "x = 100\ny = 2\n"
+    assert (tmp_path / "b.py").read_text() == "z = 30\n"
+    diff = result["state"]["diff"]
+    assert "-x = 1\n+x = 100\n" in diff and "-z = 3\n+z = 30\n" in diff
+    assert diff.count("--- a/a.py") == 1
+
+
+class NoteTakerModel(BaseChatModel):
+    """Fake model: hands the task to the editor, which writes the prompt to NOTE.txt."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    @property
+    def _llm_type(self):
+        return "note-taker"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = next(m.content for m in messages if m.type == "human")
+        last = messages[-1]
+        if last.type == "human":
+            message = AIMessage(content="", tool_calls=[{"name": "transfer_to_editor", "args": {}, "id": "t1"}])
+        elif last.type == "tool" and last.name == "transfer_to_editor":
+            time.sleep(0.3)
+            message = AIMessage(content="", tool_calls=[
+                {"name": "write_file_tool", "args": {"file_path": "NOTE.txt", "content": prompt}, "id": "t2"}
+            ])
+        elif last.type == "tool" and last.name == "write_file_tool":
+            message = AIMessage(content="written")
+        else:
+            message = AIMessage(content=f"done: {prompt}")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def test_batch_runs_tasks_concurrently_in_isolated_worktrees(tmp_path):
+    """Test that batch tasks run in parallel, each editing its own worktree, and results are written."""
+    import json
+    import subprocess
+    from devagent.batch import BatchRunner
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "README.md").write_text("hello\n")
+    git = ["git", "-c", "user.name=t", "-c", "user.email=t@t"]
+    subprocess.run(git + ["init", "-q"], cwd=repo, check=True)
+    subprocess.run(git + ["add", "."], cwd=repo, check=True)
+    subprocess.run(git + ["commit", "-qm", "init"], cwd=repo, check=True)
+
+    tasks = [{"id": f"t{i}", "prompt": f"note {i}"} for i in range(3)]
+    output = tmp_path / "results.jsonl"
+    runner = BatchRunner(str(repo), model=NoteTakerModel(), workers=3, worktree_dir=str(tmp_path / "worktrees"))
+    stats = runner.run(tasks, output_path=str(output))
+
+    assert stats["succeeded"] == 3
+    results = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+    for i in range(3):
+        assert results[f"t{i}"]["response"] == f"done: note {i}"
+        assert f"+note {i}" in results[f"t{i}"]["diff"]
+    # Worktrees are removed and the main checkout is untouched
+    assert not (repo / "NOTE.txt").exists()
+    assert not list((tmp_path / "worktrees").iterdir())
+
+
+def test_trace_takes_time_to_first_token_from_server_timings(tmp_path):
+    """Test that non-streamed model calls get their time to first token and load time from Ollama's timings."""
+    import uuid
+
+    from langchain_core.messages import AIMessage, HumanMessage
+    from langchain_core.outputs import ChatGeneration, LLMResult
+
+    from devagent.core.tracing import TraceRecorder, format_trace_summary, read_spans, summarize_spans
+
+    tracer = TraceRecorder(str(tmp_path))
+    for load_ns in (2_500_000_000, 1_000_000):
+        run_id = uuid.uuid4()
+        tracer.on_chat_model_start({}, [[HumanMessage(content="hi")]], run_id=run_id,
+                                   metadata={"langgraph_node": "editor"})
+        reply = AIMessage(content="ok", response_metadata={"load_duration": load_ns, "prompt_eval_duration": 40_000_000})
+        tracer.on_llm_end(LLMResult(generations=[[ChatGeneration(message=reply)]]), run_id=run_id)
+
+    summary = summarize_spans(read_spans(tracer.path))
+    ttft = next(iter(summary["time_to_first_token"].values()))
+    assert ttft == {"calls": 2, "first_ms": 2540.0, "mean_ms": 1290.5, "load_ms": 2501.0}
+    assert "Time to first token per agent" in format_trace_summary(summary)
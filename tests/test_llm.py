@@ -0,0 +1,355 @@
+"""Test the LLM client layer."""
+
+import asyncio
+import time
+
+from devagent.core.cache import CachedLLMClient
+from devagent.core.deadline import Deadline, FirstTokenTimeout, RetryPolicy, StreamStalled, iter_with_timeouts
+from devagent.core.llm import DevAgentChatModel, LLMClient
+
+
+class CountingClient(LLMClient):
+    """Fake client that echoes the last message and counts calls."""
+
+    def __init__(self, model="fake"):
+        self.model = model
+        self.calls = 0
+
+    def cache_identity(self):
+        return {"provider": "fake", "model": self.model}
+
+    def chat(self, messages):
+        self.calls += 1
+        if messages[-1]["content"] == "fail":
+            return "Error calling Fake: boom"
+        return f"echo: {messages[-1]['content']}"
+
+
+def test_cached_client_hits_memory_and_disk(tmp_path):
+    """Test that identical requests are served from the memory and disk tiers."""
+    messages = [{"role": "user", "content": "hello"}]
+    inner = CountingClient()
+    cached = CachedLLMClient(inner, max_entries=1, disk_path=str(tmp_path / "cache.sqlite"))
+
+    assert cached.chat(messages) == "echo: hello"
+    assert cached.chat(messages) == "echo: hello"
+    assert inner.calls == 1
+    assert cached.stats.memory_hits == 1
+
+    # Pushing a second entry evicts the first from the LRU; the disk tier still has it
+    cached.chat([{"role": "user", "content": "other"}])
+    assert cached.stats.evictions == 1
+    assert cached.chat(messages) == "echo: hello"
+    assert cached.stats.disk_hits == 1
+    assert inner.calls == 2
+
+    # A fresh process (new wrapper, same file) skips inference entirely
+    rerun = CachedLLMClient(CountingClient(), disk_path=str(tmp_path / "cache.sqlite"))
+    assert rerun.chat(messages) == "echo: hello"
+    assert rerun.client.calls == 0
+
+    # Different models never share entries, and errors are not cached
+    other_model = CachedLLMClient(CountingClient(model="bigger"))
+    other_model.chat(messages)
+    assert other_model.client.calls == 1
+    cached.chat([{"role": "user", "content": "fail"}])
+    cached.chat([{"role": "user", "content": "fail"}])
+    assert inner.calls == 4
+
+
+class StreamingClient(CountingClient):
+    """Fake client that streams the echo word by word."""
+
+    def stream_chat(self, messages):
+        self.calls += 1
+        for word in f"echo: {messages[-1]['content']}".split(" "):
+            yield word + " "
+
+
+def test_chat_model_streams_tokens():
+    """Test that DevAgentChatModel streams client tokens in sync and async mode."""
+    client = StreamingClient()
+    model = DevAgentChatModel(llm_client=client)
+
+    chunks = [chunk.content for chunk in model.stream("hi there") if chunk.content]
+    assert chunks == ["echo: ", "hi ", "there "]
+
+    async def collect():
+        return [chunk.content async for chunk in model.astream("again") if chunk.content]
+
+    assert asyncio.run(collect()) == ["echo: ", "again "]
+
+
+def test_cached_client_replays_streams():
+    """Test that a completed stream is cached and replayed without calling the client."""
+    inner = StreamingClient()
+    cached = CachedLLMClient(inner)
+    messages = [{"role": "user", "content": "hello"}]
+
+    assert "".join(cached.stream_chat(messages)) == "echo: hello "
+    assert list(cached.stream_chat(messages)) == ["echo: hello "]
+    assert inner.calls == 1
+
+
+def test_async_chat_overlaps_requests():
+    """Test that achat lets independent requests run concurrently."""
+
+    class SlowAsyncClient(CountingClient):
+        in_flight = 0
+        peak = 0
+        all_in_flight = asyncio.Event()
+
+        async def achat(self, messages):
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            if self.in_flight == 5:
+                self.all_in_flight.set()
+            # Hold each request until all five are in flight; serialized requests give up after a second
+            try:
+                await asyncio.wait_for(self.all_in_flight.wait(), timeout=1)
+            except asyncio.TimeoutError:
+                pass
+            self.in_flight -= 1
+            return self.chat(messages)
+
+    client = SlowAsyncClient()
+    model = DevAgentChatModel(llm_client=CachedLLMClient(client))
+
+    async def run():
+        return await asyncio.gather(*(model.ainvoke(f"q{i}") for i in range(5)))
+
+    results = asyncio.run(run())
+    assert [r.content for r in results] == [f"echo: q{i}" for i in range(5)]
+    assert client.peak == 5
+
+
+def test_chat_model_parses_tool_calls_that_run_concurrently():
+    """Test that bound tools reach the client and a reply's tool calls run as one concurrent batch."""
+    import json
+    import threading
+
+    from langchain_core.tools import tool
+    from langgraph.prebuilt import create_react_agent
+
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+    # Calls run one after another would break the barrier instead of passing it
+    all_running = threading.Barrier(3, timeout=5)
+
+    @tool
+    def slow_read_tool(path: str) -> str:
+        """Read a file slowly."""
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        all_running.wait()
+        with lock:
+            running["now"] -= 1
+        return f"contents of {path}"
+
+    class ToolCallingClient(CountingClient):
+        """Fake client without native tool calling: replies with the prompted JSON format."""
+
+        def chat(self, messages):
+            self.calls += 1
+            assert "slow_read_tool" in messages[0]["content"]
+            if messages[-1]["role"] == "user" and messages[-1]["content"].startswith("Result of"):
+                return "read " + ", ".join(m["content"].split()[-1] for m in messages if m["content"].startswith("Result"))
+            calls = [{"name": "slow_read_tool", "args": {"path": f"f{i}.py"}} for i in range(3)]
+            return "```json\n" + json.dumps({"tool_calls": calls}) + "\n```"
+
+    client = ToolCallingClient()
+    agent = create_react_agent(DevAgentChatModel(llm_client=client), [slow_read_tool])
+
+    result = agent.invoke({"messages": [("user", "read three files")]})
+
+    assert [len(m.tool_calls) for m in result["messages"] if m.type == "ai"] == [3, 0]
+    assert result["messages"][-1].content == "read f0.py, f1.py, f2.py"
+    assert client.calls == 2
+    assert running["peak"] == 3
+
+
+def test_stream_timeouts_distinguish_slow_start_from_stall():
+    """Test deadline handling off the main thread, including retries and stall detection."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def slow_start():
+        time.sleep(0.5)
+        yield "late"
+
+    def stalls():
+        yield "a"
+        yield "b"
+        time.sleep(0.5)
+        yield "c"
+
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise ConnectionError("refused")
+        yield "ok"
+
+    policy = RetryPolicy(attempts=3, base_delay=0.01)
+
+    def run(open_stream):
+        received = []
+        try:
+            for item in iter_with_timeouts(open_stream, 0.2, 0.2, Deadline(5), policy):
+                received.append(item)
+        except TimeoutError as e:
+            return received, type(e)
+        return received, None
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(run, slow_start).result() == ([], FirstTokenTimeout)
+        assert pool.submit(run, stalls).result() == (["a", "b"], StreamStalled)
+        assert pool.submit(run, flaky).result() == (["ok"], None)
+    assert len(attempts) == 2
+
+
+def test_abandoned_calls_do_not_hold_up_later_ones():
+    """Test that calls past their deadline are abandoned on daemon threads without delaying new calls."""
+    import threading
+
+    from devagent.core.deadline import DeadlineExceeded, run_with_deadline
+
+    release = threading.Event()
+    timeouts = 0
+    try:
+        for _ in range(40):
+            try:
+                run_with_deadline(release.wait, Deadline(0.01))
+            except DeadlineExceeded:
+                timeouts += 1
+        assert timeouts == 40
+        assert run_with_deadline(lambda: "fresh", Deadline(0.5)) == "fresh"
+        assert all(t.daemon for t in threading.enumerate() if t.name.startswith("devagent-llm"))
+    finally:
+        release.set()
+
+
+def test_router_escalates_unusable_small_model_answers():
+    """Test that roles go to their tier and unusable small-model answers are retried on the large model."""
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.tools import tool
+
+    from devagent.core.router import ModelRouter
+
+    @tool
+    def read_file_tool(path: str) -> str:
+        """Read a file."""
+        return path
+
+    class ToolModel(GenericFakeChatModel):
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+    replies = {
+        "small": [AIMessage(content="", tool_calls=[{"name": "delete_everything", "args": {}, "id": "1"}])],
+        "large": [AIMessage(content="", tool_calls=[{"name": "read_file_tool", "args": {"path": "a"}, "id": "2"}]),
+                  AIMessage(content="patched")],
+    }
+    router = ModelRouter(
+        tier_models={"small": "small", "large": "large"},
+        model_factory=lambda name: ToolModel(messages=iter(replies[name])),
+    )
+
+    retriever = router.chat_model("retriever").bind_tools([read_file_tool])
+    assert retriever.invoke("where is a?").tool_calls[0]["name"] == "read_file_tool"
+    assert router.chat_model("editor").invoke("patch a").content == "patched"
+
+    stats = {(row["role"], row["tier"]): row for row in router.stats()}
+    assert stats[("retriever", "small")]["escalations"] == 1
+    assert stats[("retriever", "small")]["reasons"] == {"unknown tool delete_everything": 1}
+    assert stats[("retriever", "large")]["calls"] == 1
+    assert ("editor", "small") not in stats and stats[("editor", "large")]["calls"] == 1
+    assert "retriever" in router.format_stats()
+
+
+def test_router_awaits_tier_models_and_streams_only_accepted_answers():
+    """Test that async calls await the tier model and an escalated answer's tokens never reach the stream."""
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage, AIMessageChunk
+    from langchain_core.outputs import ChatGenerationChunk
+    from langgraph.graph import END, START, MessagesState, StateGraph
+
+    from devagent.core.router import ModelRouter
+
+    class AsyncOnlyModel(GenericFakeChatModel):
+        def _generate(self, *args, **kwargs):
+            raise AssertionError("sync path used")
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            return super()._generate(messages, stop=stop, **kwargs)
+
+    replies = {"small": iter([AIMessage(content="")]), "large": iter([AIMessage(content="final answer")])}
+    router = ModelRouter(
+        tier_models={"small": "small", "large": "large"},
+        model_factory=lambda name: AsyncOnlyModel(messages=replies[name]),
+    )
+    model = router.chat_model("retriever")
+    assert asyncio.run(model.ainvoke("where is a?")).content == "final answer"
+
+    class BrokenStreamModel(GenericFakeChatModel):
+        def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content="half an answer"))
+            if run_manager:
+                run_manager.on_llm_new_token("half an answer", chunk=chunk)
+            yield chunk
+            raise ConnectionError("stream cut")
+
+    router = ModelRouter(
+        tier_models={"small": "small", "large": "large"},
+        model_factory=lambda name: (BrokenStreamModel if name == "small" else GenericFakeChatModel)(
+            messages=iter([AIMessage(content="big answer")])
+        ),
+    )
+
+    def agent(state):
+        return {"messages": [router.chat_model("retriever").invoke(state["messages"])]}
+
+    graph = StateGraph(MessagesState)
+    graph.add_node("agent", agent)
+    graph.add_edge(START, "agent")
+    graph.add_edge("agent", END)
+    stream = graph.compile().stream({"messages": [("user", "hi")]}, stream_mode="messages")
+    # The small model's half answer was escalated, so only the large model's tokens are streamed
+    assert "".join(chunk.content for chunk, _ in stream) == "big answer"
+
+
+def test_model_sessions_pin_models_with_one_context_size(monkeypatch):
+    """Test that each model gets the largest context size of its roles and is warmed with it."""
+    import ollama
+
+    from devagent.core.llm import OllamaClient
+    from devagent.core.model_session import ModelSessionManager
+    from devagent.core.router import ModelRouter
+
+    loads = []
+
+    class FakeOllama:
+        def __init__(self, host=None, timeout=None):
+            pass
+
+        def generate(self, model, prompt, keep_alive, options):
+            loads.append((model, keep_alive, options["num_ctx"]))
+
+    monkeypatch.setattr(ollama, "Client", FakeOllama)
+    sessions = ModelSessionManager(
+        keep_alive="1h",
+        role_num_ctx={"supervisor": 4096, "retriever": 4096, "executor": 4096, "pr_bot": 4096, "verifier": 8192},
+    )
+    router = ModelRouter(tier_models={"small": "small", "large": "large"}, sessions=sessions)
+
+    # The large model also answers escalated small-tier calls
+    assert set(router.roles_on("large")) == set(router.role_tiers)
+    assert router.model("small").num_ctx == 4096 and router.model("large").num_ctx == 32768
+    assert router.model("large").keep_alive == "1h"
+    client = OllamaClient(model="small", keep_alive="1h", num_ctx=4096)
+    assert client._request_options() == {"keep_alive": "1h", "options": {"num_ctx": 4096}}
+
+    assert set(router.warm()) == {"small", "large"}
+    assert loads == [("small", "1h", 4096), ("large", "1h", 32768)]
@@ -0,0 +1,153 @@
+"""Test the persistent repository index."""
+
+import subprocess
+
+from devagent.index import RepoIndex, SemanticIndex
+from devagent.index.semantic import HashingEmbedder
+
+
+def test_index_updates_incrementally(tmp_path):
+    """Test that the index picks up added, changed and removed files."""
+    (tmp_path / "app.py").write_text("class Server:\n    def start(self):\n        pass\n")
+    (tmp_path / "notes.md").write_text("retry logic lives in the server\n")
+
+    index = RepoIndex(str(tmp_path))
+    assert index.refresh()["added"] == 2
+    assert index.refresh()["unchanged"] == 2
+
+    symbols = index.find_symbols("start")
+    assert symbols[0]["path"] == "app.py"
+    assert symbols[0]["parent"] == "Server"
+    assert index.search_chunks("retry")[0]["path"] == "notes.md"
+
+    (tmp_path / "app.py").write_text("def handle_request():\n    pass\n")
+    (tmp_path / "notes.md").unlink()
+    stats = index.refresh()
+    assert stats["updated"] == 1
+    assert stats["removed"] == 1
+    assert index.find_symbols("start") == []
+    assert index.find_files("**/*.py") == ["app.py"]
+    index.close()
+
+
+def test_index_of_a_repository_subdirectory_follows_git_changes(tmp_path):
+    """Test the git-narrowed refresh when the index root is a subdirectory of the repository."""
+    def git(*args):
+        subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=tmp_path, check=True,
+                       capture_output=True)
+
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (sub / "m.py").write_text("def old():\n    pass\n")
+    (tmp_path / "top.py").write_text("def elsewhere():\n    pass\n")
+    git("init", "-q")
+    git("add", "-A")
+    git("commit", "-q", "-m", "init")
+
+    index = RepoIndex(str(sub))
+    assert index.refresh()["added"] == 1
+
+    # Tracked edit, untracked file, and an untracked file in a skipped directory
+    (sub / "m.py").write_text("def new():\n    pass\n")
+    (sub / "extra.py").write_text("def extra():\n    pass\n")
+    (sub / "node_modules").mkdir()
+    (sub / "node_modules" / "dep.js").write_text("function dep() {}\n")
+    stats = index.refresh()
+    assert (stats["updated"], stats["added"]) == (1, 1)
+    assert [s["path"] for s in index.find_symbols("new")] == ["m.py"]
+
+    # A commit touching the subdirectory and the top level
+    (sub / "m.py").write_text("def newer():\n    pass\n")
+    (tmp_path / "top.py").write_text("def changed():\n    pass\n")
+    git("add", "-A", ".", ":!sub/node_modules")
+    git("commit", "-q", "-m", "change")
+    assert index.refresh()["updated"] == 1
+    assert index.find_symbols("newer")[0]["path"] == "m.py"
+    assert index.find_files("**/*") == ["extra.py", "m.py"]
+    index.close()
+
+
+def test_symbol_index_tracks_references_and_bases(tmp_path):
+    """Test that definitions, references, imports and class bases are indexed per file."""
+    (tmp_path / "base.py").write_text(
+        "class Handler:\n"
+        "    def handle(self, request):\n"
+        "        raise NotImplementedError\n"
+    )
+    (tmp_path / "app.py").write_text(
+        "from base import Handler\n\n"
+        "class JsonHandler(Handler):\n"
+        "    def handle(self, request):\n"
+        "        return encode(request)\n\n"
+        "def encode(data):\n"
+        "    return str(data)\n\n"
+        "def serve(handler):\n"
+        "    return handler.handle({})\n"
+    )
+    index = RepoIndex(str(tmp_path))
+    index.refresh()
+
+    definitions = index.find_definitions("JsonHandler.handle")
+    assert [(d["path"], d["line"], d["end_line"]) for d in definitions] == [("app.py", 4, 5)]
+    assert definitions[0]["signature"] == "def handle(self, request):"
+    assert len(index.find_definitions("handle")) == 2
+
+    references = [(r["path"], r["line"], r["kind"]) for r in index.find_references("Handler")]
+    assert references == [("app.py", 1, "import"), ("app.py", 3, "read")]
+    assert [(r["line"], r["kind"]) for r in index.find_references("encode")] == [(5, "call")]
+    assert [(r["line"], r["kind"]) for r in index.find_references("handle")] == [(11, "call")]
+
+    assert [c["class"] for c in index.subclasses("Handler")] == ["JsonHandler"]
+    outline = index.file_outline("app.py")
+    assert outline["bases"] == {"JsonHandler": ["Handler"]}
+    assert [s["name"] for s in outline["symbols"]] == ["JsonHandler", "handle", "encode", "serve"]
+
+    # Editing a file replaces its references
+    (tmp_path / "app.py").write_text("def encode(data):\n    return data\n")
+    index.refresh()
+    assert index.find_references("Handler") == []
+    index.close()
+
+
+def test_semantic_index_reembeds_only_changed_files(tmp_path):
+    """Test that semantic search ranks by meaning and re-embeds only changed files."""
+    (tmp_path / "http.py").write_text(
+        "def fetch_with_backoff(url, attempts=3):\n"
+        "    for attempt in range(attempts):\n"
+        "        try:\n            return get(url)\n"
+        "        except TimeoutError:\n            sleep(2 ** attempt)\n"
+    )
+    (tmp_path / "shapes.py").write_text("class Circle:\n    def area(self):\n        return 3.14 * self.radius ** 2\n")
+
+    index = RepoIndex(str(tmp_path))
+    index.refresh()
+    semantic = SemanticIndex(index, embedder=HashingEmbedder())
+    assert semantic.refresh() == {"files": 2, "chunks": 2, "removed": 0}
+    hits = semantic.search("retry the request after a timeout", k=2)
+    assert hits[0]["path"] == "http.py"
+    assert (hits[0]["start_line"], hits[0]["end_line"]) == (1, 6)
+
+    (tmp_path / "shapes.py").write_text("class Square:\n    def area(self):\n        return self.side ** 2\n")
+    index.refresh()
+    assert semantic.refresh()["files"] == 1
+    assert semantic.search("square area", k=1)[0]["path"] == "shapes.py"
+    semantic.close()
+    index.close()
+
+
+def test_workspace_indexes_are_released(tmp_path):
+    """Test that the shared indexes of a removed working directory are closed and forgotten."""
+    from devagent.index import get_repo_index, get_semantic_index
+    from devagent.index.impact import get_import_graph
+    from devagent.tools.index_tools import close_workspace_indexes
+
+    (tmp_path / "app.py").write_text("def main():\n    pass\n")
+    index = get_repo_index(str(tmp_path))
+    semantic = get_semantic_index(str(tmp_path))
+    graph = get_import_graph(str(tmp_path))
+
+    close_workspace_indexes(str(tmp_path))
+    assert get_repo_index(str(tmp_path)) is not index
+    assert get_semantic_index(str(tmp_path)) is not semantic
+    assert get_import_graph(str(tmp_path)) is not graph
+    close_workspace_indexes(str(tmp_path))
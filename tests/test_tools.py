@@ -0,0 +1,304 @@
+"""Test core tools."""
+
+import time
+
+from devagent.tools import bash_tool, grep_tool, read_file_tool
+
+
+def test_grep_tool_searches_tree(tmp_path):
+    """Test that grep_tool searches a directory, skipping ignored and binary files."""
+    (tmp_path / ".gitignore").write_text("build/\n")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "out.py").write_text("def retry():\n    pass\n")
+    (tmp_path / "blob.bin").write_bytes(b"\0retry")
+    (tmp_path / "client.py").write_text("import time\n\ndef retry(fn):\n    return fn()\n")
+    (tmp_path / "notes.md").write_text("see retry() in client.py\n")
+
+    matches = grep_tool.invoke({"pattern": r"retry\(", "path": str(tmp_path), "context_lines": 1})
+
+    assert len(matches) == 2
+    # Definitions rank first and carry their context lines
+    assert matches[0].startswith(str(tmp_path / "client.py") + "-2-")
+    assert "client.py:3: def retry(fn):" in matches[0]
+    assert "notes.md:1:" in matches[1]
+
+    # Totals count every match, including those past the per-file cap
+    from devagent.tools.search import MAX_MATCHES_PER_FILE, search_files
+
+    (tmp_path / "many.py").write_text("retry()\n" * (MAX_MATCHES_PER_FILE + 5))
+    result = search_files(r"retry\(", root=str(tmp_path), max_results=50)
+    assert len(result.matches) == MAX_MATCHES_PER_FILE + 2
+    assert result.total_matches == MAX_MATCHES_PER_FILE + 7 and result.truncated
+
+
+def test_read_file_tool_pages_large_files(tmp_path):
+    """Test that read_file_tool returns bounded pages with a continuation marker."""
+    path = tmp_path / "big.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 5001)))
+
+    first = read_file_tool.invoke({"file_path": str(path), "limit": 100})
+    assert first.startswith("line 1\n")
+    assert first.endswith("[Showing lines 1-100 of 5000; call read_file_tool with offset=101 to continue]")
+
+    page = read_file_tool.invoke({"file_path": str(path), "offset": 4999, "max_bytes": 1000})
+    assert page == "line 4999\nline 5000\n[Showing lines 4999-5000 of 5000]"
+
+    small = tmp_path / "small.txt"
+    small.write_text("a\nb\n")
+    assert read_file_tool.invoke({"file_path": str(small)}) == "a\nb\n"
+
+
+def test_sandbox_sessions_persist_per_agent(tmp_path):
+    """Test that leased shell sessions keep state per agent and are replaced after a timeout."""
+    from devagent.tools.sandbox import SandboxPool
+
+    (tmp_path / "pkg").mkdir()
+    pool = SandboxPool(str(tmp_path), warm_sessions=1, max_sessions=2)
+    try:
+        assert pool.run("cd pkg && export STAGE=setup", key="executor")["success"]
+        result = pool.run("pwd; echo $STAGE; echo oops >&2; exit_code=4; (exit $exit_code)", key="executor")
+        assert result["stdout"].splitlines() == [str(tmp_path / "pkg"), "setup"]
+        assert result["stderr"] == "oops\n"
+        assert result["return_code"] == 4
+
+        # Another agent gets its own session
+        assert pool.run("pwd", key="verifier")["stdout"].strip() == str(tmp_path)
+
+        # A timeout stops the rest of the command line too, keeps the output so far
+        # and replaces the session
+        result = pool.run("echo started; sleep 1 | cat; touch after", key="executor", timeout=0.3)
+        assert result["timed_out"] and not result["success"]
+        assert result["stdout"] == "started\n"
+        time.sleep(1.2)
+        assert not (tmp_path / "pkg" / "after").exists()
+        assert pool.run("pwd", key="executor")["stdout"].strip() == str(tmp_path)
+
+        # A command that exits the shell gets a fresh session next time
+        pool.run("cd pkg", key="executor")
+        assert pool.run("exit 3", key="executor")["return_code"] == 3
+        assert pool.run("pwd", key="executor")["stdout"].strip() == str(tmp_path)
+    finally:
+        pool.close()
+
+
+def test_bash_output_is_capped_and_spilled():
+    """Test that long command output is cut to head and tail with the rest in a file."""
+    from devagent.tools.sandbox import OUTPUT_HEAD_BYTES, OUTPUT_TAIL_BYTES
+
+    result = bash_tool.invoke({"command": "seq 1 100000", "timeout": 60})
+
+    assert result["success"]
+    assert len(result["stdout"]) < OUTPUT_HEAD_BYTES + OUTPUT_TAIL_BYTES + 300
+    assert result["stdout"].startswith("1\n2\n")
+    assert result["stdout"].endswith("99999\n100000\n")
+    assert "bytes omitted" in result["stdout"]
+    with open(result["stdout_file"]) as f:
+        assert f.read().splitlines() == [str(i) for i in range(1, 100001)]
+
+
+def test_run_affected_tests_selects_by_imports(tmp_path, monkeypatch):
+    """Test that only tests importing a changed module run, with fallbacks for wide changes."""
+    from devagent.index.impact import select_tests
+    from devagent.tools import run_affected_tests_tool
+
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "__init__.py").write_text("")
+    (tmp_path / "app" / "util.py").write_text("def double(x):\n    return 2 * x\n")
+    (tmp_path / "app" / "api.py").write_text("from .util import double\n\ndef handler(x):\n    return double(x)\n")
+    (tmp_path / "app" / "other.py").write_text("VALUE = 1\n")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_api.py").write_text("from app.api import handler\n\ndef test_handler():\n    assert handler(2) == 4\n")
+    (tmp_path / "tests" / "test_other.py").write_text("from app import other\n\ndef test_other():\n    assert other.VALUE == 2\n")
+    (tmp_path / "tests" / "data").mkdir()
+    (tmp_path / "tests" / "data" / "setup.py").write_text("")
+
+    # util.py reaches test_api.py through api.py; test_other.py is unaffected
+    selection = select_tests(str(tmp_path), changed=["app/util.py"])
+    assert selection.tests == ["tests/test_api.py"]
+    readme = select_tests(str(tmp_path), changed=["README.md"])
+    assert readme.tests == [] and not readme.full_suite
+    assert select_tests(str(tmp_path), changed=["pyproject.toml"]).full_suite
+    # Data files and deleted modules cannot be traced through imports
+    assert select_tests(str(tmp_path), changed=["tests/data/cases.json"]).full_suite
+    assert select_tests(str(tmp_path), changed=["app/removed.py"]).full_suite
+    # Nested configuration only affects the tests below it
+    assert not select_tests(str(tmp_path), changed=["tests/data/setup.py"]).full_suite
+    nested = select_tests(str(tmp_path), changed=["tests/conftest.py"])
+    assert not nested.full_suite and nested.tests == ["tests/test_api.py", "tests/test_other.py"]
+
+    monkeypatch.chdir(tmp_path)
+    diff = "--- a/app/util.py\n+++ b/app/util.py\n@@ -1 +1 @@\n"
+    command = run_affected_tests_tool.invoke(_tool_call({"state": {"diff": diff}}))
+    run_result = command.update["run_result"]
+    assert run_result["selected_tests"] == ["tests/test_api.py"]
+    assert run_result["success"] and run_result["passed"] == 1
+
+    command = run_affected_tests_tool.invoke(_tool_call({"changed_files": ["README.md"], "state": {}}))
+    assert command.update["run_result"]["scope"] == "none"
+
+
+def test_test_selection_includes_files_written_outside_the_diff(tmp_path):
+    """Test that files changed without the edit tools (write_file_tool, bash) are still selected for."""
+    import subprocess
+
+    from devagent.index.impact import select_tests
+
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.py").write_text("VALUE = 1\n")
+        (tmp_path / f"test_{name}.py").write_text(f"from {name} import VALUE\n\ndef test_value():\n    assert VALUE\n")
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "add", "-A"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init"],
+                   cwd=tmp_path, check=True)
+
+    # a.py and b.py went through the edit tools, c.py was written directly
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.py").write_text("VALUE = 2\n")
+    diff = "".join(f"--- a/{name}.py\n+++ b/{name}.py\n@@ -1 +1 @@\n" for name in ("a", "b"))
+
+    selection = select_tests(str(tmp_path), diff=diff)
+    assert sorted(selection.changed) == ["a.py", "b.py", "c.py"]
+    assert selection.tests == ["test_a.py", "test_b.py", "test_c.py"]
+
+
+def test_run_result_summarizes_failures(tmp_path, monkeypatch):
+    """Test that pytest results are stored as compact structured outcomes, not raw logs."""
+    from devagent.tools import run_affected_tests_tool
+
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_math.py").write_text(
+        "import pytest\n\n"
+        "def helper(x):\n    return x + 1\n\n"
+        "def test_ok():\n    assert helper(1) == 2\n\n"
+        "def test_broken():\n    assert helper(1) == 3\n\n"
+        "@pytest.mark.skip(reason='later')\ndef test_skipped():\n    pass\n"
+    )
+    monkeypatch.chdir(tmp_path)
+
+    command = run_affected_tests_tool.invoke(_tool_call({"changed_files": ["tests/test_math.py"], "state": {}}))
+    run_result = command.update["run_result"]
+
+    assert not run_result["success"]
+    assert (run_result["passed"], run_result["failed"], run_result["skipped"]) == (1, 1, 1)
+    [failure] = run_result["failures"]
+    assert failure["test"] == "tests/test_math.py::test_broken"
+    assert "assert 2 == 3" in failure["message"]
+    report = command.update["messages"][0].content
+    assert "FAILED: 1 passed, 1 failed" in report
+    assert "tests/test_math.py::test_broken" in report
+
+
+def test_later_test_run_replaces_earlier_results(tmp_path, monkeypatch):
+    """Test that a run without a junit report does not inherit the failures of the run before it."""
+    from langgraph.graph import END, START, StateGraph
+
+    from devagent.core.state import ExecutorState
+    from devagent.tools import run_affected_tests_tool
+    from devagent.tools.testing import format_run_result
+
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_math.py").write_text("def test_broken():\n    assert 1 == 2\n")
+    monkeypatch.chdir(tmp_path)
+    runs = [{"changed_files": ["tests/test_math.py"]}, {"changed_files": ["README.md"]}]
+
+    def run_tests(index):
+        def node(state):
+            command = run_affected_tests_tool.invoke(_tool_call({**runs[index], "state": {}}))
+            return {"run_result": command.update["run_result"]}
+        return node
+
+    graph = StateGraph(ExecutorState)
+    graph.add_node("failing", run_tests(0))
+    graph.add_node("nothing", run_tests(1))
+    graph.add_edge(START, "failing")
+    graph.add_edge("failing", "nothing")
+    graph.add_edge("nothing", END)
+    run_result = graph.compile().invoke({"messages": []})["run_result"]
+
+    assert run_result["scope"] == "none" and "failures" not in run_result
+    assert "test_broken" not in format_run_result(run_result)
+
+
+def test_gather_context_fuses_sources_within_budget(tmp_path, monkeypatch):
+    """Test that hits from all sources are ranked, deduplicated and packed into the token budget."""
+    from devagent.tools import gather_context_tool
+    from devagent.tools.retrieval import CHARS_PER_TOKEN
+
+    (tmp_path / "client.py").write_text(
+        "import time\n\n\n"
+        "def retry_request(send, attempts=3):\n"
+        "    for attempt in range(attempts):\n"
+        "        try:\n            return send()\n"
+        "        except TimeoutError:\n            time.sleep(2 ** attempt)\n"
+        "    raise TimeoutError('gave up')\n"
+    )
+    (tmp_path / "big.py").write_text("".join(f"VALUE_{i} = {i}  # filler line\n" for i in range(400)))
+    (tmp_path / "notes.md").write_text("Call retry_request for flaky endpoints.\n")
+    monkeypatch.setenv("DEVAGENT_EMBEDDER", "hashing")
+    monkeypatch.chdir(tmp_path)
+
+    command = gather_context_tool.invoke(_tool_call({"query": "retry_request backoff"}, "gather_context_tool"))
+    context = command.update["context"]
+    assert context == command.update["messages"][0].content
+    headers = [line for line in context.splitlines() if line.startswith("--- ")]
+    # The definition is hit by every source but packed once, ahead of the notes
+    assert headers[0].startswith("--- client.py:")
+    assert sum(header.startswith("--- client.py:") for header in headers) == 1
+    assert any(header.startswith("--- notes.md:") for header in headers)
+
+    command = gather_context_tool.invoke(
+        _tool_call({"query": "filler VALUE_1", "token_budget": 100}, "gather_context_tool")
+    )
+    packed = command.update["context"].split("\n", 2)[2]
+    assert len(packed) <= 100 * CHARS_PER_TOKEN
+
+
+def test_edit_tools_apply_atomically_and_record_diff(tmp_path, monkeypatch):
+    """Test that edits are validated, applied atomically and folded into one cumulative diff."""
+    from devagent.tools import apply_patch_tool, edit_file_tool
+    from devagent.tools.editing import apply_hunks, parse_unified_diff
+
+    source = "".join(f"line {i}\n" for i in range(1, 3001))
+    (tmp_path / "big.py").write_text(source)
+    (tmp_path / "small.py").write_text("a = 1\nb = 2\n")
+    monkeypatch.chdir(tmp_path)
+
+    command = edit_file_tool.invoke(_tool_call(
+        {"file_path": "big.py", "old_string": "line 1500\n", "new_string": "line fifteen hundred\n", "state": {}},
+        "edit_file_tool",
+    ))
+    diff = command.update["diff"]
+    assert (tmp_path / "big.py").read_text() == source.replace("line 1500\n", "line fifteen hundred\n")
+    assert "-line 1500\n+line fifteen hundred\n" in diff
+
+    # The hunk header is off by ten lines; the context still locates it
+    patch = (
+        "--- a/big.py\n+++ b/big.py\n@@ -1500,3 +1500,3 @@\n"
+        " line 1509\n-line 1510\n+line ten\n line 1511\n"
+        "--- a/small.py\n+++ b/small.py\n@@ -1,2 +1,2 @@\n-a = 1\n+a = 10\n b = 2\n"
+    )
+    command = apply_patch_tool.invoke(_tool_call({"patch": patch, "state": {"diff": diff}}, "apply_patch_tool"))
+    diff = command.update["diff"]
+    assert "line ten" in (tmp_path / "big.py").read_text()
+    assert (tmp_path / "small.py").read_text() == "a = 10\nb = 2\n"
+    # One section per file, relative to the original content
+    big_section = diff.split("--- a/small.py")[0]
+    assert diff.count("--- a/big.py") == 1
+    assert apply_hunks(source, parse_unified_diff(big_section)[0].hunks) == (tmp_path / "big.py").read_text()
+
+    # A patch with one stale hunk changes nothing
+    stale = patch.replace("+line ten", "+line eleven").replace("-a = 1\n", "-a = 2\n")
+    command = apply_patch_tool.invoke(_tool_call({"patch": stale, "state": {"diff": diff}}, "apply_patch_tool"))
+    assert "diff" not in command.update
+    assert command.update["messages"][0].status == "error"
+    assert (tmp_path / "small.py").read_text() == "a = 10\nb = 2\n"
+
+    command = edit_file_tool.invoke(_tool_call(
+        {"file_path": "big.py", "old_string": "line 7", "new_string": "x", "state": {"diff": diff}},
+        "edit_file_tool",
+    ))
+    assert "occurs" in command.update["messages"][0].content
+
+
+def _tool_call(args, name="run_affected_tests_tool"):
+    return {"name": name, "args": args, "id": "call-1", "type": "tool_call"}